@@ -0,0 +1,186 @@
+"""Measure the throughput of battles with the output on and off.
+
+A player who always attacks the first enemy alive fights a group of goblins until they are all dead, the
+same battle is played over and over with the output in each of these modes:
+
+    text        the messages are rendered and kept, like a game printing them
+    discarded   the output function does nothing, the messages are still rendered
+    none        the output function is None, the events are not even created
+    headless    pyzork.utils.headless(), the library skips the output entirely
+
+The modes take turns within every run so that they share the same noise of the machine, and the best run of
+each mode is reported. Results can be saved as a baseline and later runs compared against it, the comparison
+uses the best run and exits with status 1 if any mode got slower than the threshold.
+
+Usage:
+    python benchmarks/bench_battle.py [--enemies N] [--battles N] [--runs N]
+    python benchmarks/bench_battle.py --save NAME
+    python benchmarks/bench_battle.py --compare NAME [--threshold PERCENT]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines")
+sys.path.insert(0, ROOT)
+
+import pyzork
+from pyzork import utils
+
+
+class AutoPlayer(pyzork.Player):
+    """Player"""
+    def battle_logic(self, battle):
+        self.do_attack(battle.alive[0])
+
+
+@pyzork.Modifier.add_effect(duration=3)
+def Bleeding(modifier, target):
+    target.take_pure_damage(1)
+
+
+class Goblin(pyzork.NPC):
+    """Goblin"""
+    max_health = 12
+    attack = 1
+    defense = 1
+
+    def battle_logic(self, battle):
+        self.do_attack(battle.player)
+        battle.player.add_modifier(Bleeding())
+
+
+def battle(enemies):
+    player = AutoPlayer(max_health=10 ** 9, attack=5)
+    fight = pyzork.Battle(player=player, enemies=[Goblin() for _ in range(enemies)])
+    fight.battle_loop()
+    return fight.turn
+
+
+def play(mode, enemies, battles):
+    lines = []
+    if mode == "text":
+        utils.update_output(lines.append)
+    elif mode == "discarded":
+        utils.update_output(lambda text: None)
+    else:
+        utils.update_output(None)
+
+    utils.set_headless(mode == "headless")
+    try:
+        start = time.perf_counter()
+        turns = sum(battle(enemies) for _ in range(battles))
+        return time.perf_counter() - start, turns, len(lines)
+    finally:
+        utils.set_headless(False)
+        utils.update_output(lambda text: print(text))
+
+
+MODES = ["text", "discarded", "none", "headless"]
+
+
+def run(enemies, battles, runs):
+    timings = {mode: [] for mode in MODES}
+    counts = {}
+    gc.disable()
+    try:
+        for mode in MODES:
+            play(mode, enemies, 1)
+
+        # the modes take turns so that a slower stretch of the machine doesn't land on a single mode
+        for _ in range(runs):
+            for mode in MODES:
+                elapsed, turns, lines = play(mode, enemies, battles)
+                timings[mode].append(elapsed)
+                counts[mode] = (turns, lines)
+    finally:
+        gc.enable()
+
+    results = {}
+    for mode in MODES:
+        best = min(timings[mode])
+        turns, lines = counts[mode]
+        results[mode] = {
+            "best_s": best,
+            "battles_per_sec": battles / best,
+            "turns_per_sec": turns / best,
+            "lines": lines,
+        }
+
+    return {
+        "python": platform.python_version(),
+        "enemies": enemies,
+        "battles": battles,
+        "runs": runs,
+        "results": results,
+    }
+
+
+def report(data, baseline=None, threshold=10.0):
+    regressions = []
+    text = data["results"]["text"]["best_s"]
+    header = f"{'mode':<12}{'battles/s':>12}{'turns/s':>12}{'lines':>10}{'vs text':>10}"
+    print(header + ("   change" if baseline else ""))
+    for mode, result in data["results"].items():
+        line = (f"{mode:<12}{result['battles_per_sec']:>12.1f}{result['turns_per_sec']:>12.0f}"
+                f"{result['lines']:>10}{text / result['best_s']:>9.2f}x")
+        old = (baseline or {}).get("results", {}).get(mode)
+        if old:
+            change = (result["best_s"] - old["best_s"]) / old["best_s"] * 100
+            line += f"{change:>+8.1f}%"
+            if change > threshold:
+                regressions.append(mode)
+                line += "  REGRESSION"
+
+        print(line)
+
+    return regressions
+
+
+def baseline_path(name):
+    return os.path.join(BASELINES, f"battle-{name}.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=20, help="how many goblins are in each battle")
+    parser.add_argument("--battles", type=int, default=20, help="how many battles are played per run")
+    parser.add_argument("--runs", type=int, default=30, help="how many times each mode is played, the best run counts")
+    parser.add_argument("--save", metavar="NAME", help="store the results as benchmarks/baselines/battle-NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/battle-NAME.json")
+    parser.add_argument("--threshold", type=float, default=10.0, help="slowdown in percent counted as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+        # the battles only match if they are the same size
+        args.enemies, args.battles = baseline["enemies"], baseline["battles"]
+
+    data = run(args.enemies, args.battles, args.runs)
+    print(f"pyzork battles, python {data['python']}, {args.battles} battles of {args.enemies} goblins, {args.runs} runs")
+    regressions = report(data, baseline, args.threshold)
+
+    if args.save:
+        os.makedirs(BASELINES, exist_ok=True)
+        with open(baseline_path(args.save), "w") as f:
+            json.dump(data, f, indent=4)
+
+        print(f"\nsaved baseline {baseline_path(args.save)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} mode(s) slower than the {args.threshold}% threshold")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""Measure how long `import pyzork` takes in a fresh interpreter.
+
+Usage: python benchmarks/bench_import.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNIPPET = "import time; s = time.perf_counter(); import pyzork; print(time.perf_counter() - s)"
+
+def run_once():
+    out = subprocess.run([sys.executable, "-c", SNIPPET], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+def main(runs=20):
+    timings = sorted(run_once() * 1000 for _ in range(runs))
+    print(f"import pyzork over {runs} runs")
+    print(f"  min    {timings[0]:.2f} ms")
+    print(f"  median {statistics.median(timings):.2f} ms")
+    print(f"  max    {timings[-1]:.2f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,170 @@
+"""Measure how many bytes the core objects of `pyzork` take in memory.
+
+Every kind of object is created many times in a row while tracemalloc traces the allocations, the bytes
+still allocated at the end divided by the number of objects is the footprint of one object. This includes
+everything the object owns (an entity owns its inventory and experience levels) but not what is shared
+between instances, like the classes and their docstrings.
+
+Results can be saved as a baseline and later runs compared against it, the comparison exits with status 1
+if any object got bigger than the threshold.
+
+Usage:
+    python benchmarks/bench_memory.py [--count N]
+    python benchmarks/bench_memory.py --save NAME
+    python benchmarks/bench_memory.py --compare NAME [--threshold PERCENT]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines")
+sys.path.insert(0, ROOT)
+
+import pyzork
+
+
+class Goblin(pyzork.NPC):
+    """Goblin"""
+    max_health = 10
+    attack = 3
+    defense = 1
+    money = 5
+
+
+GoblinTemplate = pyzork.NPC.from_dict(name="Goblin", max_health=10, attack=3, defense=1, money=5)
+
+
+class Sword(pyzork.Weapon):
+    """Sword"""
+    def buff(self, entity):
+        """+2 attack"""
+        return [(pyzork.StatEnum.attack, 2)]
+
+
+class Potion(pyzork.Consumable):
+    """Potion"""
+    charges = 3
+
+    def effect(self, target):
+        """Restore 5 health"""
+        target.restore_health(5)
+
+
+class Poison(pyzork.Modifier):
+    """Poison"""
+    def effect(self, entity):
+        """Deals 1 damage every turn"""
+        entity.take_pure_damage(1)
+
+
+class Fireball(pyzork.Ability):
+    """Fireball"""
+    def effect(self, user, target):
+        """Deal 5 damage"""
+        target.take_damage(5)
+
+
+class Cave(pyzork.Location):
+    """Cave"""
+
+
+FACTORIES = {
+    "npc": lambda i: pyzork.NPC(name=f"npc {i}", max_health=10),
+    "npc subclass": lambda i: Goblin(),
+    "npc template": lambda i: GoblinTemplate(),
+    "player": lambda i: pyzork.Player(max_health=10),
+    "weapon": lambda i: Sword(),
+    "consumable": lambda i: Potion(),
+    "modifier": lambda i: Poison(duration=3),
+    "ability": lambda i: Fireball(),
+    "location": lambda i: Cave(),
+    "shop item": lambda i: pyzork.ShopItem(item=Sword, price=10, amount=5),
+    "inventory": lambda i: pyzork.Inventory(),
+    "experience levels": lambda i: pyzork.ExperienceLevels(requirement=100, modifier=1.5, max_level=10),
+}
+
+
+def measure(factory, count):
+    # one object first so that anything created once and cached (classes, interned strings) isn't counted
+    factory(-1)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    # the list holding the objects is not part of their footprint
+    return (after - before - sys.getsizeof(objects)) / len(objects)
+
+
+def run(count):
+    return {
+        "python": platform.python_version(),
+        "count": count,
+        "results": {name: round(measure(factory, count), 1) for name, factory in FACTORIES.items()},
+    }
+
+
+def report(data, baseline=None, threshold=5.0):
+    regressions = []
+    print(f"{'object':<20}{'bytes':>10}" + (f"{'change':>12}" if baseline else ""))
+    for name, size in data["results"].items():
+        line = f"{name:<20}{size:>10.0f}"
+        old = (baseline or {}).get("results", {}).get(name)
+        if old:
+            change = (size - old) / old * 100
+            line += f"{change:>+11.1f}%"
+            if change > threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+
+        print(line)
+
+    return regressions
+
+
+def baseline_path(name):
+    return os.path.join(BASELINES, f"memory-{name}.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="how many objects of each kind are created")
+    parser.add_argument("--save", metavar="NAME", help="store the results as benchmarks/baselines/memory-NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/memory-NAME.json")
+    parser.add_argument("--threshold", type=float, default=5.0, help="growth in percent counted as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+    data = run(args.count)
+    print(f"pyzork memory, python {data['python']}, {args.count} objects of each kind")
+    regressions = report(data, baseline, args.threshold)
+
+    if args.save:
+        os.makedirs(BASELINES, exist_ok=True)
+        with open(baseline_path(args.save), "w") as f:
+            json.dump(data, f, indent=4)
+
+        print(f"\nsaved baseline {baseline_path(args.save)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} object(s) bigger than the {args.threshold}% threshold")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""Measure the latency and throughput of the parsers in `pyzork.actions`.
+
+A corpus of commands is generated for a small world (a handful of npcs, items and enemies) and for a large
+one (thousands of them). The corpus mixes realistic commands with adversarial ones: typos, partial names,
+names shared by many entities, empty input and very long input. Every parser is timed call by call and the
+p50/p99 latency and throughput are reported.
+
+The parse cache is disabled while measuring so the parsers do their full work on every call, pass --cache
+to measure with the cache enabled and warm instead.
+
+Results can be saved as a baseline and later runs compared against it. The comparison uses the best p50
+of the runs, which is the least sensitive to other processes, and exits with status 1 if any parser got
+slower than the threshold.
+
+Usage:
+    python benchmarks/bench_parsers.py [--size small|large|all] [--runs N] [--seed N] [--cache]
+    python benchmarks/bench_parsers.py --save NAME
+    python benchmarks/bench_parsers.py --compare NAME [--threshold PERCENT]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines")
+sys.path.insert(0, ROOT)
+
+import pyzork
+from pyzork import actions
+
+SIZES = {
+    "small": {"npcs": 5, "enemies": 3, "items": 5, "shop_items": 5, "abilities": 3},
+    "large": {"npcs": 2000, "enemies": 1000, "items": 500, "shop_items": 500, "abilities": 200},
+}
+
+SYLLABLES = ["gor", "ba", "lin", "dra", "mo", "thi", "ka", "rel", "ul", "vex", "sha", "no", "pri", "tor", "el", "qua"]
+TITLES = ["old", "fat", "tall", "grim", "young", "wise", "mad", "pale"]
+KINDS = ["goblin", "wizard", "merchant", "guard", "troll", "bandit", "priest", "knight"]
+WEAPONS = ["sword", "axe", "spear", "mace", "bow", "dagger"]
+ARMORS = ["cuirass", "helmet", "shield", "boots", "gloves"]
+POTIONS = ["potion", "elixir", "salve", "tonic", "powder"]
+SPELLS = ["fireball", "frost", "heal", "shock", "curse", "shield"]
+
+
+def make_name(rng, kinds):
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+    return f"{rng.choice(TITLES)} {word} {rng.choice(kinds)}".title()
+
+
+def unique_names(rng, count, kinds):
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = make_name(rng, kinds)
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    return names
+
+
+def typo(rng, word):
+    if len(word) < 4:
+        return word
+
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def subclass(base, name, **attrs):
+    return type(name.replace(" ", ""), (base,), {"name": name, **attrs})
+
+
+def silence():
+    pyzork.print_function = lambda text: None
+
+
+class Fixture:
+    """Every context the parsers can be given, generated from a seed."""
+    def __init__(self, size, seed):
+        rng = random.Random(seed)
+        counts = SIZES[size]
+
+        self.locations = [pyzork.Location(name=name) for name in unique_names(rng, 5, ["hall", "market", "tavern", "forest", "cave"])]
+        self.location = self.locations[0]
+        for direction, other in zip(pyzork.Direction, self.locations[1:]):
+            self.location.two_way_connect(direction, other)
+
+        for name in unique_names(rng, counts["npcs"], KINDS):
+            self.location.add_npc(pyzork.NPC(name=name, max_health=1))
+
+        items = []
+        for name in unique_names(rng, counts["items"] // 3, WEAPONS):
+            items.append(subclass(pyzork.Weapon, name)())
+        for name in unique_names(rng, counts["items"] // 3, ARMORS):
+            items.append(subclass(pyzork.Armor, name)())
+        for name in unique_names(rng, counts["items"] - len(items), POTIONS):
+            items.append(subclass(pyzork.Consumable, name, charges=3)())
+
+        abilities = [subclass(pyzork.Ability, name)() for name in unique_names(rng, counts["abilities"], SPELLS)]
+        self.player = pyzork.Player(inventory=pyzork.Inventory(items=items), abilities=abilities, max_health=10)
+        self.world = pyzork.World(locations=self.locations, player=self.player)
+
+        self.enemies = [pyzork.NPC(name=name, max_health=1) for name in unique_names(rng, counts["enemies"], KINDS)]
+        self.battle = pyzork.Battle(player=self.player, enemies=self.enemies)
+
+        shop_items = [subclass(pyzork.Weapon, name) for name in unique_names(rng, counts["shop_items"], WEAPONS + ARMORS)]
+        self.shop = pyzork.Shop(name="Bench Shop", resell=0.5, items=[pyzork.ShopItem(item=item, price=10, amount=5) for item in shop_items])
+
+        self.npcs = self.location.npcs
+        self.weapons = [item.name for item in items if isinstance(item, pyzork.Weapon)]
+        self.equipment = [item.name for item in items if not isinstance(item, pyzork.Consumable)]
+        self.consumables = [item.name for item in items if isinstance(item, pyzork.Consumable)]
+        self.abilities = [ability.name for ability in abilities]
+        self.rng = rng
+
+    def pick(self, entries):
+        entry = self.rng.choice(entries)
+        return entry if isinstance(entry, str) else entry.name
+
+    def partial(self, entries):
+        return self.rng.choice(self.pick(entries).split())
+
+    def misspelt(self, entries):
+        return " ".join(typo(self.rng, word) for word in self.pick(entries).split())
+
+
+GIBBERISH = " ".join(f"word{i}" for i in range(200))
+ADVERSARIAL = ["", "the a an of to", GIBBERISH, "!!!???...", "go go go go go go go go go go", "1234 5678"]
+
+
+def corpus(fixture, count):
+    """Build the commands for each parser, returns a dict of name to (callable, commands)."""
+    f = fixture
+    directions = [d.name for d in pyzork.Direction]
+    destinations = [location.name for location in f.locations[1:]]
+
+    def commands(templates):
+        generated = []
+        for _ in range(count):
+            generated.append(f.rng.choice(templates)())
+
+        return generated + ADVERSARIAL
+
+    return {
+        "direction_parser": (lambda c: actions.direction_parser(c, f.location), commands([
+            lambda: f"go {f.rng.choice(directions)}",
+            lambda: f"go to the {f.rng.choice(destinations)}",
+            lambda: f"enter the {f.rng.choice(destinations).lower()}",
+            lambda: f"walk towards {f.rng.choice(directions)} {f.rng.choice(directions)}",
+        ])),
+        "interact_parser": (lambda c: actions.interact_parser(c, f.location), commands([
+            lambda: f"talk to the {f.pick(f.npcs)}",
+            lambda: f"speak with {f.partial(f.npcs)}",
+            lambda: f"talk to {f.misspelt(f.npcs)}",
+            lambda: f"talk to {f.rng.choice(KINDS)}",
+        ])),
+        "view_parser": (actions.view_parser, commands([
+            lambda: "view my stats",
+            lambda: "check inventory",
+            lambda: "show me my items and my stats",
+        ])),
+        "shop_parser": (lambda c: actions.shop_parser(c, f.shop), commands([
+            lambda: f"buy a {f.pick(f.shop.items)}",
+            lambda: f"sell the {f.partial(f.shop.items)}",
+            lambda: f"purchase {f.misspelt(f.shop.items)}",
+            lambda: f"leave to the {f.rng.choice(directions)}",
+        ])),
+        "attack_parser": (lambda c: actions.attack_parser(c, f.battle), commands([
+            lambda: f"attack the {f.pick(f.enemies)}",
+            lambda: f"hit {f.partial(f.enemies)}",
+            lambda: f"strike the {f.rng.choice(KINDS)} on the left",
+            lambda: f"attack {f.misspelt(f.enemies)}",
+        ])),
+        "equip_item_parser": (lambda c: actions.equip_item_parser(c, f.player), commands([
+            lambda: f"equip the {f.pick(f.equipment)}",
+            lambda: f"wear {f.partial(f.equipment)}",
+            lambda: f"equip {f.misspelt(f.equipment)}",
+        ])),
+        "use_item_parser": (lambda c: actions.use_item_parser(c, f.battle), commands([
+            lambda: f"use the {f.pick(f.consumables)} on me",
+            lambda: f"drink {f.partial(f.consumables)}",
+            lambda: f"throw the {f.pick(f.consumables)} at {f.pick(f.enemies)}",
+        ])),
+        "use_ability_parser": (lambda c: actions.use_ability_parser(c, f.battle), commands([
+            lambda: f"cast {f.pick(f.abilities)} on the {f.pick(f.enemies)}",
+            lambda: f"cast {f.partial(f.abilities)} on me",
+            lambda: f"cast {f.misspelt(f.abilities)} on {f.partial(f.enemies)}",
+        ])),
+        "yes_or_no_parser": (actions.yes_or_no_parser, commands([
+            lambda: "yes",
+            lambda: "no way",
+            lambda: "maybe I will",
+        ])),
+        "parse (world)": (lambda c: actions.parse(c, f.world), commands([
+            lambda: f"go {f.rng.choice(directions)}",
+            lambda: f"talk to the {f.pick(f.npcs)}",
+            lambda: "view my stats",
+            lambda: f"equip the {f.pick(f.equipment)}",
+            lambda: f"use the {f.pick(f.consumables)} on me",
+        ])),
+        "parse (battle)": (lambda c: actions.parse(c, f.battle), commands([
+            lambda: f"attack the {f.pick(f.enemies)}",
+            lambda: f"cast {f.pick(f.abilities)} on the {f.pick(f.enemies)}",
+            lambda: f"use the {f.pick(f.consumables)} on me",
+            lambda: "view my stats",
+        ])),
+    }
+
+
+def percentile(timings, fraction):
+    index = min(len(timings) - 1, int(round(fraction * (len(timings) - 1))))
+    return timings[index]
+
+
+def measure(parser, commands, runs):
+    # one untimed pass so lazy loading (and the cache when it is enabled) doesn't end up in the timings
+    for command in commands:
+        parser(command)
+
+    timings = []
+    best = None
+    clock = time.perf_counter_ns
+    gc.disable()
+    try:
+        for _ in range(runs):
+            run_timings = []
+            for command in commands:
+                start = clock()
+                parser(command)
+                run_timings.append(clock() - start)
+
+            run_timings.sort()
+            p50 = percentile(run_timings, 0.5)
+            best = p50 if best is None else min(best, p50)
+            timings.extend(run_timings)
+    finally:
+        gc.enable()
+
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "p50_us": percentile(timings, 0.5) / 1000,
+        "p99_us": percentile(timings, 0.99) / 1000,
+        "best_p50_us": best / 1000,
+        "ops_per_sec": len(timings) / (sum(timings) / 1e9),
+    }
+
+
+def run(sizes, runs, seed, count, cache):
+    silence()
+    maxsize = actions.PARSE_CACHE.maxsize
+    actions.PARSE_CACHE.maxsize = maxsize if cache else 0
+    results = {}
+    try:
+        for size in sizes:
+            fixture = Fixture(size, seed)
+            results[size] = {}
+            for name, (parser, commands) in corpus(fixture, count).items():
+                actions.PARSE_CACHE.clear()
+                results[size][name] = measure(parser, commands, runs)
+    finally:
+        actions.PARSE_CACHE.maxsize = maxsize
+        actions.PARSE_CACHE.clear()
+
+    return {
+        "python": platform.python_version(),
+        "seed": seed,
+        "runs": runs,
+        "commands": count,
+        "cache": cache,
+        "results": results,
+    }
+
+
+def report(data, baseline=None, threshold=25.0):
+    regressions = []
+    for size, parsers in data["results"].items():
+        print(f"\n{size} world")
+        header = f"  {'parser':<20} {'p50 us':>10} {'p99 us':>10} {'ops/s':>12}"
+        print(header + ("   best p50 change" if baseline else ""))
+        for name, result in parsers.items():
+            line = f"  {name:<20} {result['p50_us']:>10.2f} {result['p99_us']:>10.2f} {result['ops_per_sec']:>12.0f}"
+            old = (baseline or {}).get("results", {}).get(size, {}).get(name)
+            if old:
+                # the best p50 of the runs is what varies the least from one run to the next on a busy machine
+                change = (result["best_p50_us"] - old["best_p50_us"]) / old["best_p50_us"] * 100
+                line += f"   {change:+15.1f}%"
+                if change > threshold:
+                    line += "  REGRESSION"
+                    regressions.append((size, name, change))
+
+            print(line)
+
+    return regressions
+
+
+def baseline_path(name):
+    return os.path.join(BASELINES, f"{name}.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=[*SIZES, "all"], default="all")
+    parser.add_argument("--runs", type=int, default=10, help="how many times the corpus is parsed")
+    parser.add_argument("--commands", type=int, default=200, help="how many realistic commands per parser")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="measure with the parse cache enabled and warm")
+    parser.add_argument("--save", metavar="NAME", help="store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=25.0, help="best p50 slowdown in percent counted as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+        # the corpus only matches if it was generated the same way
+        args.seed, args.commands, args.cache = baseline["seed"], baseline["commands"], baseline["cache"]
+
+    sizes = list(SIZES) if args.size == "all" else [args.size]
+    data = run(sizes, args.runs, args.seed, args.commands, args.cache)
+    print(f"pyzork parsers, python {data['python']}, {args.runs} runs, cache {'on' if args.cache else 'off'}")
+    regressions = report(data, baseline, args.threshold)
+
+    if args.save:
+        os.makedirs(BASELINES, exist_ok=True)
+        with open(baseline_path(args.save), "w") as f:
+            json.dump(data, f, indent=4)
+
+        print(f"\nsaved baseline {baseline_path(args.save)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} parser(s) slower than the {args.threshold}% threshold")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
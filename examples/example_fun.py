@@ -56,13 +56,8 @@ class EnemyWithShield(pyzork.NPC):
         self.shield += value
         
     def end_turn(self):
-        """End this entity's turn, decrementing all the modifier's durations and removing the expired ones."""
-        for name in list(self.modifiers.keys()):
-            modifier = self.modifiers[name]
-            modifier.end_turn(self)
-            if modifier.is_expired():
-                del self.modifiers[name]
-                
+        """End this entity's turn, the modifiers are handled as usual and the shield regenerates."""
+        super().end_turn()
         self.shield += self.max_shield * 0.1
 
 class BigGoblin(EnemyWithShield):
@@ -1,17 +1,21 @@
 from .abilities import Ability
 from .modifiers import Modifier
-from .base import QM, Quest
+from .base import QM, Quest, QuestManager, Condition, count, get_quest_manager, set_quest_manager, quest_manager
 from .battle import Battle
 from .entities import Player, NPC
 from .enums import StatEnum, Direction
 from .equipment import QuestItem, Consumable, Weapon, Armor, ShopItem, Inventory
 from .levels import ExperienceLevels
 from .world import World, Location, Shop
+from .tables import EntityTable
+from . import events
 from . import visualise
 from . import utils
 
 def print_function(text):
     print(text)
+    
+print_events = False
 
 def user_input():
     return input(">>>>> ")
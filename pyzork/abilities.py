@@ -1,4 +1,6 @@
 from .utils import post_output, _getattr
+from . import utils
+from .events import AbilityCast
 
 class Ability:
     """Super class for all abilitis. Most abilities have two uses, they either have a direct effect or add
@@ -25,10 +27,14 @@ class Ability:
     description : Optional[str]
         Optional description of the ability    
     """
+    __slots__ = ("name", "description", "__dict__", "__weakref__")
+    
     def __init__(self, **kwargs):
         self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
         self.description = _getattr(self, "description", kwargs, self.effect.__doc__)
-        self.cost = _getattr(self, "cost", kwargs, 0)
+        # the cost set on the class (or the cost method) is shared by every instance
+        if "cost" in kwargs:
+            self.cost = kwargs["cost"]
         
     def __hash__(self):
         return hash(self.__class__.__name__)
@@ -50,7 +56,8 @@ class Ability:
         if not self.costing(user, target):
             return
         
-        post_output(f"{user.name} casts {self.name} on {target.name}")
+        if not utils.HEADLESS:
+            post_output(AbilityCast, user, self, target)
         self.effect(user, target)
         
     def calculate_cost(self, user : "Entity", target : "Entity"):
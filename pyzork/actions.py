@@ -1,44 +1,1107 @@
 from .enums import Direction
 
-import nltk
+from collections import OrderedDict
+import functools
+import itertools
+import os
+import weakref
 
-nltk.download("punkt", quiet=True)
-nltk.download("stopwords", quiet=True)
+_STOPWORDS = None
+_NUMPY = False
+STOPWORDS_PATH = os.path.join(os.path.dirname(__file__), "data", "stopwords.txt")
 
-from nltk.corpus import stopwords
+class WordList(list):
+    """A list of the words signaling an intent, such as ACCEPTABLE_MOVEMENTS or the lists of ALIASES_VIEW.
+    Editing the list adds or removes the words from the LEXICON, the same as calling :method:Lexicon.add and
+    :method:Lexicon.remove.
+    
+    Parameters
+    -----------
+    words : Optional[Iterable[str]]
+        The words of the list
+    intent : Optional[str]
+        The intent the words signal, set by the Vocabulary the list is stored in
+    """
+    __slots__ = ("intent",)
+    
+    def __init__(self, words : "Iterable[str]" = (), intent : str = None):
+        super().__init__(words)
+        self.intent = intent
+        
+def _syncing(name):
+    method = getattr(list, name)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        before = set(self)
+        result = method(self, *args)
+        if self.intent is not None:
+            after = set(self)
+            if before - after:
+                LEXICON.remove(self.intent, *(before - after))
+            if after - before:
+                LEXICON.add(self.intent, *(after - before))
+            
+        return result
+        
+    return wrapper
+    
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(WordList, _name, _syncing(_name))
+    
+class Vocabulary(dict):
+    """The word lists of a group of intents, such as VERBS or ALIASES_VIEW, keyed by the intent without the
+    prefix of its group. The lists are stored as WordList, assigning or deleting a key adds or removes the
+    intent's words from the LEXICON.
+    
+    Parameters
+    -----------
+    lists : Dict[str, List[str]]
+        The words of each intent
+    prefix : Optional[str]
+        The group of the intents followed by ":", such as "view:". Empty by default
+    """
+    __slots__ = ("prefix",)
+    
+    def __init__(self, lists : "Dict[str, List[str]]", prefix : str = ""):
+        super().__init__()
+        self.prefix = prefix
+        for key, words in lists.items():
+            super().__setitem__(key, self._bind(key, words))
+            
+    def _bind(self, key, words):
+        if not isinstance(words, WordList):
+            words = WordList(words)
+            
+        words.intent = f"{self.prefix}{key}"
+        return words
+        
+    def __setitem__(self, key, words):
+        if key in self:
+            del self[key]
+            
+        words = self._bind(key, words)
+        super().__setitem__(key, words)
+        if words:
+            LEXICON.add(words.intent, *words)
+            
+    def __delitem__(self, key):
+        words = self[key]
+        super().__delitem__(key)
+        if words:
+            LEXICON.remove(words.intent, *words)
+        words.intent = None
+        
+    def __ior__(self, other):
+        self.update(other)
+        return self
+        
+    def update(self, *args, **kwargs):
+        for key, words in dict(*args, **kwargs).items():
+            self[key] = words
+            
+    def setdefault(self, key, words=None):
+        if key not in self:
+            self[key] = [] if words is None else words
+            
+        return self[key]
+        
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+            
+        words = self[key]
+        del self[key]
+        return words
+        
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+        
+    def clear(self):
+        for key in list(self):
+            del self[key]
 
-STOPWORDS = set(stopwords.words("english"))
-ACCEPTABLE_MOVEMENTS = ["go", "walk", "run", "enter", "exit", "move", "leave"]
-ACCEPTABLE_INTERACTS = ["talk", "interact", "check", "look", "approach"]
-ACCEPTABLE_ATTACKS = ["attack", "strike", "target", "hit"]
-ACCEPTABLE_EQUIP = ["equip", "put", "take"]
-ACCEPTABLE_USE = ["use", "throw"]
-ACCEPTABLE_SELF_USE = ["drink", "eat",]
-ACCEPTABLE_CAST = ["use", "cast"]
+#the words of the intents, edits to these lists are applied to the LEXICON
+ACCEPTABLE_MOVEMENTS = WordList(["go", "walk", "run", "enter", "exit", "move", "leave"])
+ACCEPTABLE_INTERACTS = WordList(["talk", "interact", "check", "look", "approach"])
+ACCEPTABLE_ATTACKS = WordList(["attack", "strike", "target", "hit"])
+ACCEPTABLE_EQUIP = WordList(["equip", "put", "take"])
+ACCEPTABLE_USE = WordList(["use", "throw"])
+ACCEPTABLE_SELF_USE = WordList(["drink", "eat",])
+ACCEPTABLE_CAST = WordList(["use", "cast"])
 
-ALIASES_VIEW = {
+ALIASES_VIEW = Vocabulary({
     "inventory": ["inv", "inventory", "items", "quest", "abilities", "consumables", "quests"],
     "stats": ["stats", "health", "energy", "attack", "damage", "armor", "weapon", "defense"]
-}
+}, "view:")
 
-ALIASES_SHOP = {
+ALIASES_SHOP = Vocabulary({
     "sell" : ["sell"],
     "buy": ["buy", "purchase"]
-}
+}, "shop:")
 
 PLAYER = ["me", "myself", "i", "player"]
 YES = ["yes", "y", "true", "yeah"]
 NO = ["no", "n", "false", "nah"]
 
 POSITIONS = [["left"], ["center", "middle"], ["right"]]
+
+FUZZY_DISTANCE = 0
+VECTORIZE_THRESHOLD = 128
+
+VERBS = Vocabulary({
+    "movement": ACCEPTABLE_MOVEMENTS,
+    "interact": ACCEPTABLE_INTERACTS,
+    "attack": ACCEPTABLE_ATTACKS,
+    "equip": ACCEPTABLE_EQUIP,
+    "use": ACCEPTABLE_USE,
+    "self_use": ACCEPTABLE_SELF_USE,
+    "cast": ACCEPTABLE_CAST,
+})
+
+class Lexicon:
+    """The lexicon maps every word the parsers understand to the intents it signals, so detecting what the
+    player wants to do only costs one dictionary lookup per word no matter how many verbs are known. Intents
+    are plain strings, the verb classes of VERBS such as "movement" or "attack" as well as grouped intents
+    written `group:value` such as "view:stats" or "shop:buy".
+    
+    The library's lexicon is available as `pyzork.actions.LEXICON` and can be extended at any time::
+    
+        from pyzork.actions import LEXICON
+        
+        LEXICON.add("movement", "sprint", "crawl")
+        LEXICON.add("view:stats", "hp")
+        
+    Editing the word lists it is built from, like `ACCEPTABLE_MOVEMENTS.append("sprint")` or
+    `ALIASES_VIEW["map"] = ["map"]`, changes it the same way.
+        
+    Attributes
+    -----------
+    words : Dict[str, FrozenSet[str]]
+        Every known word and the intents it signals
+    version : int
+        Incremented every time the lexicon is changed
+    """
+    def __init__(self):
+        self.words = {}
+        self.version = 0
+        self._order = {}
+        
+    def __repr__(self):
+        return f"<Lexicon words={len(self.words)} intents={len(self._order)}>"
+        
+    def __contains__(self, word):
+        return word in self.words
+        
+    def add(self, intent : str, *words : str):
+        """Add words to an intent, the intent is created if it doesn't exist yet.
+        
+        Parameters
+        -----------
+        intent : str
+            The intent the words signal
+        *words : str
+            The words to add
+        """
+        self.version += 1
+        self._order.setdefault(intent, len(self._order))
+        for word in words:
+            word = word.lower()
+            self.words[word] = self.words.get(word, frozenset()) | {intent}
+            
+    def remove(self, intent : str, *words : str):
+        """Stop words from signaling an intent.
+        
+        Parameters
+        -----------
+        intent : str
+            The intent the words signal
+        *words : str
+            The words to remove
+        """
+        self.version += 1
+        for word in words:
+            word = word.lower()
+            intents = self.words.get(word, frozenset()) - {intent}
+            if intents:
+                self.words[word] = intents
+            else:
+                self.words.pop(word, None)
+                
+    def intents(self, tokens : "Iterable[str]") -> "FrozenSet[str]":
+        """Returns all the intents signaled by a set of words.
+        
+        Parameters
+        -----------
+        tokens : Iterable[str]
+            The words to check
+            
+        Returns
+        --------
+        FrozenSet[str]
+            The intents
+        """
+        found = set()
+        words = self.words
+        for token in tokens:
+            if token in words:
+                found |= words[token]
+                
+        return frozenset(found)
+        
+    def match(self, intents : "Iterable[str]", group : str) -> "Optional[str]":
+        """Pick the value of the first intent of a group, in the order the intents were added to the lexicon.
+        For example with the intents {"view:stats", "view:inventory"} and the group "view" this returns
+        "inventory".
+        
+        Parameters
+        -----------
+        intents : Iterable[str]
+            The intents to pick from, usually `Command.intents`
+        group : str
+            The group of intents to look for
+            
+        Returns
+        --------
+        Optional[str]
+            The value of the intent, None if no intent of that group is present
+        """
+        prefix = f"{group}:"
+        grouped = [x for x in intents if x.startswith(prefix)]
+        if grouped:
+            return min(grouped, key=self._order.__getitem__)[len(prefix):]
+            
+def build_lexicon() -> Lexicon:
+    """Create a new Lexicon out of VERBS, ALIASES_VIEW and ALIASES_SHOP.
+    
+    Returns
+    --------
+    Lexicon
+        The new lexicon
+    """
+    lexicon = Lexicon()
+    for intent, words in VERBS.items():
+        lexicon.add(intent, *words)
+        
+    for view, aliases in ALIASES_VIEW.items():
+        lexicon.add(f"view:{view}", *aliases)
+        
+    for action, aliases in ALIASES_SHOP.items():
+        lexicon.add(f"shop:{action}", *aliases)
+        
+    return lexicon
+    
+LEXICON = build_lexicon()
+    
+def get_stopwords() -> "FrozenSet[str]":
+    """Returns the set of words ignored by the parsers. The set is bundled with the library, a frozen copy
+    of the english stopwords of nltk, and is only read from disk the first time a command is parsed.
+    
+    Returns
+    --------
+    FrozenSet[str]
+        The stopwords
+    """
+    global _STOPWORDS
+    if _STOPWORDS is None:
+        with open(STOPWORDS_PATH, encoding="utf-8") as f:
+            _STOPWORDS = frozenset(f.read().split())
+            
+    return _STOPWORDS
+    
+def set_stopwords(words : "Iterable[str]"):
+    """Replace the set of words ignored by the parsers.
+    
+    Parameters
+    -----------
+    words : Iterable[str]
+        The new stopwords
+    """
+    global _STOPWORDS
+    _STOPWORDS = frozenset(words)
+    PARSE_CACHE.clear()
+    
+def use_nltk_stopwords(language : str = "english"):
+    """Replace the bundled stopwords with the ones from nltk, downloading the corpus if needed. This
+    requires the `nltk` extra to be installed and is never done automatically.
+    
+    Parameters
+    -----------
+    language : Optional[str]
+        The language of the stopwords, english by default
+    """
+    try:
+        import nltk
+    except ImportError:
+        raise ImportError("Make sure that nltk is installed to use this part of the library")
+        
+    nltk.download("stopwords", quiet=True)
+    from nltk.corpus import stopwords
+    
+    set_stopwords(stopwords.words(language))
+    
+def __getattr__(name):
+    if name == "STOPWORDS":
+        return get_stopwords()
+        
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
     
 def clean(raw : str):
     return raw.lower().strip()
     
 def filter_stopword(text : str):
-    return [x for x in clean(text).split() if x not in STOPWORDS or x in PLAYER]
+    stopwords = get_stopwords()
+    return [x for x in clean(text).split() if x not in stopwords or x in PLAYER]
+    
+class Command:
+    """A piece of user input that has been cleaned up and split into words once, so that it can be handed
+    to every parser without each of them repeating the work. All the parsers of this module accept either a
+    raw string or a Command.
+    
+    Parameters
+    -----------
+    raw : str
+        The user input
+        
+    Attributes
+    -----------
+    raw : str
+        The user input, untouched
+    words : List[str]
+        Every word of the cleaned up input, stopwords included
+    tokens : List[str]
+        The words of the input minus the stopwords
+    token_set : FrozenSet[str]
+        The tokens as a set, for fast membership checks
+    intents : FrozenSet[str]
+        The intents detected in the input by the LEXICON, such as "movement" or "view:stats"
+    """
+    def __init__(self, raw : str):
+        stopwords = get_stopwords()
+        
+        self.raw = raw
+        self.words = clean(raw).split()
+        self.tokens = [x for x in self.words if x not in stopwords or x in PLAYER]
+        self.token_set = frozenset(self.tokens)
+        self.intents = LEXICON.intents(self.tokens)
+        
+    def __repr__(self):
+        return f"<Command tokens={self.tokens} intents={set(self.intents)}>"
+        
+    def __str__(self):
+        return self.raw
+        
+def parse_command(choice : "Union[str, Command]") -> Command:
+    """Turn user input into a Command, if it already is one then it is returned as is.
+    
+    Parameters
+    -----------
+    choice : Union[str, Command]
+        The user input
+        
+    Returns
+    --------
+    Command
+        The parsed input
+    """
+    if isinstance(choice, Command):
+        return choice
+        
+    return Command(choice)
+
+def edit_distance(first : str, second : str) -> int:
+    """The levenshtein distance between two words, the number of single letter insertions, deletions and
+    substitutions needed to go from one to the other.
+    
+    Parameters
+    -----------
+    first : str
+        The first word
+    second : str
+        The second word
+        
+    Returns
+    --------
+    int
+        The distance
+    """
+    if first == second:
+        return 0
+        
+    if len(first) < len(second):
+        first, second = second, first
+        
+    previous = list(range(len(second) + 1))
+    for i, letter in enumerate(first, 1):
+        current = [i]
+        for j, other in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (letter != other)))
+        previous = current
+        
+    return previous[-1]
+    
+class FuzzyIndex:
+    """Index of words that can be searched for the words within a maximum edit distance of a typo. Rather
+    than comparing the typo against every word, every word is stored under all the ways of deleting up to
+    `max_distance` of its letters. Two words within that distance always share at least one of those
+    variants so a search only looks at a handful of candidates, whatever the number of words.
+    
+    Parameters
+    -----------
+    max_distance : int
+        The maximum edit distance of a search
+    words : Optional[Iterable[str]]
+        The words to index
+    """
+    def __init__(self, max_distance : int, words : "Iterable[str]" = ()):
+        self.max_distance = max_distance
+        self.variants = {}
+        self.words = set()
+        
+        for word in words:
+            self.add(word)
+            
+    def __repr__(self):
+        return f"<FuzzyIndex words={len(self.words)} max_distance={self.max_distance}>"
+        
+    def __len__(self):
+        return len(self.words)
+            
+    def _deletions(self, word):
+        variants = {word}
+        current = {word}
+        for _ in range(self.max_distance):
+            current = {x[:i] + x[i + 1:] for x in current for i in range(len(x))}
+            variants |= current
+            
+        return variants
+        
+    def add(self, word : str):
+        """Add a word to the index
+        
+        Parameters
+        -----------
+        word : str
+            The word to add
+        """
+        if word in self.words:
+            return
+            
+        self.words.add(word)
+        for variant in self._deletions(word):
+            self.variants.setdefault(variant, set()).add(word)
+            
+    def remove(self, word : str):
+        """Remove a word from the index
+        
+        Parameters
+        -----------
+        word : str
+            The word to remove
+        """
+        if word not in self.words:
+            return
+            
+        self.words.discard(word)
+        for variant in self._deletions(word):
+            words = self.variants[variant]
+            words.discard(word)
+            if not words:
+                del self.variants[variant]
+                
+    def search(self, word : str) -> "List[str]":
+        """Find the closest indexed words to `word`, if they are within the maximum distance.
+        
+        Parameters
+        -----------
+        word : str
+            The word to look for
+            
+        Returns
+        --------
+        List[str]
+            All the indexed words tied for the smallest distance, empty if none are close enough
+        """
+        candidates = set()
+        for variant in self._deletions(word):
+            candidates |= self.variants.get(variant, set())
+            
+        best = self.max_distance + 1
+        closest = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate)
+            if distance < best:
+                best = distance
+                closest = [candidate]
+            elif distance == best:
+                closest.append(candidate)
+                
+        return sorted(closest)
+
+class NameIndex:
+    """An inverted index over the names of a group of entities, items or anything else with a `name`. Every
+    piece of every name points back to its owners so that finding which names contain a word of the user
+    input is a single lookup, no matter how many names are indexed. Locations keep one for their npcs and
+    enemies and battles keep one for the enemies still alive.
+    
+    Parameters
+    -----------
+    entries : Optional[Iterable[Any]]
+        The things to index, they must have a `name` attribute
+    """
+    def __init__(self, entries : "Iterable[Any]" = ()):
+        self.keys = {}
+        self.entries = {}
+        self.words = {}
+        self._count = 0
+        self._fuzzy = None
+        self._scorer = None
+        
+        for entry in entries:
+            self.add(entry)
+            
+    def __repr__(self):
+        return f"<NameIndex entries={len(self.entries)} keys={len(self.keys)}>"
+            
+    def __len__(self):
+        return len(self.entries)
+        
+    def __iter__(self):
+        return iter(self.entries)
+        
+    def __contains__(self, entry):
+        return entry in self.entries
+        
+    @staticmethod
+    def _pieces(name):
+        for word in name.lower().split():
+            for start in range(len(word)):
+                for end in range(start + 1, len(word) + 1):
+                    yield word[start:end]
+        
+    def add(self, entry : "Any"):
+        """Index an entry, entries that are already indexed are ignored.
+        
+        Parameters
+        -----------
+        entry : Any
+            The thing to index
+        """
+        if entry in self.entries:
+            return
+            
+        self.entries[entry] = (len(entry.name.split()), self._count)
+        self._count += 1
+        self._scorer = None
+        for piece in self._pieces(entry.name):
+            self.keys.setdefault(piece, set()).add(entry)
+            
+        for word in entry.name.lower().split():
+            self.words[word] = self.words.get(word, 0) + 1
+            if self._fuzzy is not None:
+                self._fuzzy.add(word)
+            
+    def remove(self, entry : "Any"):
+        """Remove an entry from the index, entries that are not indexed are ignored.
+        
+        Parameters
+        -----------
+        entry : Any
+            The thing to remove
+        """
+        if self.entries.pop(entry, None) is None:
+            return
+            
+        if self._scorer is not None:
+            self._scorer.remove(entry)
+            
+        for piece in self._pieces(entry.name):
+            owners = self.keys.get(piece)
+            if owners is not None:
+                owners.discard(entry)
+                if not owners:
+                    del self.keys[piece]
+                    
+        for word in entry.name.lower().split():
+            self.words[word] -= 1
+            if not self.words[word]:
+                del self.words[word]
+                if self._fuzzy is not None:
+                    self._fuzzy.remove(word)
+                    
+    def best(self, tokens : "List[str]") -> "List[Any]":
+        """Find the entries whose name contains the most tokens.
+        
+        Parameters
+        -----------
+        tokens : List[str]
+            The words to look for
+            
+        Returns
+        --------
+        List[Any]
+            All the entries tied for the best match, the ones with the shortest names first, then in the
+            order they were indexed. Empty if no name matches any of the tokens.
+        """
+        if len(self.entries) >= VECTORIZE_THRESHOLD and _numpy() is not None:
+            if self._scorer is None or self._scorer.stale():
+                self._scorer = VectorizedScorer(self)
+                
+            return self._scorer.best(tokens)
+            
+        scores = {}
+        for token in tokens:
+            for entry in self.keys.get(token, ()):
+                scores[entry] = scores.get(entry, 0) + 1
+                
+        if not scores:
+            return []
+            
+        best = max(scores.values())
+        return sorted((entry for entry, score in scores.items() if score == best), key=self.entries.__getitem__)
+        
+    def correct(self, tokens : "List[str]", max_distance : int) -> "List[str]":
+        """Replace the tokens that look like typos of the words of the indexed names by those words. Tokens
+        which are known to the LEXICON or refer to the player are ignored, as are tokens too short to tell
+        apart from another word at that distance.
+        
+        Parameters
+        -----------
+        tokens : List[str]
+            The words to correct
+        max_distance : int
+            The maximum edit distance between a token and a word of a name
+            
+        Returns
+        --------
+        List[str]
+            The corrected tokens, tokens that could not be corrected are left out
+        """
+        if self._fuzzy is None or self._fuzzy.max_distance != max_distance:
+            self._fuzzy = FuzzyIndex(max_distance, self.words)
+            
+        corrected = []
+        for token in tokens:
+            if len(token) <= max_distance or token in LEXICON or token in PLAYER:
+                continue
+                
+            corrected.extend(self._fuzzy.search(token))
+            
+        return corrected
+        
+class IndexedList(list):
+    """A list which keeps a NameIndex of its entries, the npcs and enemies of locations, the items of shops and
+    the enemies alive in a battle are stored in these. Adding and removing entries updates the index, any
+    other edit of the list (assigning an index or a slice, sorting, ...) drops it and it is rebuilt the next
+    time it is needed. Every edit also increments the `version` of the owner of the list so the parse cache
+    doesn't return results from before the edit. Neither can tell when an entry is renamed, call `reindex`
+    after renaming one.
+    
+    Parameters
+    -----------
+    entries : Optional[Iterable[Any]]
+        The entries of the list, they must have a `name` attribute
+    owner : Optional[Any]
+        The object holding the list, its `version` is incremented when the list changes
+    """
+    __slots__ = ("_names", "_owner")
+    
+    def __init__(self, entries : "Iterable[Any]" = (), owner : "Any" = None):
+        super().__init__(entries)
+        self._names = None
+        self._owner = owner
+        
+    def _changed(self):
+        if self._owner is not None:
+            self._owner.version += 1
+        
+    @property
+    def names(self) -> NameIndex:
+        """The index of the names of the entries"""
+        if self._names is None:
+            self._names = NameIndex(self)
+            
+        return self._names
+        
+    def reindex(self):
+        """Drop the index, it is rebuilt from the entries the next time it is needed."""
+        self._names = None
+        self._changed()
+        
+    def _discarded(self, entry):
+        # the same entry can be in the list twice, it stays indexed while it is still in the list
+        if self._names is not None and entry not in self:
+            self._names.remove(entry)
+            
+        self._changed()
+        
+    def append(self, entry):
+        super().append(entry)
+        if self._names is not None:
+            self._names.add(entry)
+            
+        self._changed()
+            
+    def remove(self, entry):
+        super().remove(entry)
+        self._discarded(entry)
+        
+    def pop(self, index=-1):
+        entry = super().pop(index)
+        self._discarded(entry)
+        return entry
+        
+    def _replace(self, kept, removed):
+        # keep only `kept`, `removed` are the entries left out, with no duplicate between the two
+        super().__setitem__(slice(None), kept)
+        if self._names is not None:
+            for entry in removed:
+                self._names.remove(entry)
+                
+        self._changed()
+        
+def _invalidating(name):
+    method = getattr(list, name)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        result = method(self, *args)
+        self.reindex()
+        return result
+        
+    return wrapper
+    
+for _name in ("extend", "insert", "clear", "sort", "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(IndexedList, _name, _invalidating(_name))
+        
+def _numpy():
+    global _NUMPY
+    if _NUMPY is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+            
+        _NUMPY = numpy
+        
+    return _NUMPY
+    
+class VectorizedScorer:
+    """Scores every entry of a NameIndex at once using numpy, this is what :method:NameIndex.best uses once
+    an index holds VECTORIZE_THRESHOLD entries or more and numpy is installed. It returns exactly the same
+    entries in the same order as the pure python scoring.
+    
+    The entries are laid out as the columns of a token/name incidence matrix, sorted the same way the
+    results are. The row of a token holds the columns of the names containing it and is computed the first
+    time the token is seen, after that scoring is one vectorized addition per token. Entries removed
+    from the index are masked out rather than rebuilding the matrix, entries added to it discard the scorer.
+    
+    Parameters
+    -----------
+    index : NameIndex
+        The index to score the entries of
+        
+    Attributes
+    -----------
+    columns : List[Any]
+        The entries in the order of the columns
+    live : numpy.ndarray
+        Whether each column is still in the index
+    """
+    MAX_ROWS = 4096
+    
+    def __init__(self, index : NameIndex):
+        np = _numpy()
+        self.index = index
+        self.columns = sorted(index.entries, key=index.entries.__getitem__)
+        self.positions = {entry: column for column, entry in enumerate(self.columns)}
+        self.live = np.ones(len(self.columns), dtype=bool)
+        self.removed = 0
+        self.rows = {}
+        
+    def __repr__(self):
+        return f"<VectorizedScorer columns={len(self.columns)} removed={self.removed} rows={len(self.rows)}>"
+        
+    def stale(self) -> bool:
+        """Whether so many entries were removed that it is worth building a new scorer."""
+        return self.removed * 2 > len(self.columns)
+        
+    def remove(self, entry : "Any"):
+        """Mask out an entry that was removed from the index.
+        
+        Parameters
+        -----------
+        entry : Any
+            The entry removed
+        """
+        column = self.positions.get(entry)
+        if column is not None and self.live[column]:
+            self.live[column] = False
+            self.removed += 1
+            
+    def row(self, token : str) -> "numpy.ndarray":
+        """The columns of the names which contain the token.
+        
+        Parameters
+        -----------
+        token : str
+            A word of the user input
+            
+        Returns
+        --------
+        numpy.ndarray
+            The columns as an array of indexes
+        """
+        row = self.rows.get(token)
+        if row is None:
+            np = _numpy()
+            owners = self.index.keys.get(token, ())
+            if len(self.rows) >= self.MAX_ROWS:
+                self.rows.clear()
+                
+            row = self.rows[token] = np.fromiter((self.positions[entry] for entry in owners), dtype=np.intp, count=len(owners))
+            
+        return row
+        
+    def best(self, tokens : "List[str]") -> "List[Any]":
+        """Find the entries whose name contains the most tokens, see :method:NameIndex.best
+        
+        Parameters
+        -----------
+        tokens : List[str]
+            The words to look for
+            
+        Returns
+        --------
+        List[Any]
+            All the entries tied for the best match, in the same order as :method:NameIndex.best
+        """
+        np = _numpy()
+        scores = np.zeros(len(self.columns), dtype=np.intp)
+        for token in tokens:
+            scores[self.row(token)] += 1
+            
+        if self.removed:
+            scores[~self.live] = 0
+            
+        best = scores.max(initial=0)
+        if not best:
+            return []
+            
+        return [self.columns[column] for column in np.flatnonzero(scores == best)]
+        
+def best_matches(tokens : "List[str]", candidates : "Union[NameIndex, Iterable[Any]]", max_distance : int = None) -> "List[Any]":
+    """Find the candidates whose name contains the most tokens. This is what all the parsers use to figure
+    out which npc, enemy or item the player is talking about. If nothing matches and fuzzy matching is
+    enabled, tokens that are typos of the words of the names are corrected and the search is done again.
+    
+    Parameters
+    -----------
+    tokens : List[str]
+        The words to look for
+    candidates : Union[NameIndex, Iterable[Any]]
+        The things to pick from, an index is used directly while anything else is scanned
+    max_distance : Optional[int]
+        The maximum edit distance for a typo to be corrected, FUZZY_DISTANCE by default. 0 disables
+        fuzzy matching.
+        
+    Returns
+    --------
+    List[Any]
+        All the candidates tied for the best match, shortest names first. Empty if there are no matches.
+    """
+    if max_distance is None:
+        max_distance = FUZZY_DISTANCE
+        
+    if isinstance(candidates, NameIndex):
+        matches = candidates.best(tokens)
+    else:
+        candidates = list(candidates)
+        matches = _scan_matches(tokens, candidates)
+        
+    if matches or max_distance <= 0:
+        return matches
+        
+    if not isinstance(candidates, NameIndex):
+        candidates = NameIndex(candidates)
+        
+    corrected = candidates.correct(tokens, max_distance)
+    if corrected:
+        return candidates.best(corrected)
+        
+    return []
+    
+def _scan_matches(tokens, candidates):
+    best = 0
+    matches = []
+    for candidate in sorted(candidates, key=lambda x: len(x.name.split())):
+        score = len([x for x in tokens if x in candidate.name.lower()])
+        if score > best:
+            best = score
+            matches = [candidate]
+        elif score == best and best > 0:
+            matches.append(candidate)
+            
+    return matches
+    
+def set_fuzzy_matching(max_distance : int):
+    """Enable typo tolerant matching of names for the parsers that pick an npc, enemy or item. When no name
+    contains any of the words of the user input, words within `max_distance` edits of a word of a name are
+    treated as that word, for example "goblim" will find the "Goblin". Disabled by default.
+    
+    Parameters
+    -----------
+    max_distance : int
+        The maximum number of letters that can be wrong in a word, 0 to disable fuzzy matching
+    """
+    global FUZZY_DISTANCE
+    FUZZY_DISTANCE = max_distance
+    PARSE_CACHE.clear()
+    
+def _indexed(entries : "List[Any]") -> "Union[NameIndex, List[Any]]":
+    # plain lists are scanned, the lists of the library keep an index
+    if isinstance(entries, IndexedList):
+        return entries.names
+        
+    return entries
+
+class ParseCache:
+    """A bounded, least recently used cache of parser results. Results are stored against the normalized
+    user input and the `version` of every object the parser looked at (the location, the inventory, the
+    battle, ...), these versions are incremented whenever those objects change, including edits of their
+    lists, so the cache never returns an outdated result. Renaming an npc, enemy or item isn't seen, call
+    `reindex` on the location, shop or battle holding it afterwards. The library's cache is available as
+    `pyzork.actions.PARSE_CACHE`.
+    
+    Parameters
+    -----------
+    maxsize : Optional[int]
+        How many results to keep, 1024 by default. A maxsize of 0 disables the cache.
+        
+    Attributes
+    -----------
+    maxsize : int
+        How many results are kept at most
+    hits : int
+        How many times a result was found in the cache
+    misses : int
+        How many times a result had to be computed
+    """
+    def __init__(self, maxsize : int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        
+    def __repr__(self):
+        return f"<ParseCache size={len(self)}/{self.maxsize} hits={self.hits} misses={self.misses}>"
+        
+    def __len__(self):
+        return len(self._results)
+        
+    def get(self, key : tuple, compute : "Callable[[], Any]") -> "Any":
+        """Returns the result stored for `key`, calling `compute` and storing its return value if there is none.
+        
+        Parameters
+        -----------
+        key : tuple
+            The key of the result
+        compute : Callable[[], Any]
+            Called to get the result if it isn't cached
+            
+        Returns
+        --------
+        Any
+            The result
+        """
+        if self.maxsize <= 0:
+            return compute()
+            
+        try:
+            result = self._results[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # something the parser was given cannot be hashed, skip the cache
+            return compute()
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return result
+            
+        self.misses += 1
+        result = compute()
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            
+        return result
+        
+    def clear(self):
+        """Remove every stored result and reset the counters."""
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+        
+PARSE_CACHE = ParseCache()
+
+#the number standing for each object in the keys of the cache, by id, with a weak reference to the object
+_TOKENS = {}
+_NEXT_TOKEN = itertools.count()
+_PLAIN = {int, str, type(None)}
+
+def _token(value):
+    # the keys hold a number of their own for every object instead of the object so that the cache doesn't
+    # keep them alive, numbers are never reused so a new object can't get the results of a collected one.
+    # entries are removed as soon as their object dies so a known id always belongs to the same object
+    entry = _TOKENS.get(id(value))
+    if entry is not None:
+        return entry[1]
+        
+    if value.__class__ in _PLAIN:
+        return value
+        
+    key = id(value)
+    entry = _TOKENS[key] = (weakref.ref(value, lambda ref: _TOKENS.pop(key, None)), next(_NEXT_TOKEN))
+    return entry[1]
+
+def cached_parser(context : "Callable[..., tuple]"):
+    """Decorator used to store the results of a parser in the PARSE_CACHE. `context` is called with every
+    argument of the parser except the user input and must return a tuple of everything the result depends
+    on, usually objects followed by their version.
+    
+    Parameters
+    -----------
+    context : Callable[..., tuple]
+        Function building the part of the key that depends on the context of the parser, the objects in it are
+        only weakly referenced by the cache
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(choice, *args, **kwargs):
+            if kwargs:
+                # the context is built from the positional arguments
+                return func(choice, *args, **kwargs)
+                
+            try:
+                state = [_token(value) for value in context(*args)]
+            except (AttributeError, TypeError):
+                # the context isn't versioned so there is no way to tell if a result is outdated, or it can't
+                # be weakly referenced
+                return func(choice, *args)
+                
+            words = choice.words if isinstance(choice, Command) else clean(choice).split()
+            # the lexicon is module level so it can be held
+            key = (func.__name__, " ".join(words), LEXICON, LEXICON.version, *state)
+            return PARSE_CACHE.get(key, lambda: func(choice, *args))
+            
+        return wrapper
+        
+    return decorator
 
-def direction_parser(choice : str, current_location : "Location") -> Direction:
+@cached_parser(lambda location: (location, location.version))
+def direction_parser(choice : "Union[str, Command]", current_location : "Location") -> Direction:
     """A bit more robust parser for picking a direction you want to go in. This parser works in the
     following way:
     
@@ -54,7 +1117,7 @@ def direction_parser(choice : str, current_location : "Location") -> Direction:
         
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         User input
     current_location : Location
         The location the user is currently at and against which to check the exits direction and names
@@ -66,17 +1129,18 @@ def direction_parser(choice : str, current_location : "Location") -> Direction:
     
     Possible Improvements
     ----------------------
-    * Find a larger list of ACCEPTABLE_MOVEMENTS words
+    * Find a larger list of movement words, they can already be added to ACCEPTABLE_MOVEMENTS or with
+      `LEXICON.add("movement", ...)`
     * Take into consideration each exit's `print_interaction`  
     """
-    choice = filter_stopword(choice)
-    exits = [x for x in current_location.exits.items() if x[1] is not None]
-    if any(x for x in choice if x in ACCEPTABLE_MOVEMENTS):
+    choice = parse_command(choice)
+    if "movement" in choice.intents:
+        exits = [x for x in current_location.exits.items() if x[1] is not None]
         if len(exits) == 1:
             return exits[0][0]
             
         acceptable_directions = [x.name for x in Direction] + [str(x.value) for x in Direction]
-        for word in choice:
+        for word in choice.tokens:
             if word in acceptable_directions:
                 return Direction(int(word)) if word.isdigit() else Direction[word]
         
@@ -85,13 +1149,14 @@ def direction_parser(choice : str, current_location : "Location") -> Direction:
             if exit is None:
                 continue
                 
-            new_dir = len([x for x in choice if x in exit.name.lower()])
+            new_dir = len([x for x in choice.tokens if x in exit.name.lower()])
             if new_dir > best_dir[1]:
                 best_dir = (direction, new_dir)
         
         return best_dir[0]
 
-def interact_parser(choice : str, location : "Location") -> "Entity":
+@cached_parser(lambda location: (location, location.version))
+def interact_parser(choice : "Union[str, Command]", location : "Location") -> "Entity":
     """A bit more robust parser for picking a npc to interact with. This parser works in the
     following way:
     
@@ -105,7 +1170,7 @@ def interact_parser(choice : str, location : "Location") -> "Entity":
         
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     location : str
         The location in which the player is trying to interact
@@ -117,35 +1182,32 @@ def interact_parser(choice : str, location : "Location") -> "Entity":
     
     Possible Improvements
     -----------------------
-    * Find a larger list of ACCEPTABLE_INTERACTS words
+    * Find a larger list of interaction words, they can already be added to ACCEPTABLE_INTERACTS or with
+      `LEXICON.add("interact", ...)`
     * Take into consideration each npc's `print_interaction`  
     """
-    choice = filter_stopword(choice)
-    if any(x for x in choice if x in ACCEPTABLE_INTERACTS):
+    choice = parse_command(choice)
+    if "interact" in choice.intents:
         if len(location.npcs) == 1:
             return location.npcs[0]
         
-        npcs = sorted(location.npcs, key=lambda x: len(x.name.split()))
-        best_interaction = (None, 0)
-        for npc in npcs:
-            new_interaction = len([x for x in choice if x in npc.name.lower()])
-            if new_interaction > best_interaction[1]:
-                best_interaction = (npc, new_interaction)
-              
-        return best_interaction[0]
+        npcs = best_matches(choice.tokens, _indexed(location.npcs))
+        if npcs:
+            return npcs[0]
         
 
-def view_parser(choice : str) -> str:
+@cached_parser(lambda: ())
+def view_parser(choice : "Union[str, Command]") -> str:
     """A simple parser for picking a player property to view. This parser works in the
     following way:
     
     #. Clean up user input and remove Stopwords.
     
-    #. For each possible alias in ALIASES_VIEW check if the user input contains any, if it does then return that alias 
+    #. Check if the user input contains any of the aliases of ALIASES_VIEW, if it does then return that alias 
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     
     Returns
@@ -154,12 +1216,10 @@ def view_parser(choice : str) -> str:
         The thing the player wishes to view    
     
     """
-    choice = filter_stopword(choice)
-    for word, aliases in ALIASES_VIEW.items():
-        if any(x for x in choice if x in aliases):
-            return word
+    return LEXICON.match(parse_command(choice).intents, "view")
             
-def shop_parser(choice : str, shop : "Shop") -> "Tuple[str, Item]":
+@cached_parser(lambda shop: (shop, shop.version))
+def shop_parser(choice : "Union[str, Command]", shop : "Shop") -> "Tuple[str, Item]":
     """A more robust parser for handling a player's responses within the context of a shop. This parser
     works in the following way:
     
@@ -167,13 +1227,13 @@ def shop_parser(choice : str, shop : "Shop") -> "Tuple[str, Item]":
     
     #. Clean up user input and remove Stopwords.
     
-    #. For each possible alias in ALIASES_SHOP check if the user input contains, if it does then continue
+    #. Check if the user input contains any of the aliases of ALIASES_SHOP, if it does then continue
     
     #. Compare every item and pick the one where the most words of the user input match the name
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     shop : Shop
         The shop the user is in and is trying to sell/buy from
@@ -184,25 +1244,19 @@ def shop_parser(choice : str, shop : "Shop") -> "Tuple[str, Item]":
         A tuple of the action the user is trying to do and the item they are trying to do it with
     
     """
+    choice = parse_command(choice)
     if direction_parser(choice, shop) is not None:
         return "exit", None
     
-    choice = filter_stopword(choice)
-    for word, aliases in ALIASES_SHOP.items():
-        if any(x for x in choice if x in aliases):
-            best_item = (None, 0)
-            items = sorted(shop.items, key=lambda x: len(x.name.split()))
-            for item in items:
-                new_item = len([x for x in choice if x in item.name.lower()])
-                if new_item > best_item[1]:
-                    best_item = (item, new_item)
-            
-            if best_item[0]:     
-                return word, best_item[0]
+    word = LEXICON.match(choice.intents, "shop")
+    if word is not None:
+        items = best_matches(choice.tokens, _indexed(shop.items))
+        if items:     
+            return word, items[0]
                 
     return None, None
     
-def target_parser(choice : str, targets : "List[Enemy]", player : "Optional[Player]" = None) -> "Union[Enemy, Player]":
+def target_parser(choice : "Union[str, Command, List[str]]", targets : "List[Enemy]", player : "Optional[Player]" = None) -> "Union[Enemy, Player]":
     """This checks if the user input contains enough keywords that can be considered to target an enemy. This
     parser assumes that the input has already been cleaned up and that another parser has already validated the
     primary action. The parser works as follows:
@@ -215,10 +1269,10 @@ def target_parser(choice : str, targets : "List[Enemy]", player : "Optional[Play
     
     Parameters
     -----------
-    choice : str
-        The user input
-    targets : List[Enemy]
-        The list of potential targets, can be empty
+    choice : Union[str, Command, List[str]]
+        The user input, either raw, parsed or as a list of tokens
+    targets : Union[List[Enemy], NameIndex]
+        The list of potential targets, can be empty. This can also be a NameIndex of the targets.
     player : Optional[Player]
         The player casting the ability, used if the ability is castable on self
     
@@ -234,34 +1288,30 @@ def target_parser(choice : str, targets : "List[Enemy]", player : "Optional[Play
     * Allow the player as a valid attack target (Done, to be tested)
     
     """
-    if any(x for x in choice if x in PLAYER) and player is not None:
+    if isinstance(choice, list):
+        tokens = choice
+    else:
+        tokens = parse_command(choice).tokens
+        
+    if any(x for x in tokens if x in PLAYER) and player is not None:
         return player
     
     if len(targets) == 1:
-        return targets[0]
-    
-    best_enemy = 0
-    enemies = []
-    targets = sorted(targets, key=lambda x: len(x.name.split()))
-    for enemy in targets:
-        new_enemy = len([x for x in choice if x in enemy.name.lower()])
-        if new_enemy > best_enemy:
-            best_enemy = new_enemy
-            enemies = [enemy]
-        elif new_enemy == best_enemy and best_enemy > 0:
-            enemies.append(enemy)
-                
+        return next(iter(targets))
+    
+    enemies = best_matches(tokens, targets)
     if len(enemies) == 1:
         return enemies[0]
     
     if len(enemies) == 3:
         for index, position in enumerate(POSITIONS):
-            if any(x for x in choice if x in position):
+            if any(x for x in tokens if x in position):
                 return enemies[index]
     if enemies:
         return enemies[0]
     
-def attack_parser(choice : str, battle : "Battle") -> "Union[Enemy, Player]":
+@cached_parser(lambda battle: (battle, battle.version, battle.player, battle.player.inventory, battle.player.inventory.version))
+def attack_parser(choice : "Union[str, Command]", battle : "Battle") -> "Union[Enemy, Player]":
     """A robust system to handle the user attacking an enemy during battle. This performs a simple
     check to see if the user desire to perform a simple attack and who they desire to attack. The
     parser proceeds in a very short process:
@@ -272,7 +1322,7 @@ def attack_parser(choice : str, battle : "Battle") -> "Union[Enemy, Player]":
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     battle : Battle
         The battle context for the attack
@@ -282,12 +1332,13 @@ def attack_parser(choice : str, battle : "Battle") -> "Union[Enemy, Player]":
     Union[Player, Enemy]
         The parsed target   
     """
-    choice = filter_stopword(choice)
+    choice = parse_command(choice)
     
-    if any(x for x in choice if x in [*ACCEPTABLE_ATTACKS, *battle.player.inventory.weapon.name.split()]):
-        return target_parser(choice, battle.alive, battle.player)
+    if "attack" in choice.intents or not choice.token_set.isdisjoint(battle.player.inventory.weapon.name.split()):
+        return target_parser(choice, _indexed(battle.alive), battle.player)
         
-def yes_or_no_parser(choice : str) -> bool:
+@cached_parser(lambda: ())
+def yes_or_no_parser(choice : "Union[str, Command]") -> bool:
     """A simple parser to check for a yes or no answer, based on basic boolean checks, this is used
     within the yes_or_no utils function. The parser works as follow:
         
@@ -297,7 +1348,7 @@ def yes_or_no_parser(choice : str) -> bool:
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     
     Returns
@@ -305,7 +1356,7 @@ def yes_or_no_parser(choice : str) -> bool:
     Optional[bool]
         True -> yes, False -> no, None -> neither
     """
-    choice = clean(choice).split()
+    choice = parse_command(choice).words
     
     if any(x for x in choice if x in YES):
         return True
@@ -315,7 +1366,8 @@ def yes_or_no_parser(choice : str) -> bool:
         
     return None
     
-def equip_item_parser(choice : str, player : "Player") -> "Equipment":
+@cached_parser(lambda player: (player, player.inventory, player.inventory.version))
+def equip_item_parser(choice : "Union[str, Command]", player : "Player") -> "Equipment":
     """A more robust filter for deciphering what item the player desires to equip, wether
     it be Armor or Weapon. It works as follows:
     
@@ -327,7 +1379,7 @@ def equip_item_parser(choice : str, player : "Player") -> "Equipment":
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     player : str
         The player trying to equip something
@@ -337,19 +1389,15 @@ def equip_item_parser(choice : str, player : "Player") -> "Equipment":
     Equipment
         The piece of equipment the parser had determined as the most likely the player is trying to equip
     """
-    choice = filter_stopword(choice)
-    
-    if any(x for x in choice if x in ACCEPTABLE_EQUIP):
-        best_equip = (None, 0)
-        equipment = sorted(player.inventory.equipment, key=lambda x: len(x.name.split()))
-        for item in equipment:
-            new_equip = len([x for x in choice if x in item.name.lower()])
-            if new_equip > best_equip[1]:
-                best_equip =  (item, new_equip)
-                
-        return best_equip[0]            
+    choice = parse_command(choice)
+    
+    if "equip" in choice.intents:
+        equipment = best_matches(choice.tokens, player.inventory.equipment_index)
+        if equipment:
+            return equipment[0]            
 
-def use_item_parser(choice : str, ctx : "Union[World, Battle]") -> "Tuple[Union[Enemy, Player], Consumable]":
+@cached_parser(lambda ctx: (ctx, getattr(ctx, "version", None), ctx.player, ctx.player.inventory, ctx.player.inventory.version))
+def use_item_parser(choice : "Union[str, Command]", ctx : "Union[World, Battle]") -> "Tuple[Union[Enemy, Player], Consumable]":
     """A more robust parser for picking an item to use and a target for that item. The parser proceeds in the
     following way:
     
@@ -365,7 +1413,7 @@ def use_item_parser(choice : str, ctx : "Union[World, Battle]") -> "Tuple[Union[
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     
     Returns
@@ -373,28 +1421,24 @@ def use_item_parser(choice : str, ctx : "Union[World, Battle]") -> "Tuple[Union[
     Tuple[Union[Enemy, Player], Consumable]
         The target and item the parser has deemed to be the most likely intent by the user
     """
-    choice = filter_stopword(choice)
-    
-    if any(x for x in choice if x in [*ACCEPTABLE_USE, *ACCEPTABLE_SELF_USE]):
-        best_item = (None, 0)
-        consumables = sorted(ctx.player.inventory.consumables.values(), key=lambda x: len(x.name.split()))
-        for item in consumables:
-            new_item = len([x for x in choice if x in item.name.lower()])
-            if new_item > best_item[1]:
-                best_item = (item, new_item)
+    choice = parse_command(choice)
+    
+    if "use" in choice.intents or "self_use" in choice.intents:
+        items = best_matches(choice.tokens, ctx.player.inventory.consumable_index)
                 
         if hasattr(ctx, "alive"):
-            target = target_parser(choice, ctx.alive, ctx.player)
+            target = target_parser(choice, _indexed(ctx.alive), ctx.player)
         else:
             target = target_parser(choice, [], ctx.player)
             
-        if target is None and any(x for x in choice if x in ACCEPTABLE_SELF_USE):
+        if target is None and "self_use" in choice.intents:
             target = ctx.player
             
-        if best_item[0] is not None and target is not None:
-            return target, best_item[0]
+        if items and target is not None:
+            return target, items[0]
     
-def use_ability_parser(choice, ctx : "Union[World, Battle]") -> "Tuple[Union[Enemy, Player], Ability]":
+@cached_parser(lambda ctx: (ctx, getattr(ctx, "version", None), ctx.player, ctx.player.version))
+def use_ability_parser(choice : "Union[str, Command]", ctx : "Union[World, Battle]") -> "Tuple[Union[Enemy, Player], Ability]":
     """A more robust parser for picking an ability to use and a target for that ability. The parser proceeds in the
     following way:
     
@@ -410,7 +1454,7 @@ def use_ability_parser(choice, ctx : "Union[World, Battle]") -> "Tuple[Union[Ene
     
     Parameters
     -----------
-    choice : str
+    choice : Union[str, Command]
         The user input
     
     Returns
@@ -418,20 +1462,288 @@ def use_ability_parser(choice, ctx : "Union[World, Battle]") -> "Tuple[Union[Ene
     Tuple[Union[Enemy, Player], Ability]
         The target and ability the user has determined as the most likely target
     """
-    choice = filter_stopword(choice)
-    
-    if any(x for x in choice if x in ACCEPTABLE_CAST):
-        best_ability = (None, 0)
-        abilities = sorted(ctx.player.abilities.values(), key=lambda x: len(x.name.split()))
-        for ability in abilities:
-            new_ability = len([x for x in choice if x in ability.name.lower()])
-            if new_ability > best_ability[1]:
-                best_ability = (ability, new_ability)
+    choice = parse_command(choice)
+    
+    if "cast" in choice.intents:
+        abilities = best_matches(choice.tokens, ctx.player.abilities.values())
                 
         if hasattr(ctx, "alive"):
-            target = target_parser(choice, ctx.alive, ctx.player)
+            target = target_parser(choice, _indexed(ctx.alive), ctx.player)
         else:
             target = target_parser(choice, [], ctx.player)
             
-        if best_ability[0] is not None and target is not None:
-            return target, best_ability[0]
+        if abilities and target is not None:
+            return target, abilities[0]
+            
+class CommandTable:
+    """A table of the commands the player can give in a given context. Instead of trying every parser one after
+    the other, the table looks at the intents of the command (see :class:Lexicon) and only runs the parsers
+    of the commands registered for those intents, in the order they were registered. World, Battle and Shop
+    each have one as the `commands` class attribute which you can extend with your own commands.
+    
+    .. code-block:: python
+    
+        def parse_dance(world, command):
+            return command.tokens[-1] if len(command.tokens) > 1 else "alone"
+            
+        def dance(world, partner):
+            post_output(f"You dance with {partner}")
+    
+        World.commands.register("dance", parse_dance, dance, intents=["dance"], words=["dance", "boogie"])
+        
+    The tables are shared by every subclass, if you want to only change the commands of a subclass give it
+    a copy of the table first with `commands = World.commands.copy()`.
+    
+    Parameters
+    -----------
+    entries : Optional[Iterable[tuple]]
+        Tuples of arguments to pass to :method:register
+        
+    Attributes
+    -----------
+    entries : Dict[str, Tuple[Optional[FrozenSet[str]], Callable, Callable]]
+        The intents, parser and handler of each command by name, in the order they were registered
+    """
+    def __init__(self, entries : "Iterable[tuple]" = ()):
+        self.entries = {}
+        self._by_intent = {}
+        self._always = []
+        for entry in entries:
+            self.register(*entry)
+            
+    def __repr__(self):
+        return f"<CommandTable commands={list(self.entries)}>"
+        
+    def __len__(self):
+        return len(self.entries)
+        
+    def __contains__(self, name):
+        return name in self.entries
+        
+    def _rebuild(self):
+        self._by_intent = {}
+        self._always = []
+        for order, (name, (intents, parser, handler)) in enumerate(self.entries.items()):
+            entry = (order, name, parser, handler)
+            if intents is None:
+                self._always.append(entry)
+                continue
+                
+            for intent in intents:
+                self._by_intent.setdefault(intent, []).append(entry)
+        
+    def register(self, name : str, parser : "Callable", handler : "Callable", intents : "Optional[Iterable[str]]" = None, words : "Iterable[str]" = ()):
+        """Add a command to the table, registering a command with the name of an existing one replaces it
+        but keeps its place.
+        
+        Parameters
+        -----------
+        name : str
+            The name of the command, this is what :method:parse returns
+        parser : Callable[[Any, Command, ...], Any]
+            Called with the context, the command and any extra argument given to :method:dispatch. Returns
+            what the command applies to if it recognizes it, a falsy value if it doesn't.
+        handler : Callable[[Any, Any, ...], Any]
+            Called with the context, the return value of the parser and any extra argument given to 
+            :method:dispatch to perform the command.
+        intents : Optional[Iterable[str]]
+            The intents (or group of intents, such as "view") that the parser needs to be run for. If this is
+            None the parser is run for every command.
+        words : Optional[Iterable[str]]
+            Words to add to the LEXICON for every intent of the command
+        """
+        intents = None if intents is None else frozenset(intents)
+        words = list(words)
+        if words:
+            if not intents:
+                raise ValueError("Words can only be registered for commands with intents")
+                
+            for intent in intents:
+                LEXICON.add(intent, *words)
+                
+        self.entries[name] = (intents, parser, handler)
+        self._rebuild()
+        
+    def unregister(self, name : str):
+        """Remove a command from the table, this does nothing if there is no such command.
+        
+        Parameters
+        -----------
+        name : str
+            The name of the command
+        """
+        if self.entries.pop(name, None) is not None:
+            self._rebuild()
+            
+    def copy(self) -> "CommandTable":
+        """Returns a new table with the same commands, to be edited without changing this one."""
+        table = CommandTable()
+        table.entries = dict(self.entries)
+        table._rebuild()
+        return table
+        
+    def candidates(self, command : "Union[str, Command]") -> "List[Tuple[int, str, Callable, Callable]]":
+        """The commands that could match the command, in the order they were registered.
+        
+        Parameters
+        -----------
+        command : Union[str, Command]
+            The user input
+            
+        Returns
+        --------
+        List[Tuple[int, str, Callable, Callable]]
+            The order, name, parser and handler of every possible command
+        """
+        command = parse_command(command)
+        found = set(self._always)
+        for intent in command.intents:
+            found.update(self._by_intent.get(intent, ()))
+            group = intent.partition(":")[0]
+            if group != intent:
+                found.update(self._by_intent.get(group, ()))
+                
+        return sorted(found, key=lambda entry: entry[0])
+        
+    def _match(self, command, ctx, args):
+        for _, name, parser, handler in self.candidates(command):
+            result = parser(ctx, command, *args)
+            if result:
+                return name, result, handler
+                
+        return None, None, None
+        
+    def parse(self, command : "Union[str, Command]", ctx : "Any", *args) -> "Tuple[Optional[str], Any]":
+        """Find out which command the user input is without performing it.
+        
+        Parameters
+        -----------
+        command : Union[str, Command]
+            The user input
+        ctx : Any
+            The context the input is given in, passed to the parser
+        *args
+            Extra arguments passed to the parser
+            
+        Returns
+        --------
+        Tuple[Optional[str], Any]
+            The name of the command and the result of its parser, (None, None) if no command matched.
+        """
+        name, result, _ = self._match(parse_command(command), ctx, args)
+        return name, result
+        
+    def dispatch(self, command : "Union[str, Command]", ctx : "Any", *args) -> "Tuple[Optional[str], Any]":
+        """Find out which command the user input is and perform it.
+        
+        Parameters
+        -----------
+        command : Union[str, Command]
+            The user input
+        ctx : Any
+            The context the input is given in, passed to the parser and the handler
+        *args
+            Extra arguments passed to the parser and the handler
+            
+        Returns
+        --------
+        Tuple[Optional[str], Any]
+            The name of the command and the return value of its handler, (None, None) if no command matched.
+        """
+        name, result, handler = self._match(parse_command(command), ctx, args)
+        if name is None:
+            return None, None
+            
+        return name, handler(ctx, result, *args)
+        
+LOCATION_COMMANDS = CommandTable([
+    ("move", lambda location, choice: direction_parser(choice, location), None, ["movement"]),
+    ("interact", lambda location, choice: interact_parser(choice, location), None, ["interact"]),
+    ("view", lambda location, choice: view_parser(choice), None, ["view"]),
+])
+
+def _context_commands(ctx):
+    if isinstance(ctx, tuple):
+        ctx, *args = ctx
+    else:
+        args = []
+        
+    commands = getattr(ctx, "commands", None)
+    if isinstance(commands, CommandTable):
+        return commands, ctx, args
+        
+    if hasattr(ctx, "exits"):
+        return LOCATION_COMMANDS, ctx, args
+        
+    raise TypeError(f"Cannot parse commands in the context of {ctx!r}")
+    
+def parse(choice : "Union[str, Command]", ctx : "Union[World, Battle, Shop, Location, tuple]") -> "Tuple[Optional[str], Any]":
+    """Find out what the player is trying to do in a given context, using the same :class:CommandTable as
+    the game loops would. This doesn't perform the action.
+    
+    #. In a World: "move", "interact", "view", "equip" and "use_item"
+    
+    #. In a Battle: "attack", "use_ability", "use_item" and "view"
+    
+    #. In a Shop: "exit", "sell", "buy" and "view", as well as "equip" and "use_item" if the context is
+       a (shop, player) tuple
+    
+    #. In a Location: "move", "interact" and "view"
+    
+    Parameters
+    -----------
+    choice : Union[str, Command]
+        The user input
+    ctx : Union[World, Battle, Shop, Location, tuple]
+        The context the input is given in, a tuple is unpacked as the context followed by the extra 
+        arguments to pass to the parsers.
+        
+    Returns
+    --------
+    Tuple[Optional[str], Any]
+        The action and the result of the parser that recognized it, (None, None) if no parser did.
+    """
+    commands, ctx, args = _context_commands(ctx)
+    return commands.parse(choice, ctx, *args)
+    
+def parse_batch(pairs : "Iterable[Tuple[Union[str, Command], Any]]") -> "List[Tuple[Optional[str], Any]]":
+    """Parse many commands at once, for example to replay or grade a log of player commands. This returns the
+    same thing as calling :method:parse on every pair but each distinct line is only cleaned up and split once
+    for the whole batch, and the command table of each context is only looked up once.
+    
+    Parameters
+    -----------
+    pairs : Iterable[Tuple[Union[str, Command], Union[World, Battle, Shop, Location]]]
+        The commands and the context they were given in
+        
+    Returns
+    --------
+    List[Tuple[Optional[str], Any]]
+        The action and result for each command, in the same order as `pairs`
+    """
+    commands = {}
+    contexts = {}
+    results = []
+    for choice, ctx in pairs:
+        if not isinstance(choice, Command):
+            command = commands.get(choice)
+            if command is None:
+                if len(commands) >= 65536:
+                    commands.clear()
+                    
+                command = commands[choice] = Command(choice)
+                
+            choice = command
+            
+        found = contexts.get(id(ctx))
+        if found is None:
+            if len(contexts) >= 65536:
+                contexts.clear()
+                
+            # keep ctx alive so its id cannot be reused by another context while it is in there
+            found = contexts[id(ctx)] = (ctx, _context_commands(ctx))
+            
+        table, context, args = found[1]
+        results.append(table.parse(choice, context, *args))
+        
+    return results
@@ -1,6 +1,21 @@
 from .utils import post_output, _getattr
 from .errors import *
 
+from collections import deque
+import contextlib
+import contextvars
+
+def _event_key(event, args, kwargs):
+    # the same event about the same objects, they are kept alive by the buffer so ids can't be reused
+    return (event, tuple(map(id, args)), tuple((name, id(value)) for name, value in kwargs.items()))
+
+def _is_awaitable(value):
+    # asyncio and inspect are only imported once a handler is a coroutine, most games never need them
+    return hasattr(value, "__await__")
+
+async def _wait(awaitable):
+    return await awaitable
+
 class QuestManager:
     def __init__(self, **kwargs):
         """The QuestManager is a module wide instance which is used to manage quests in your adventure. To use
@@ -17,14 +32,36 @@ class QuestManager:
         finished_quests : Dict[str : int]
             A dictionnary of quest ids and int, representing each quests and how many times they have been 
             completed
-        pending_rewards : List[Quest]
-            A list of completed quests from which the rewards have not yet been claimed, this list is
-            processed by `progress_rewards`.
+        pending_rewards : Deque[Quest]
+            The completed quests from which the rewards have not yet been claimed, in the order they were
+            completed. This queue is emptied by `process_rewards`.
+        subscribers : Dict[str, Dict[str, Quest]]
+            The active quests that handle each event, by event name and then quest id. Only the handlers
+            a quest overrides are registered, `progress_quests` only calls these.
+        watchers : Dict[Tuple[str, Any], Dict[Tuple[str, int], Quest]]
+            The conditions of the active quests that are not met yet, by event and key and then by quest id
+            and index of the condition, see `Condition`.
+        buffering : bool
+            Whether the events are kept until the end of the turn instead of being handled right away, see
+            `start_buffering`.
+        max_concurrency : int
+            How many coroutine handlers and rewards can run at the same time under asyncio, see `settle`.
+            Can be passed as a keyword argument, 8 by default.
         """
         self.quests = kwargs.pop("quests", {})
         self.active_quests = {}
         self.finished_quests = {x : 0 for x in self.quests}
-        self.pending_rewards = []
+        self.pending_rewards = deque()
+        self.subscribers = {}
+        self.watchers = {}
+        self.buffering = False
+        self.coalesce = False
+        self.ordering = "posted"
+        self._buffer = []
+        self._posted = set()
+        self.max_concurrency = kwargs.pop("max_concurrency", 8)
+        self._in_flight = []
+        self._semaphore = (None, None)
         
     def add(self, **kwargs):
         """Decorator method for adding quests to the QuestManager instance. This adds the quest to the list
@@ -95,6 +132,11 @@ class QuestManager:
             raise QuestNonRepeatable(f"This quest cannot be done more than {total} time(s)") 
             
         self.active_quests[quest_id] = quest
+        for event in quest.get_handlers():
+            self.subscribers.setdefault(event, {})[quest_id] = quest
+            
+        for index, condition in enumerate(quest.conditions):
+            self.watchers.setdefault(condition.index_key, {})[(quest_id, index)] = quest
         
     def stop_quest(self, quest_id):
         """Stop a quest, discarding current progress and stopping player's actions from contributing to its
@@ -105,7 +147,21 @@ class QuestManager:
         quest_id : str
             The unique identifier for the quest you wish to stop
         """
-        del self.active_quests[quest_id]
+        quest = self.active_quests.pop(quest_id)
+        for event in quest.get_handlers():
+            subscribers = self.subscribers.get(event, {})
+            subscribers.pop(quest_id, None)
+            if not subscribers:
+                self.subscribers.pop(event, None)
+                
+        for index, condition in enumerate(quest.conditions):
+            self._unwatch(condition.index_key, (quest_id, index))
+            
+    def _unwatch(self, index_key, watcher):
+        watchers = self.watchers.get(index_key, {})
+        watchers.pop(watcher, None)
+        if not watchers:
+            self.watchers.pop(index_key, None)
         
     def pause_quest(self, quest_id):
         """Pause a quest, the quest's current progress remains stored and a new instance of the quest cannot
@@ -145,18 +201,180 @@ class QuestManager:
         **kwargs : Dict
             Dictionnary of kwargs that will be passed to the quests that have this event
         """
-        rewards = []
-        for quest_id, quest in list(self.active_quests.items()):
-            if quest.paused:
-                continue
+        if self.buffering:
+            if self.coalesce:
+                key = _event_key(event, args, kwargs)
+                if key in self._posted:
+                    return
+                    
+                self._posted.add(key)
+                
+            self._buffer.append((event, args, kwargs))
+            return
             
-            try:
-                done = getattr(quest, event)(*args, **kwargs)
-            except AttributeError:
+        self._dispatch(event, args, kwargs)
+        
+    def _dispatch(self, event, args, kwargs):
+        if self.watchers:
+            self._check_conditions(event, args[0] if args else None)
+            
+        subscribers = self.subscribers.get(event)
+        if not subscribers:
+            return
+            
+        for quest_id, quest in list(subscribers.items()):
+            # a quest finished or stopped by an earlier handler doesn't get the event
+            if quest.paused or self.active_quests.get(quest_id) is not quest:
                 continue
+            
+            done = getattr(quest, event)(*args, **kwargs)
+            if _is_awaitable(done):
+                self._await(done, quest_id, quest)
+            elif done:
+                self.finish_quest(quest_id)
                 
-            if done:
+    def _await(self, awaitable, quest_id=None, quest=None):
+        # coroutines run as tasks when there is an event loop and their result is applied by `settle`,
+        # without one they are run right away like any other handler
+        import asyncio
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            done = asyncio.run(_wait(awaitable))
+            if quest is not None and done and self.active_quests.get(quest_id) is quest:
                 self.finish_quest(quest_id)
+        else:
+            self._in_flight.append((loop.create_task(self._limited(awaitable)), quest_id, quest))
+            
+    async def _limited(self, awaitable):
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        if self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_concurrency))
+            
+        async with self._semaphore[1]:
+            return await awaitable
+            
+    async def settle(self):
+        """Wait for the coroutine handlers and rewards started under asyncio, then finish the quests whose
+        handler returned True. The quests are finished in the order the events were handled, not the order
+        the handlers completed in, so a game plays out the same however long the handlers take. Await this
+        at the end of every turn of an asyncio game loop.
+        
+        .. code-block:: python
+        
+            class Achievement(Quest):
+                async def on_interact(self, entity, world):
+                    return await achievements.unlock(entity.name)
+                    
+            async def turn(world):
+                ...
+                world.end_turn()
+                await QM.settle()
+        
+        If a handler raised, the results of the others are still applied and the first exception is raised.
+        """
+        import asyncio
+        
+        while self._in_flight:
+            in_flight, self._in_flight = self._in_flight, []
+            results = await asyncio.gather(*(task for task, _, _ in in_flight), return_exceptions=True)
+            
+            error = None
+            for (task, quest_id, quest), done in zip(in_flight, results):
+                if isinstance(done, BaseException):
+                    error = error or done
+                elif quest is not None and done and self.active_quests.get(quest_id) is quest:
+                    self.finish_quest(quest_id)
+                    
+            if error is not None:
+                raise error
+                
+    def _check_conditions(self, event, subject):
+        # only the conditions waiting for this event about this kind of subject are looked at
+        keys = [None, *type(subject).__mro__]
+        name = getattr(subject, "name", None)
+        if name is not None:
+            keys.append(("name", name))
+            
+        for key in keys:
+            index_key = (event, key)
+            watchers = self.watchers.get(index_key)
+            if not watchers:
+                continue
+                
+            for watcher, quest in list(watchers.items()):
+                quest_id, index = watcher
+                if quest.paused or self.active_quests.get(quest_id) is not quest:
+                    continue
+                    
+                quest.progress[index] += 1
+                if quest.progress[index] < quest.conditions[index].n:
+                    continue
+                    
+                self._unwatch(index_key, watcher)
+                if quest.is_complete():
+                    self.finish_quest(quest_id)
+                
+    def start_buffering(self, coalesce : bool = False, ordering : str = "posted"):
+        """Keep the events posted through `progress_quests` until the end of the turn instead of handling
+        them right away, the battles and the world loop call `flush_events` at the end of every turn. This
+        turns an area attack or several level ups into a single pass over the quests.
+        
+        .. code-block:: python
+        
+            QM.start_buffering(coalesce=True, ordering="event")
+        
+        Parameters
+        -----------
+        coalesce : Optional[bool]
+            Only keep the first of identical events posted during a turn, events are identical if they have the
+            same name and the same objects as arguments. False by default.
+        ordering : Optional[str]
+            "posted" to handle the events in the order they were posted, "event" to handle them grouped by
+            name, the names in the order they were first posted and the events of a name in the order they
+            were posted. "posted" by default.
+        """
+        if ordering not in ("posted", "event"):
+            raise ValueError(f"Unknown ordering {ordering!r}")
+            
+        self.buffering = True
+        self.coalesce = coalesce
+        self.ordering = ordering
+        
+    def stop_buffering(self):
+        """Handle the events that are still buffered and go back to handling them as they are posted."""
+        self.flush_events()
+        self.buffering = False
+        
+    def flush_events(self):
+        """Handle all the buffered events, this is called at the end of every turn. The events posted by the
+        quests while the buffer is handled are handled as well, once the buffer is empty. If a handler raises,
+        the events that were not handled yet stay buffered."""
+        while self._buffer:
+            buffer, self._buffer = self._buffer, []
+            self._posted = set()
+            if self.ordering == "event":
+                groups = {}
+                for posted in buffer:
+                    groups.setdefault(posted[0], []).append(posted)
+                    
+                buffer = [posted for group in groups.values() for posted in group]
+                
+            queue = deque(buffer)
+            try:
+                while queue:
+                    event, args, kwargs = queue.popleft()
+                    self._dispatch(event, args, kwargs)
+            finally:
+                # the events left wait for the next flush, ahead of those posted by the handlers
+                if queue:
+                    queue.extend(self._buffer)
+                    self._buffer = list(queue)
+                    if self.coalesce:
+                        self._posted = {_event_key(*posted) for posted in self._buffer}
                 
     def finish_quest(self, quest_id : str):
         """Forcefully complete a quest,sending the reward to be processed, incrementing
@@ -202,19 +420,112 @@ class QuestManager:
             The player to reward, this will be passed straight on the the quest's `reward` function.
         world : World
             The world where the quest happened, this will be passed straight to the quest's reward function.
+            
+        Rewards can be coroutines, under asyncio they run concurrently and `settle` waits for them. If a reward
+        raises, the quests that were not rewarded yet stay in `pending_rewards`.
         """
         while self.pending_rewards:
-            quest = self.pending_rewards.pop(0)
-            quest.reward(player, world)
+            # a reward can finish other quests, those are handled by the next pass
+            pending, self.pending_rewards = self.pending_rewards, deque()
+            
+            # the quests are rewarded in the order they were completed, except that the quests of a class
+            # overriding `reward_all` are rewarded together when the first of them is reached
+            batches = {}
+            for quest in pending:
+                if type(quest).reward_all.__func__ is not Quest.reward_all.__func__:
+                    batches.setdefault(type(quest), []).append(quest)
+                    
+            batched = set()
+            try:
+                while pending:
+                    # popped before the reward so that a reward raising only loses that reward
+                    quest = pending.popleft()
+                    quest_class = type(quest)
+                    if quest_class in batched:
+                        continue
+                        
+                    if quest_class in batches:
+                        batched.add(quest_class)
+                        rewards = quest_class.reward_all(batches[quest_class], player, world)
+                    else:
+                        rewards = quest.reward(player, world)
+                        
+                    for reward in (rewards if isinstance(rewards, list) else [rewards]):
+                        if _is_awaitable(reward):
+                            self._await(reward)
+            finally:
+                # the quests not rewarded yet stay pending, ahead of those completed by the rewards
+                queue = deque(quest for quest in pending if type(quest) not in batched)
+                if queue:
+                    queue.extend(self.pending_rewards)
+                    self.pending_rewards = queue
             
     def clear(self):
-        """Remove all registered, active and finished quests. Also removes all pending rewards"""
+        """Remove all registered, active and finished quests. Also removes all pending rewards and buffered
+        events, and stops buffering"""
         self.quests = {}
         self.active_quests = {}
         self.finished_quests = {}
-        self.pending_rewards = []
+        self.pending_rewards = deque()
+        self.subscribers = {}
+        self.watchers = {}
+        self.buffering = False
+        self.coalesce = False
+        self.ordering = "posted"
+        self._buffer = []
+        self._posted = set()
+        for task, _, _ in self._in_flight:
+            task.cancel()
+        self._in_flight = []
 
 QM = QuestManager()
+
+_quest_manager = contextvars.ContextVar("quest_manager", default=QM)
+
+def get_quest_manager() -> QuestManager:
+    """The quest manager of the current game, the library sends all the quest events to it. This is `QM`
+    unless another one was set with `set_quest_manager` or `quest_manager`.
+    
+    Returns
+    --------
+    QuestManager
+        The quest manager in use
+    """
+    return _quest_manager.get()
+    
+def set_quest_manager(manager : QuestManager):
+    """Change the quest manager of the current game. The manager is stored in a context variable so every
+    thread and every asyncio task gets its own, this allows running many games in one process without their
+    quests mixing.
+    
+    .. code-block:: python
+    
+        async def play(player):
+            set_quest_manager(QuestManager(quests=dict(QM.quests)))
+            ...
+    
+    Parameters
+    -----------
+    manager : QuestManager
+        The quest manager to use, `QM` to go back to the default one
+    """
+    _quest_manager.set(manager)
+    
+@contextlib.contextmanager
+def quest_manager(manager : QuestManager):
+    """Context manager using another quest manager inside its block, see `set_quest_manager`.
+    
+    .. code-block:: python
+    
+        with quest_manager(QuestManager(quests=dict(QM.quests))) as quests:
+            quests.start_quest("KillGob")
+            world.world_loop()
+    """
+    token = _quest_manager.set(manager)
+    try:
+        yield manager
+    finally:
+        _quest_manager.reset(token)
         
 class Quest:
     """
@@ -236,14 +547,22 @@ class Quest:
         method
     id : str
         The unique identifier for the quests which are used for things like `qm.start_quest` and `qm.stop_quest`
+    conditions : List[Condition]
+        Conditions that complete the quest once they are all met, without writing event handlers. Set this
+        on the class, see `count`.
+    progress : List[int]
+        How many times each condition was met so far
         
     """
+    conditions = ()
+    
     def __init__(self, **kwargs):
         self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
         self.description = _getattr(self, "description", kwargs, self.reward.__doc__)
         self.id = _getattr(self, "id", kwargs)
             
         self.paused = False
+        self.progress = [0] * len(self.conditions)
         self.setup(**kwargs)
         
     def __repr__(self):
@@ -347,18 +666,46 @@ class Quest:
         """
         pass
         
-    def reward(self, player : "Player"):
+    def reward(self, player : "Player", world : "World"):
         """Function that grants the player a certain reward, this make the player instance available to
         you. Quest rewards are only processed in the world loop by default, if you want or need to forcibly
-        check if any new rewards have been made available you can use pyzork.qm.process_rewards
+        check if any new rewards have been made available you can use pyzork.qm.process_rewards. This can
+        be a coroutine, see `QuestManager.settle`.
         
         Parameters
         -----------
         player : Player
             The player instance of the adventure
+        world : World
+            The world the player is in
         """
         pass
         
+    @classmethod
+    def reward_all(cls, quests : "List[Quest]", player : "Player", world : "World"):
+        """Grant the rewards of all the quests of this class completed since the rewards were last
+        processed, by default this calls `reward` on each of them. Override this to handle them at once,
+        such as posting a single message when a repeatable quest was completed many times. An override is
+        called once per pass, when the first of these quests is reached, the quests of classes that don't
+        override it are rewarded one by one in the order they were completed.
+        
+        Parameters
+        -----------
+        quests : List[Quest]
+            The completed quests, in the order they were completed
+        player : Player
+            The player instance of the adventure
+        world : World
+            The world the player is in
+            
+        Returns
+        --------
+        List[Any]
+            What the rewards returned, the coroutines among them are run by the QuestManager. An override can
+            also return a single coroutine.
+        """
+        return [quest.reward(player, world) for quest in quests]
+        
     def repeatable(self) -> int:
         """Function that defines how many times you can do this quest, 1 by default. Must return an int"""
         return 1
@@ -366,7 +713,109 @@ class Quest:
     def pause(self, value):
         self.paused = value
         
+    def is_complete(self) -> bool:
+        """Whether all the conditions of the quest are met.
+        
+        Returns
+        --------
+        bool
+            True if every condition was met as many times as it needs
+        """
+        return all(done >= condition.n for done, condition in zip(self.progress, self.conditions))
+        
+    def get_handlers(self) -> "List[str]":
+        """The events this quest handles, the `on_XXX` methods it defines or overrides. The empty handlers
+        of this class are left out since they never do anything.
+        
+        Returns
+        --------
+        List[str]
+            The names of the events
+        """
+        events = []
+        for name in dir(self):
+            if not name.startswith("on_"):
+                continue
+                
+            handler = getattr(self, name)
+            if callable(handler) and getattr(handler, "__func__", handler) is not getattr(Quest, name, None):
+                events.append(name)
+                
+        return events
+        
     @classmethod
     def get_class_name(cls):
         return cls.__name__
-    
\ No newline at end of file
+    
+        
+class Condition:
+    """A declarative goal for a quest, met once an event happened a number of times about a certain kind of
+    subject, the first argument of the event (the entity killed, the item picked up, the location discovered,
+    ...). Use `count` to create them. The QuestManager indexes the conditions by event and subject so an
+    event only reaches the quests that wait for it.
+    
+    Parameters
+    -----------
+    event : Union[str, Callable]
+        The event, such as "on_death", or the handler method of that event such as `Quest.on_death`
+    n : Optional[int]
+        How many times the event has to happen, 1 by default
+    type : Optional[type]
+        Only count the events about instances of this class, including subclasses
+    name : Optional[str]
+        Only count the events about something with this name
+        
+    Attributes
+    -----------
+    index_key : Tuple[str, Any]
+        The event and the key the condition is indexed by, the class, ("name", name) or None to count every
+        event of that kind.
+    """
+    def __init__(self, event, n=1, **kwargs):
+        if "type" in kwargs and "name" in kwargs:
+            raise ValueError("A condition can't filter on both the type and the name")
+            
+        self.event = event if isinstance(event, str) else event.__name__
+        self.n = n
+        self.type = kwargs.pop("type", None)
+        self.name = kwargs.pop("name", None)
+        
+        if self.type is not None:
+            key = self.type
+        elif self.name is not None:
+            key = ("name", self.name)
+        else:
+            key = None
+            
+        self.index_key = (self.event, key)
+        
+    def __repr__(self):
+        return f"<Condition event={self.event} n={self.n} key={self.index_key[1]!r}>"
+        
+def count(event, n=1, **kwargs) -> Condition:
+    """Create a condition met once `event` happened `n` times, optionally only counting the events about
+    instances of a class (`type=`) or things with a certain name (`name=`).
+    
+    .. code-block:: python
+    
+        @QM.add(id="KillGoblins")
+        class KillGoblins(Quest):
+            conditions = [count("on_death", type=Goblin, n=10), count("on_pickup", name="Goblin Crown")]
+    
+    Parameters
+    -----------
+    event : Union[str, Callable]
+        The event, such as "on_death"
+    n : Optional[int]
+        How many times the event has to happen, 1 by default
+    type : Optional[type]
+        Only count the events about instances of this class
+    name : Optional[str]
+        Only count the events about something with this name
+        
+    Returns
+    --------
+    Condition
+        The condition, to put in the `conditions` of a quest
+    """
+    return Condition(event, n, **kwargs)
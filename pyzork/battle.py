@@ -1,6 +1,13 @@
 from .utils import get_user_input, post_output
+from . import utils
+from .entities import Entity, _clocked_turn
+from .base import get_quest_manager
 from .actions import *
 
+def _view(battle, view):
+    getattr(battle.player, f"print_{view}")()
+    return True
+
 class Battle:
     """
     The battle class does need to be subclassed unless you need a very fine grained control over how battles
@@ -26,16 +33,32 @@ class Battle:
     -----------
     player : Player
         The player in the battle
-    alive : List[NPC]
-        The list of enemies still alive
+    alive : IndexedList
+        The list of enemies still alive, lists assigned to this are copied into an IndexedList
+    alive_index : NameIndex
+        Index of the names of the enemies still alive, used to resolve targets and kept up to date by the
+        `alive` list
+    version : int
+        Incremented every time the list of enemies still alive changes
     dead : List[NPC]
         The list of NPCS that have died
     turn : int
         The number of turns that have passed.
+    commands : CommandTable
+        The commands the player can use on their turn, shared by every battle. A command whose handler
+        returns True doesn't count as taking a turn.
     """
+    commands = CommandTable([
+        ("attack", lambda battle, choice: attack_parser(choice, battle), lambda battle, target: battle.player.do_attack(target)),
+        ("use_ability", lambda battle, choice: use_ability_parser(choice, battle), lambda battle, reply: battle.player.use_ability(reply[1], reply[0]), ["cast"]),
+        ("use_item", lambda battle, choice: use_item_parser(choice, battle), lambda battle, reply: battle.player.use_item_on(reply[1], reply[0]), ["use", "self_use"]),
+        ("view", lambda battle, choice: view_parser(choice), _view, ["view"]),
+    ])
+    
     def __init__(self, **kwargs):
         self.player = kwargs.pop("player")
         enemies = kwargs.pop("enemies")
+        self.version = 0
         self.alive = [x for x in enemies if x.is_alive()]
         self.location = kwargs.get("location")
         self.priorities = kwargs.get("priorities", self.priorities)
@@ -43,6 +66,19 @@ class Battle:
         self.turn = 0
         self.dead = [x for x in enemies if not x.is_alive()]
         
+    @property
+    def alive(self) -> IndexedList:
+        return self._alive
+        
+    @alive.setter
+    def alive(self, alive):
+        self._alive = IndexedList(alive, self)
+        self.version += 1
+        
+    @property
+    def alive_index(self) -> NameIndex:
+        return self._alive.names
+        
     def remove_dead(self, index : int):
         """Remove a dead enemy from the list of living enemies and grant experience to the player
         
@@ -85,7 +121,8 @@ class Battle:
     def battle_loop(self):
         """Heart of the battle system. Call this to start the battle"""
         while not self.win_condition():
-            post_output(f"You are attacked by {self.alive}")
+            if not utils.HEADLESS:
+                post_output(f"You are attacked by {self.alive}")
             for entity in self.priorities():
                 entity.battle_logic(self)
 
@@ -97,17 +134,74 @@ class Battle:
         post_output("You've killed all the enemies!")
 
     def end_turn(self):
-        """Increments the turns, remove dead stuff and decrement duration of modifiers"""
+        """Increments the turns, remove dead stuff and decrement duration of modifiers. The modifiers
+        with an effect are run together for everyone in the battle, grouped by their class, and the enemies
+        that died during the turn, including from those effects, are removed at the end. Finally the quest
+        events buffered during the turn are handled."""
         self.turn += 1
 
-        self.player.end_turn()
-        
-        for index, enemy in list(enumerate(self.alive)):
-            if not enemy.is_alive():
-                self.remove_dead(index)
+        combatants = [self.player]
+        dead = []
+        for enemy in self.alive:
+            (combatants if enemy.is_alive() else dead).append(enemy)
             
+        batched = []
+        groups = {}
+        custom = {}
+        for entity in combatants:
+            cls = type(entity)
+            if cls not in custom:
+                custom[cls] = cls.end_turn is not Entity.end_turn
+                
+            if custom[cls]:
+                # entities with their own end_turn are left to it
+                entity.end_turn()
+                dead = None
+                continue
+                
+            batched.append(entity)
+            if entity._ticking:
+                for key, modifier in entity._ticking.items():
+                    group = groups.get(type(modifier))
+                    if group is None:
+                        group = groups[type(modifier)] = []
+                    group.append((entity, key, modifier))
+                
+        with _clocked_turn():
+            for modifier_class, group in groups.items():
+                end_turn = modifier_class.end_turn
+                for entity, key, modifier in group:
+                    if entity.modifiers.get(key) is modifier:
+                        end_turn(modifier, entity)
+                    
+        for entity in batched:
+            entity._advance_turn()
+            
+        # the effects can kill, otherwise the enemies found dead at the start are all the dead
+        if groups or dead is None:
+            self.remove_all_dead()
+        elif dead:
+            self._remove_dead(combatants[1:], dead)
+            
+        get_quest_manager().flush_events()
+            
+    def remove_all_dead(self):
+        """Remove all the dead enemies from the list of living enemies and grant the experience for each of
+        them to the player."""
+        alive = []
+        dead = []
         for enemy in self.alive:
-            enemy.end_turn()
+            (alive if enemy.is_alive() else dead).append(enemy)
+            
+        if dead:
+            self._remove_dead(alive, dead)
+            
+    def _remove_dead(self, alive, dead):
+        self.alive._replace(alive, dead)
+        for enemy in dead:
+            self.player.gain_experience(enemy.experience_granted(self.player))
+            
+        self.dead.extend(dead)
 
     def player_turn(self):
         """Print possible options and let the user pick one through `battle_parser`"""
@@ -120,7 +214,7 @@ class Battle:
             pass
         
     def battle_parser(self) -> bool:
-        """Take input of the user and parse it against a set of possible actions
+        """Take input of the user and perform the matching command of `commands`
         
         Returns
         --------
@@ -129,19 +223,6 @@ class Battle:
             taking a turn then performing it will end the player's turn and move onto
             the rest of the priorities.
         """
-        choice = get_user_input().lower()
-        if target := attack_parser(choice, self):
-            self.player.do_attack(target)
-            return False
-        elif reply := use_ability_parser(choice, self):
-            self.player.use_ability(reply[1], reply[0])
-            return False
-        elif reply := use_item_parser(choice, self):
-            self.player.use_item_on(reply[1], reply[0])
-            return False
-        elif reply := view_parser(choice):
-            getattr(self.player, f"print_{reply}")()
-            return True
-            
-        return False      
+        _, reply = self.commands.dispatch(Command(get_user_input()), self)
+        return reply is True
     
\ No newline at end of file
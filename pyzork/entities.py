@@ -2,11 +2,53 @@ from .enums import StatEnum, EndgameReason
 from .errors import EndGame
 from .equipment import NullWeapon, NullArmor, Inventory
 from .levels import ExperienceLevels
-from .utils import post_output, _getattr
-from .base import QM
+from .utils import post_output, _getattr, _EMPTY
+from . import utils
+from .events import HealthChanged, EnergyChanged, Attacked
+from .base import get_quest_manager
 
+import contextlib
+import heapq
+import itertools
 import math
 
+#requirements of the entities that can't level up, shared by all of them
+NO_LEVELS = (math.inf,)
+
+#breaks the ties between modifiers expiring on the same turn
+_SEQUENCE = itertools.count()
+
+#whether the library is running the modifiers of a turn, the clocks of the entities advance right after.
+#Modifier.end_turn called outside of this comes from an end_turn written before the clocks and counts
+#the duration down itself
+_CLOCKED = False
+
+@contextlib.contextmanager
+def _clocked_turn():
+    global _CLOCKED
+    previous, _CLOCKED = _CLOCKED, True
+    try:
+        yield
+    finally:
+        _CLOCKED = previous
+
+#parameters of the entities which are the same for every instance of a template and the attribute they
+#are stored as
+TEMPLATE_ATTRIBUTES = {
+    "max_health": "base_max_health",
+    "attack": "base_attack",
+    "defense": "base_defense",
+    "max_energy": "base_max_energy",
+    "name": "name",
+    "description": "description",
+    "abilities": "abilities",
+    "experience": "experience_points",
+}
+
+#parameters of the entities which are copied on every instance of a template, they change over the life of
+#the entity
+TEMPLATE_DEFAULTS = ("health", "energy", "money")
+
 class Entity:
     """Abstract class representing an entity. The player should need to call this, instead rely or either the
     Player or NPC class. A lot of the parameters of this class are optional, depending on which kind of adventure
@@ -30,9 +72,9 @@ class Entity:
         The entity's current energy. Same as max_energy by default.
         
     inventory : Inventory
-        The entity's inventory
+        The entity's inventory, an empty one by default
     experience : ExperienceLevels
-        This entity's experience and levels
+        This entity's experience and levels, levels that can't be gained by default
     abilities : List[Ability]
         A list of abilities the entity has at the start
     
@@ -74,33 +116,79 @@ class Entity:
     description : str
         Flavour text about the entity      
     """    
+    __slots__ = ("base_max_health", "_health", "base_attack", "base_defense", "base_max_energy", "_energy", "_inventory", "_experience", "money", "name", "description", "modifiers", "_stat_modifiers", "turn", "_expiries", "_ticking", "abilities", "interacted", "version", "_stats", "__dict__", "__weakref__")
+    
+    _shared = frozenset()
+    _defaults = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a subclass of a template can still override the stats the usual way
+        overriden = {attribute for keyword, attribute in TEMPLATE_ATTRIBUTES.items() if keyword in cls.__dict__}
+        if cls._shared & overriden:
+            cls._shared = cls._shared - overriden
+            
+        # an inventory or experience levels given as a class attribute would hide the property, it becomes the
+        # default of the instances instead
+        for name in ("inventory", "experience"):
+            value = cls.__dict__.get(name)
+            if value is not None and not isinstance(value, property):
+                cls._defaults = {**cls._defaults, name: value}
+                delattr(cls, name)
+    
     def __init__(self, **kwargs):
-        self.base_max_health = _getattr(self, "max_health", kwargs, 0)
-        self._health = _getattr(self, "health", kwargs, self.base_max_health)
+        defaults = self._defaults
+        self._init_attribute("base_max_health", "max_health", kwargs, 0)
+        self._health = _getattr(self, "health", kwargs, defaults.get("health", self.base_max_health))
 
-        self.base_attack = _getattr(self, "attack", kwargs, 0)
-        self.base_defense = _getattr(self, "defense", kwargs, 0)
+        self._init_attribute("base_attack", "attack", kwargs, 0)
+        self._init_attribute("base_defense", "defense", kwargs, 0)
 
-        self.base_max_energy = _getattr(self, "max_energy", kwargs, 0)
-        self._energy = _getattr(self, "energy", kwargs, self.base_max_energy)
+        self._init_attribute("base_max_energy", "max_energy", kwargs, 0)
+        self._energy = _getattr(self, "energy", kwargs, defaults.get("energy", self.base_max_energy))
 
-        self.inventory = _getattr(self, "inventory", kwargs, Inventory())
-        
-        self.experience = _getattr(self, "experience", kwargs, ExperienceLevels(requirements=[math.inf], max_level=1))
-        self.experience.set_entity(self)
-        
-        self.money = _getattr(self, "money", kwargs, 0)
-        
-        self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
-        self.description = _getattr(self, "description", kwargs, self.__init__.__doc__)
+        #the default inventory and experience levels are created the first time they are used
+        self._inventory = None
+        self._experience = None
+        experience = kwargs.get("experience", defaults.get("experience"))
+        if experience is not None:
+            self.experience = experience
+        
+        # money set on the class is shared by the instances until it changes
+        if "money" in kwargs or not hasattr(self, "money"):
+            self.money = _getattr(self, "money", kwargs, defaults.get("money", 0))
+        
+        self._init_attribute("name", "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
+        self._init_attribute("description", "description", kwargs, self.__init__.__doc__)
 
         self.modifiers = {}
-        self.abilities = {}
+        #created with the first modifier that needs them
+        self._stat_modifiers = _EMPTY
+        self.turn = 0
+        self._expiries = None
+        self._ticking = None
+        if "abilities" not in self._shared:
+            self.abilities = {}
         self.interacted = False
+        self.version = 0
+        
+        #created with the first stat that is cached
+        self._stats = _EMPTY
+        inventory = kwargs.get("inventory", defaults.get("inventory"))
+        if inventory is not None:
+            self.inventory = inventory
         
         for ability in kwargs.get("abilities", []):
             self.add_ability(ability)
         
+    def _init_attribute(self, attribute, keyword, kwargs, default):
+        # the attributes of a template are shared by all its instances, they're only set on the instance
+        # when they are given as parameters
+        if attribute not in self._shared:
+            setattr(self, attribute, _getattr(self, keyword, kwargs, default))
+        elif keyword in kwargs:
+            setattr(self, attribute, kwargs[keyword])
+            
     def __repr__(self):
         return f'<{self.name} health={self.health}/{self.max_health} energy={self.energy}/{self.max_energy}>'
         
@@ -114,46 +202,131 @@ class Entity:
         
     def _getattr(self, parameter, kwargs, default=None):
         return getattr(self, parameter, kwargs.get(parameter, default))
+        
+    @property
+    def inventory(self) -> Inventory:
+        """The entity's inventory, an empty one is created the first time it is used if the entity wasn't
+        given any."""
+        inventory = self._inventory
+        if inventory is None:
+            inventory = self.inventory = Inventory()
+            
+        return inventory
+        
+    @inventory.setter
+    def inventory(self, value):
+        self._inventory = value
+        value.set_entity(self)
+        # the cached stats include the buffs of the previous inventory
+        self.invalidate_stats()
+        
+    @property
+    def experience(self) -> ExperienceLevels:
+        """The entity's experience and levels, the default levels that can't be gained are created the first time
+        they are used if the entity wasn't given any."""
+        experience = self._experience
+        if experience is None:
+            experience = self.experience = ExperienceLevels(requirements=NO_LEVELS, max_level=1)
+            
+        return experience
+        
+    @experience.setter
+    def experience(self, value):
+        self._experience = value
+        value.set_entity(self)
+        
+    def _equipped(self):
+        # the weapon and armor of the entity without creating its inventory
+        inventory = self._inventory
+        if inventory is None:
+            return NullWeapon, NullArmor
+            
+        return inventory.weapon, inventory.armor
 
     #==================================
     #============ Stats ===============
     #==================================
     
     def _big_calc(self, stat):
-        """Calculate all the modifiers for a stat"""
+        """Calculate all the modifiers for a stat. The total is cached in `_stats` until the modifiers or the
+        equipment change, unless one of the modifiers of that stat or one of the pieces of equipment is `dynamic`."""
         total = 0
+        dynamic = False
         #modifiers
-        for modifier in self.modifiers.values():
-            if modifier.stat_type == stat:
-                total += modifier.calc(self)
+        for modifier in self._stat_modifiers.get(stat, {}).values():
+            total += modifier.calc(self)
+            dynamic = dynamic or modifier.dynamic
                 
-        #weapons
-        for modifier in [*self.inventory.weapon.calc(self), *self.inventory.armor.calc(self)]:
-            if modifier[0] == stat:
-                total += modifier[1]
+        #weapons, an entity without an inventory has the default equipment which doesn't buff anything
+        inventory = self._inventory
+        if inventory is not None and inventory.entity is not self:
+            # the inventory is shared and its buffs are those of the last entity it was given to, they're
+            # calculated again and not cached since equipping only invalidates that entity
+            dynamic = True
+            for equipment in (inventory.weapon, inventory.armor):
+                for modifier in equipment.calc(self):
+                    if modifier[0] == stat:
+                        total += modifier[1]
+        elif inventory is not None:
+            total += inventory.buffs.get(stat, 0)
+            for equipment in inventory.dynamic_equipment:
+                # the stats a dynamic equipment buffs can change too so it is never cached
+                dynamic = True
+                for modifier in equipment.calc(self):
+                    if modifier[0] == stat:
+                        total += modifier[1]
+        
+        if not dynamic:
+            if self._stats is _EMPTY:
+                self._stats = {}
+            self._stats[stat] = total
         
         #total
         return total
+        
+    def invalidate_stats(self):
+        """Throw away the cached stats of the entity, you only need to call this if you edited the `modifiers`,
+        `inventory.weapon` or `inventory.armor` directly (in which case call `inventory.refresh_buffs` instead)
+        or if a buff depends on something other than the entity's modifiers and equipment without being marked
+        as `dynamic`."""
+        if self._stats:
+            self._stats.clear()
 
     @property
     def attack(self):
         """This method compiles all the buffs, equipment, attributes to generate the attack stat of a unit."""
-        return max(0, self.base_attack + self._big_calc(StatEnum.attack))
+        bonus = self._stats.get(StatEnum.attack)
+        if bonus is None:
+            bonus = self._big_calc(StatEnum.attack)
+            
+        return max(0, self.base_attack + bonus)
         
     @property
     def defense(self):
         """This method compiles all the buffs, equipment, attributes to generate the defense stat of a unit."""
-        return max(0, self.base_defense + self._big_calc(StatEnum.defense))
+        bonus = self._stats.get(StatEnum.defense)
+        if bonus is None:
+            bonus = self._big_calc(StatEnum.defense)
+            
+        return max(0, self.base_defense + bonus)
 
     @property
     def max_health(self):
         """This method compiles all the buffs, equipment, attributes to generate the max health stat of a unit."""
-        return max(0, self.base_max_health + self._big_calc(StatEnum.max_health))
+        bonus = self._stats.get(StatEnum.max_health)
+        if bonus is None:
+            bonus = self._big_calc(StatEnum.max_health)
+            
+        return max(0, self.base_max_health + bonus)
 
     @property
     def max_energy(self):
         """This method compiles all the buffs, equipment, attributes to generate the max health stat of a unit."""
-        return max(0, self.base_max_energy + self._big_calc(StatEnum.max_energy))
+        bonus = self._stats.get(StatEnum.max_energy)
+        if bonus is None:
+            bonus = self._big_calc(StatEnum.max_energy)
+            
+        return max(0, self.base_max_energy + bonus)
 
     @property
     def health(self):
@@ -169,16 +342,14 @@ class Entity:
         current = self._health
         if value <= 0:
             self._health = 0
-            QM.progress_quests("on_death", self)
+            get_quest_manager().progress_quests("on_death", self)
         elif value > self.max_health:
             self._health = self.max_health
         else:
             self._health = int(value)
             
-        if current < value:
-            post_output(f"{self.name} gains {value - current} health")
-        else:
-            post_output(f"{self.name} loses {current - value} health")
+        if not utils.HEADLESS:
+            post_output(HealthChanged, self, current, value)
 
     @property
     def energy(self):
@@ -199,10 +370,8 @@ class Entity:
         else:
             self._energy = int(value)
             
-        if current < value:
-            post_output(f"{self.name} gains {value - current} energy")
-        else:
-            post_output(f"{self.name} loses {current - value} energy")
+        if not utils.HEADLESS:
+            post_output(EnergyChanged, self, current, value)
             
     #==================================
     #============ Checks ==============
@@ -269,10 +438,11 @@ class Entity:
         target : Entity
             The target to attack
         """
-        post_output(f"{self.name} attacks {target.name} with their {self.inventory.weapon.name}")
+        if not utils.HEADLESS:
+            post_output(Attacked, self, target, self._equipped()[0])
         target.take_damage(self.attack)
-        self.inventory.weapon.effect(target)
-        target.inventory.armor.effect(self)
+        self._equipped()[0].effect(target)
+        target._equipped()[1].effect(self)
         
     def take_damage(self, value):
         """Deal damage to this entity, the entity's defense is substracted from this damage, but this
@@ -341,12 +511,56 @@ class Entity:
         return ability.cast(self, target)
         
     def end_turn(self):
-        """End this entity's turn, decrementing all the modifier's durations and removing the expired ones."""
-        for name in list(self.modifiers.keys()):
-            modifier = self.modifiers[name]
-            modifier.end_turn(self)
-            if modifier.is_expired():
-                del self.modifiers[name]
+        """End this entity's turn, the modifiers with an effect take effect and the expired modifiers are removed.
+        The durations of the modifiers are counted in turns of the entity, modifiers without an effect are
+        only visited on the turn they expire.
+        
+        If you override this, call `super().end_turn()`, the turns of the entity only advance through it.
+        Overrides that instead loop over `modifiers` calling `Modifier.end_turn` and removing the expired ones
+        themselves, as was done before the turns were counted, still work: the modifiers count their duration
+        down themselves when called that way."""
+        if self._ticking:
+            with _clocked_turn():
+                for key, modifier in list(self._ticking.items()):
+                    if self.modifiers.get(key) is modifier:
+                        modifier.end_turn(self)
+                
+        self._advance_turn()
+        
+    def _advance_turn(self):
+        # second half of end_turn once the modifiers took effect, the battle runs the effects of all the
+        # entities at once and then calls this for each of them
+        self.turn += 1
+        changed = False
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= self.turn:
+            expires, _, modifier = heapq.heappop(expiries)
+            key = hash(modifier)
+            # the modifier might have been removed or its duration changed since it was scheduled
+            if self.modifiers.get(key) is modifier and modifier.expires == expires:
+                self._discard_modifier(key)
+                changed = True
+                
+        if self._ticking:
+            for key, modifier in list(self._ticking.items()):
+                if modifier._expires_itself and modifier.is_expired():
+                    self._discard_modifier(key)
+                    changed = True
+                
+        if changed:
+            self.invalidate_stats()
+            
+    def _schedule(self, modifier):
+        modifier._entity = self
+        if modifier._duration < 0:
+            modifier.expires = None
+            return
+            
+        modifier.expires = self.turn + modifier._duration
+        if modifier.expires != math.inf:
+            if self._expiries is None:
+                self._expiries = []
+            heapq.heappush(self._expiries, (modifier.expires, next(_SEQUENCE), modifier))
         
     def add_modifier(self, modifier):
         """Add a modifier to the entity, if the modifier already exists it will refresh the duration.
@@ -356,12 +570,23 @@ class Entity:
         modifier : Modifier
             The modifier to add
         """
-        if hash(modifier) in self.modifiers:
-            self.modifiers[hash(modifier)] = modifier if modifier.duration > self.modifiers[hash(modifier)] else self.modifiers[hash(modifier)]
-        else:
-            self.modifiers[hash(modifier)] = modifier
+        key = hash(modifier)
+        current = self.modifiers.get(key)
+        if current is None or modifier.duration > current.duration:
+            self._discard_modifier(key)
+            self.modifiers[key] = modifier
+            if self._stat_modifiers is _EMPTY:
+                self._stat_modifiers = {}
+            self._stat_modifiers.setdefault(modifier.stat_type, {})[key] = modifier
+            self._schedule(modifier)
+            if modifier._ticks():
+                if self._ticking is None:
+                    self._ticking = {}
+                self._ticking[key] = modifier
             
-    def remove_modifier(self, modifer):
+        self.invalidate_stats()
+            
+    def remove_modifier(self, modifier):
         """Remove a modifier from the entity. The argument doesn't need to be the exact same instance, it just
         needs to hash to the same as your intended target.
         
@@ -370,8 +595,32 @@ class Entity:
         modifier : Modifier
             The modifier to remove
         """
+        if hash(modifier) not in self.modifiers:
+            raise KeyError(hash(modifier))
+            
+        self._discard_modifier(hash(modifier))
+        self.invalidate_stats()
         
-        del self.modifiers[hash(modifier)]
+    def _discard_modifier(self, key):
+        modifier = self.modifiers.pop(key, None)
+        if modifier is None:
+            return
+            
+        # the modifier keeps the duration it had left
+        modifier._duration = modifier.duration
+        modifier._entity = None
+        modifier.expires = None
+        self._detach_modifier(key, modifier)
+        
+    def _detach_modifier(self, key, modifier):
+        # stop the modifier from counting in the stats and taking effect, without removing it from `modifiers`
+        if self._ticking:
+            self._ticking.pop(key, None)
+        bucket = self._stat_modifiers.get(modifier.stat_type)
+        if bucket is not None and bucket.get(key) is modifier:
+            del bucket[key]
+            if not bucket:
+                del self._stat_modifiers[modifier.stat_type]
     
     def add_ability(self, ability):
         """Add an ability to the entity, making it available for casting
@@ -381,8 +630,15 @@ class Entity:
         ability : Ability
             The ability to add
         """
+        self._own_abilities()
         self.abilities[hash(ability)] = ability
+        self.version += 1
         
+    def _own_abilities(self):
+        # the abilities of a template are shared until an instance changes its own
+        if "abilities" in self._shared and "abilities" not in self.__dict__:
+            self.abilities = dict(self.abilities)
+            
     def remove_ability(self, ability):
         """Remove an ability from the list of available abilities for this entity. The argument does not need
         to be the exact same instance, it just needs to hash to the same as your intended target..
@@ -392,7 +648,9 @@ class Entity:
         ability : Ability
             The ability to remove
         """
+        self._own_abilities()
         del self.abilities[hash(ability)]
+        self.version += 1
         
     def gain_experience(self, value):
         """Increase the experience of the entity by a certain amount, this amount is affect by the entity
@@ -529,6 +787,8 @@ class Player(Entity):
         The world the player is interacting with, this is not set until the method set_world is called,
         which normally the World you pass the player to will take care.
     """
+    __slots__ = ("world",)
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.world = None
@@ -544,17 +804,18 @@ class Player(Entity):
         current = self._health
         if value <= 0:
             self._health = 0
-            QM.progress_quests("on_death", self)
+            quests = get_quest_manager()
+            quests.progress_quests("on_death", self)
+            # the turn won't end, the buffered events have to be handled now
+            quests.flush_events()
             raise EndGame("Look like you've died, better luck next time.", victory=False, reason=EndgameReason.zero_health)
         elif value > self.max_health:
             self._health = self.max_health
         else:
             self._health = value
             
-        if current < value:
-            post_output(f"{self.name} gains {value - current} health")
-        else:
-            post_output(f"{self.name} loses {current - value} health")        
+        if not utils.HEADLESS:
+            post_output(HealthChanged, self, current, value)
         
     def set_world(self, world):
         """You must call this if you made changes to the World class' init so that the player has access to
@@ -571,7 +832,7 @@ class Player(Entity):
         """Print the inventory, abilities and quests of the player."""
         self.inventory.print()
         self.print_abilities()
-        post_output(f"Quests: {QM.active_quests}")
+        post_output(f"Quests: {get_quest_manager().active_quests}")
         
     def battle_logic(self, battle):
         battle.player_turn()
@@ -645,15 +906,36 @@ class NPC(Entity):
     experience_points : int
         How much experience this entity grants when defeated in battle
     """
+    __slots__ = ("experience_points",)
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         
-        self.experience_points = kwargs.get("experience", 0)
+        if "experience_points" not in self._shared or "experience" in kwargs:
+            self.experience_points = kwargs.get("experience", 0)
     
     @classmethod
     def from_dict(cls, **kwargs):
-        """Create an enemy from a dictionnary, takes the same paramters as the class"""
-        new_class = type(kwargs.get("name"), (cls,), kwargs)
+        """Create an enemy from a dictionnary, takes the same paramters as the class and returns a subclass
+        of it by the same name. The class works as a template: the name, description, stats, abilities and
+        experience given here are stored once on the class and shared by all of its instances, which only hold
+        what changes during the game like their health, energy, money and modifiers. This makes spawning a
+        large number of the same enemy cheap. Instances can still be given different values as parameters,
+        and an instance that gains or loses an ability gets its own copy of the abilities."""
+        attributes = {"_shared": frozenset(), "_defaults": dict(cls._defaults)}
+        shared = set(cls._shared)
+        for key, value in kwargs.items():
+            if key in TEMPLATE_ATTRIBUTES:
+                attribute = TEMPLATE_ATTRIBUTES[key]
+                attributes[attribute] = {hash(ability): ability for ability in value} if key == "abilities" else value
+                shared.add(attribute)
+            elif key in TEMPLATE_DEFAULTS:
+                attributes["_defaults"][key] = value
+            else:
+                attributes[key] = value
+        
+        new_class = type(kwargs.get("name"), (cls,), attributes)
+        new_class._shared = frozenset(shared)
         return new_class
         
     def experience_granted(self, player):
@@ -686,7 +968,7 @@ class NPC(Entity):
         self.do_attack(battle.player)
         
     def interact(self, world):
-        QM.progress_quests("on_interact", self, world)
+        get_quest_manager().progress_quests("on_interact", self, world)
         self.interaction(world)
         self.interacted = True
         
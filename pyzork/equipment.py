@@ -1,6 +1,10 @@
+import sys
+
 from .enums import *
-from .base import QM
-from .utils import post_output, get, _getattr
+from .base import get_quest_manager
+from .utils import post_output, get, _getattr, _EMPTY
+from .events import ItemEquipped, ItemRemoved, ItemBought, ItemSold
+from .actions import NameIndex
 
 class Item:
     """An item is a physical object the entity can interact with and carry aroun with them everywhere they
@@ -22,6 +26,8 @@ class Item:
     description : str
         Description of the item
     """ 
+    __slots__ = ("name", "description", "__dict__", "__weakref__")
+    
     def __repr__(self):
         return f"<{self.name}>"
         
@@ -64,9 +70,13 @@ class Consumable(Item):
     charges : int
         The amount of times this item can be used
     """
+    __slots__ = ("charges",)
+    
     def __init__(self, **kwargs):          
         self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
-        self.charges = _getattr(self, "charges", kwargs)
+        # charges set on the class are shared by the instances until they're used
+        if "charges" in kwargs or not hasattr(self, "charges"):
+            self.charges = _getattr(self, "charges", kwargs)
         self.description = _getattr(self, "description", kwargs, self.effect.__doc__)            
         
     def use(self, target):
@@ -123,6 +133,8 @@ class QuestItem(Item):
     description : str
         Description of the item
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
         self.description = _getattr(self, "description", kwargs, self.__init__.__doc__)
@@ -144,6 +156,10 @@ class Equipment(Item):
         The name of the item, if it is not provided then defaults first to the class docs and then the class name
     description : Optional[str]
         The description of the item
+    dynamic : Optional[bool]
+        Stats are only calculated again when the modifiers or equipment of the entity change. If the
+        `buff` method depends on anything else, such as the current health of the entity, set this to 
+        True so the stats are calculated every time they are needed while this is equipped. False by default.
     
     Attributes
     -----------
@@ -151,10 +167,21 @@ class Equipment(Item):
         Name of the item
     description : str
         Description of the item
+    dynamic : bool
+        Whether the buffs have to be calculated every time a stat is needed
     """
+    __slots__ = ()
+    
+    dynamic = False
+    
     def __init__(self, **kwargs):
         self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
-        self.description = _getattr(self, "description", kwargs, f"{self.buff.__doc__} {self.effect.__doc__}")
+        self.description = _getattr(self, "description", kwargs, None)
+        if self.description is None:
+            self.description = sys.intern(f"{self.buff.__doc__} {self.effect.__doc__}")
+            
+        if "dynamic" in kwargs:
+            self.dynamic = kwargs.pop("dynamic")
     
     def calc(self, entity):
         return self.buff(entity)
@@ -197,10 +224,12 @@ class Equipment(Item):
             if not cls in [Weapon, Armor]:
                 cls.buff = func
                 cls.description = f"{func.__doc__} {cls.description}"
+                cls.dynamic = kwargs.pop("dynamic", cls.dynamic)
                 return func
             else:
                 new_class = type(func.__name__, (cls,), {
                     "buff": func,
+                    "dynamic": kwargs.pop("dynamic", False),
                     "name": kwargs.pop("name", func.__name__),
                     "description": kwargs.pop("description", func.__doc__),
                 })
@@ -210,10 +239,10 @@ class Equipment(Item):
         return decorator
         
 class Armor(Equipment):
-    pass
+    __slots__ = ()
 
 class Weapon(Equipment):
-    pass
+    __slots__ = ()
 
 NullWeapon = Weapon(name="bare hands")
 NullArmor = Armor(name="linen clothes")
@@ -244,6 +273,8 @@ class ShopItem:
     description
         The description of the item being sold
     """
+    __slots__ = ("item", "price", "charges", "fake_inst", "__dict__", "__weakref__")
+    
     def __init__(self, **kwargs):
         self.item = kwargs.pop("item")
         self.price = kwargs.pop("price")
@@ -280,7 +311,7 @@ class ShopItem:
         entity.remove_money(self.price)
         entity.inventory.add_item(self.item())
         
-        post_output(f"Bought {self.fake_inst.name} and payed {self.price}")
+        post_output(ItemBought, self.fake_inst, self.price)
         
     def sell(self, entity : "Entity", resell : float):
         """Sell an instance of that item
@@ -298,7 +329,8 @@ class ShopItem:
             
         if isinstance(to_remove, Consumable):
             entity.inventory.remove_item(to_remove)
-            amount = to_remove.amount // self.fake_inst.amount
+            # one sale for every full set of the charges the shop sells it with, the rest is lost
+            amount = to_remove.charges // self.fake_inst.charges
             self.charges += amount
             money = (self.price * resell) * amount
             entity.add_money(money)
@@ -308,7 +340,7 @@ class ShopItem:
             money = self.price * resell
             entity.add_money(money)
         
-        post_output(f"Sold {self.fake_inst.name} and gained {money}")
+        post_output(ItemSold, self.fake_inst, money)
 
 class Inventory:
     """Inventories store all items: Equipment, Consumables and QuestItem. 
@@ -321,8 +353,27 @@ class Inventory:
         The weapon this inventory comes equipped with by default
     armor : Armor
         The armor this inventory comes equipped with by default
+        
+    Attributes
+    -----------
+    version : int
+        Incremented every time an item is added, removed, used up or equipped
+    entity : Optional[Entity]
+        The entity this inventory belongs to
+    buffs : Mapping[StatEnum, int]
+        The total buff the weapon and armor give to each stat, refreshed by :method:refresh_buffs
+    dynamic_equipment : Sequence[Equipment]
+        The equipped weapon and armor which are `dynamic` and so are left out of `buffs`
     """
+    __slots__ = ("version", "entity", "buffs", "dynamic_equipment", "_indexes", "consumables", "quest", "equipment", "weapon", "armor", "__dict__", "__weakref__")
+    
     def __init__(self, **kwargs):
+        self.version = 0
+        self.entity = None
+        #shared empty ones until there is something to store
+        self.buffs = _EMPTY
+        self.dynamic_equipment = ()
+        self._indexes = _EMPTY
         self.consumables = {}
         self.quest = []
         self.equipment = set()
@@ -336,6 +387,60 @@ class Inventory:
     def __repr__(self):
         return f"<Inventory consumables={len(self.consumables)} quest={len(self.quest)} equipment={len(self.equipment)}>"
     
+    def set_entity(self, entity : "Entity"):
+        previous = self.entity
+        self.entity = entity
+        if previous is not None and previous is not entity:
+            # the entity it was taken from still has the buffs cached
+            previous.invalidate_stats()
+            
+        self.refresh_buffs()
+        
+    def refresh_buffs(self):
+        """Calculate the buffs of the equipped weapon and armor again, this is done every time something is
+        equipped so you only need to call this if you changed `weapon` or `armor` directly."""
+        self.buffs = _EMPTY
+        self.dynamic_equipment = ()
+        if self.entity is None:
+            return
+            
+        buffs = {}
+        dynamic_equipment = []
+        for equipment in (self.weapon, self.armor):
+            if equipment.dynamic:
+                dynamic_equipment.append(equipment)
+                continue
+                
+            for stat, value in equipment.calc(self.entity):
+                buffs[stat] = buffs.get(stat, 0) + value
+                
+        if buffs:
+            self.buffs = buffs
+        if dynamic_equipment:
+            self.dynamic_equipment = dynamic_equipment
+            
+        self.entity.invalidate_stats()
+        
+    def _index(self, kind, entries):
+        version, index = self._indexes.get(kind, (None, None))
+        if version != self.version:
+            index = NameIndex(entries)
+            if self._indexes is _EMPTY:
+                self._indexes = {}
+            self._indexes[kind] = (self.version, index)
+            
+        return index
+        
+    @property
+    def equipment_index(self) -> NameIndex:
+        """Index of the names of the equipment, rebuilt only when the inventory has changed"""
+        return self._index("equipment", self.equipment)
+        
+    @property
+    def consumable_index(self) -> NameIndex:
+        """Index of the names of the consumables, rebuilt only when the inventory has changed"""
+        return self._index("consumables", self.consumables.values())
+    
     def print(self):
         """Print all the item in the entity's inventory"""
         post_output(f"Consumables: {self.consumables}")
@@ -357,7 +462,7 @@ class Inventory:
         
         if isinstance(item, Consumable):
             if type(item) in self.consumables:
-                self.consumables[type(item)].amount += item.amount
+                self.consumables[type(item)].charges += item.charges
             else:
                 self.consumables[type(item)] = item
             # post_output(f"Consumable {item.name} added")    
@@ -366,7 +471,8 @@ class Inventory:
             self.quest.append(item)
             # post_output(f"Quest item {item.name} added")
         
-        QM.progress_quests("on_pickup", item)
+        self.version += 1
+        get_quest_manager().progress_quests("on_pickup", item)
     
     def use_item(self, item : Consumable, target):
         """Use a consumable on a target
@@ -381,6 +487,7 @@ class Inventory:
         used = item.use(target)
         if item.charges < 1:
             del self.consumables[type(item)]
+            self.version += 1
         
         if not used:
             post_output("You cannot use this item")
@@ -402,12 +509,15 @@ class Inventory:
             self.equipment.add(self.weapon)
             self.weapon = item
             self.equipment.remove(self.weapon)
-            post_output(f"Weapon {item.name} equipped")
+            post_output(ItemEquipped, item, "Weapon")
         else:
             self.equipment.add(self.armor)
             self.armor = item
             self.equipment.remove(self.armor)
-            post_output(f"Armor {item.name} equipped")
+            post_output(ItemEquipped, item, "Armor")
+            
+        self.version += 1
+        self.refresh_buffs()
             
     def remove_item(self, item : Item):
         """Remove an item from the inventory
@@ -419,14 +529,16 @@ class Inventory:
         """
         if isinstance(item, Equipment):
             self.equipment.remove(item)
-            post_output(f"Equipment {item.name} removed")
+            post_output(ItemRemoved, item, "Equipment")
         elif isinstance(item, Consumable):
             del self.consumables[type(item)]
-            post_output(f"Consumable {item.name} removed")
+            post_output(ItemRemoved, item, "Consumable")
         elif isinstance(item, QuestItem):
-            post_output(f"Quest Item {item.name} removed")
+            post_output(ItemRemoved, item, "Quest Item")
             self.quest.remove(item)
             
+        self.version += 1
+            
     def print_consumables(self):
         """Print all the consumables"""
         for consumable in self.consumables:
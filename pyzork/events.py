@@ -0,0 +1,219 @@
+class Event:
+    """Base class for the events the library posts through `post_output` instead of text. An event only
+    holds the objects and numbers involved, it is turned into text by `render` when the output function
+    needs it. By default the output function gets the rendered text, use `update_output(func, events=True)`
+    to get the events themselves, and `update_output(None)` to discard the output without rendering it. The
+    library posts the class with its arguments, `post_output(HealthChanged, entity, old, new)`, so that the
+    event isn't even created when the output is discarded.
+
+    .. code-block:: python
+
+        def output(event):
+            if isinstance(event, pyzork.events.HealthChanged):
+                health_bar.update(event.entity)
+            else:
+                print(event)
+
+        pyzork.utils.update_output(output, events=True)
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.render()!r}>"
+
+    def render(self) -> str:
+        """Turn the event into the text shown to the player.
+
+        Returns
+        --------
+        str
+            The text of the event
+        """
+        raise NotImplementedError
+
+class _StatChanged(Event):
+    __slots__ = ("entity", "old", "new")
+    label = None
+
+    def __init__(self, entity, old, new):
+        self.entity = entity
+        self.old = old
+        self.new = new
+
+    def render(self):
+        if self.old < self.new:
+            return f"{self.entity.name} gains {self.new - self.old} {self.label}"
+
+        return f"{self.entity.name} loses {self.old - self.new} {self.label}"
+
+class HealthChanged(_StatChanged):
+    """The health of an entity changed.
+
+    Attributes
+    -----------
+    entity : Entity
+        The entity whose health changed
+    old : int
+        The health before the change
+    new : int
+        The health that was set, before it was limited to the range of health of the entity
+    """
+    __slots__ = ()
+    label = "health"
+
+class EnergyChanged(_StatChanged):
+    """The energy of an entity changed.
+
+    Attributes
+    -----------
+    entity : Entity
+        The entity whose energy changed
+    old : int
+        The energy before the change
+    new : int
+        The energy that was set, before it was limited to the range of energy of the entity
+    """
+    __slots__ = ()
+    label = "energy"
+
+class Attacked(Event):
+    """An entity attacked another.
+
+    Attributes
+    -----------
+    attacker : Entity
+        The entity attacking
+    target : Entity
+        The entity attacked
+    weapon : Weapon
+        The weapon of the attacker
+    """
+    __slots__ = ("attacker", "target", "weapon")
+
+    def __init__(self, attacker, target, weapon):
+        self.attacker = attacker
+        self.target = target
+        self.weapon = weapon
+
+    def render(self):
+        return f"{self.attacker.name} attacks {self.target.name} with their {self.weapon.name}"
+
+class AbilityCast(Event):
+    """An entity cast an ability.
+
+    Attributes
+    -----------
+    user : Entity
+        The entity casting the ability
+    ability : Ability
+        The ability cast
+    target : Entity
+        The target of the ability
+    """
+    __slots__ = ("user", "ability", "target")
+
+    def __init__(self, user, ability, target):
+        self.user = user
+        self.ability = ability
+        self.target = target
+
+    def render(self):
+        return f"{self.user.name} casts {self.ability.name} on {self.target.name}"
+
+class ItemEquipped(Event):
+    """A weapon or an armor was equipped.
+
+    Attributes
+    -----------
+    item : Equipment
+        The item equipped
+    kind : str
+        Either "Weapon" or "Armor"
+    """
+    __slots__ = ("item", "kind")
+
+    def __init__(self, item, kind):
+        self.item = item
+        self.kind = kind
+
+    def render(self):
+        return f"{self.kind} {self.item.name} equipped"
+
+class ItemRemoved(Event):
+    """An item was removed from an inventory.
+
+    Attributes
+    -----------
+    item : Item
+        The item removed
+    kind : str
+        Either "Equipment", "Consumable" or "Quest Item"
+    """
+    __slots__ = ("item", "kind")
+
+    def __init__(self, item, kind):
+        self.item = item
+        self.kind = kind
+
+    def render(self):
+        return f"{self.kind} {self.item.name} removed"
+
+class ItemBought(Event):
+    """An item was bought in a shop.
+
+    Attributes
+    -----------
+    item : Item
+        The item bought
+    price : int
+        How much was paid for it
+    """
+    __slots__ = ("item", "price")
+
+    def __init__(self, item, price):
+        self.item = item
+        self.price = price
+
+    def render(self):
+        return f"Bought {self.item.name} and payed {self.price}"
+
+class ItemSold(Event):
+    """An item was sold to a shop.
+
+    Attributes
+    -----------
+    item : Item
+        The item sold
+    money : int
+        How much was gained for it
+    """
+    __slots__ = ("item", "money")
+
+    def __init__(self, item, money):
+        self.item = item
+        self.money = money
+
+    def render(self):
+        return f"Sold {self.item.name} and gained {self.money}"
+
+class LevelUp(Event):
+    """An entity went up a level.
+
+    Attributes
+    -----------
+    levels : ExperienceLevels
+        The experience levels of the entity
+    level : int
+        The new level
+    """
+    __slots__ = ("levels", "level")
+
+    def __init__(self, levels, level):
+        self.levels = levels
+        self.level = level
+
+    def render(self):
+        return f"You leveled up! You are now level {self.level}"
@@ -1,5 +1,6 @@
 from .utils import post_output
-from .base import QM
+from .events import LevelUp
+from .base import get_quest_manager
 from .enums import StatEnum
 
 import math
@@ -62,6 +63,8 @@ class ExperienceLevels:
         current amount of experience the entity has.
     
     """
+    __slots__ = ("requirements", "max_level", "level", "_experience", "entity", "base_experience_gain", "rewards", "__dict__", "__weakref__")
+    
     def __init__(self, **kwargs):
         if "requirements" in kwargs:
             self.requirements = kwargs.pop("requirements")
@@ -78,8 +81,10 @@ class ExperienceLevels:
         self.entity = None
         self.base_experience_gain = kwargs.get("experience_gain", 1)
         
-        self.standard_reward = kwargs.pop("reward", self.standard_reward)    
-        self.rewards = kwargs.pop("rewards", [self.standard_reward for x in range(self.max_level)])
+        if "reward" in kwargs:
+            self.standard_reward = kwargs.pop("reward")
+            
+        self.rewards = kwargs.pop("rewards", [self.standard_reward] * self.max_level)
         
         for kwarg in kwargs:
             if kwarg.startswith(("l", "r")):
@@ -136,7 +141,7 @@ class ExperienceLevels:
         while value >= self.requirement:
             value -= self.requirement
             self.level_up()
-            QM.progress_quests("on_level", self)
+            get_quest_manager().progress_quests("on_level", self)
             
         self._experience = value
         
@@ -145,7 +150,7 @@ class ExperienceLevels:
         self.rewards[self.level - 1](self)
         
     def standard_reward(self, levels):
-        post_output(f"You leveled up! You are now level {self.level}")
+        post_output(LevelUp, self, self.level)
         
     def __add__(self, value):
         self.experience += value
@@ -1,5 +1,8 @@
+import sys
+
 from .enums import StatEnum
 from .entities import Entity
+from . import entities
 
 class Modifier:
     """Modifiers define changes to the stats of the entity they are attached to. They can do stuff like 
@@ -25,6 +28,10 @@ class Modifier:
         An optional string to give a short (or long) description about the buff and its effects. If
         this is not provided the library will fall back to combining the docstring of the `buff`
         and `effect` method.
+    dynamic : Optional[bool]
+        Stats are only calculated again when the modifiers or equipment of the entity change. If the 
+        `buff` method depends on anything else, such as the current health of the entity, set this to 
+        True so the stat is calculated every time it is needed. False by default.
         
     Attributes
     -----------
@@ -33,17 +40,39 @@ class Modifier:
     description : Optional[str]
         Optional description of the ability
     duration : int
-        How long the ability lasts
+        How many turns are left until the modifier expires, once the modifier is added to an entity this
+        follows the turns of the entity
+    expires : Optional[int]
+        The turn of the entity this modifier expires at, None if it is permanent or not added to an entity
     stat_type : Optional[StatEnum]
         Optional enum that dictates which stat is affected 
+    dynamic : bool
+        Whether the buff has to be calculated every time the stat is needed
        
     """
+    __slots__ = ("stat_type", "_duration", "expires", "_entity", "name", "description", "__dict__", "__weakref__")
+    
+    dynamic = False
+    default_duration = None
+    _expires_itself = False
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # modifiers with their own is_expired are checked every turn, the others expire on schedule
+        cls._expires_itself = cls.is_expired is not Modifier.is_expired
+        # a duration set on the class, like the ones made by add_buff, is the duration of every instance
+        if "duration" in cls.__dict__ and not isinstance(cls.__dict__["duration"], property):
+            cls.default_duration = cls.__dict__["duration"]
+            del cls.duration
+    
     def __init__(self, **kwargs):
+        self._entity = None
+        self.expires = None
         if not hasattr(self, "stat_type"):
             self.stat_type = kwargs.pop("stat_type", StatEnum.null)
         
-        if not hasattr(self, "duration"):
-            self.duration = kwargs.pop("duration")
+        if not hasattr(self, "_duration"):
+            self.duration = self.default_duration if self.default_duration is not None else kwargs.pop("duration")
 
         if not hasattr(self, "name"):
             if "name" in kwargs:
@@ -52,7 +81,10 @@ class Modifier:
                 self.name = self.__doc__ if self.__doc__ else self.__class__.__name__
         
         if not hasattr(self, "description"):
-            self.description = kwargs.pop("description", f"{self.buff.__doc__} {self.effect.__doc__}")
+            self.description = kwargs.pop("description") if "description" in kwargs else sys.intern(f"{self.buff.__doc__} {self.effect.__doc__}")
+            
+        if "dynamic" in kwargs:
+            self.dynamic = kwargs.pop("dynamic")
         
     def __hash__(self):
         return hash(self.__class__.__name__)
@@ -69,6 +101,27 @@ class Modifier:
     def __str__(self):
         return self.name
     
+    @property
+    def duration(self):
+        entity = getattr(self, "_entity", None)
+        if entity is None or self.expires is None:
+            return self._duration
+            
+        return max(0, self.expires - entity.turn)
+        
+    @duration.setter
+    def duration(self, value):
+        self._duration = value
+        entity = getattr(self, "_entity", None)
+        if entity is not None:
+            entity._schedule(self)
+            
+    def _ticks(self):
+        # whether the entity has to visit this modifier every turn, the others are only visited on the turn
+        # they expire
+        cls = type(self)
+        return any(getattr(cls, name) is not getattr(Modifier, name) for name in ("effect", "end_turn", "is_expired"))
+    
     def is_expired(self):
         """Simple method to check if is a buff is expired.
         
@@ -112,13 +165,28 @@ class Modifier:
         pass
 
     def end_turn(self, entity : Entity):
-        """Method called at the end of the turn for each buff to show time passed and left until the buff expires. 
-        Permanent buffs are set to -1"""
+        """Method called at the end of the turn of the entity for the modifiers that have an `effect`, the
+        duration itself goes down with the turns of the entity. Permanent buffs are set to -1. When this is
+        called by an entity's own end_turn which doesn't go through `Entity.end_turn`, the duration goes
+        down by one here instead."""
         if not self.is_expired():
             self.effect(entity)
-
-        if self.duration > 0:
-            self.duration -= 1
+            
+        if not entities._CLOCKED and self.duration > 0:
+            self._count_down(entity)
+            
+    def _count_down(self, entity):
+        # the expiry moves a turn closer without being scheduled again, the clock of the entity doesn't move
+        # so the heap would only grow
+        if self.expires is not None and getattr(self, "_entity", None) is entity:
+            self.expires -= 1
+        else:
+            self._duration -= 1
+            
+        # the end_turn calling this removes the expired modifiers from `modifiers` itself
+        if self.is_expired():
+            entity._detach_modifier(hash(self), self)
+            entity.invalidate_stats()
         
     @classmethod
     def add_effect(cls, **kwargs):
@@ -150,12 +218,14 @@ class Modifier:
             if not cls is Modifier:
                 cls.buff = func
                 cls.stat_type = kwargs.pop("stat_type")
+                cls.dynamic = kwargs.pop("dynamic", cls.dynamic)
                 cls.description = f"{func.__doc__} {cls.description}"
                 return func
             else:
                 new_class = type(func.__name__, (cls,), {
                     "duration": kwargs.pop("duration"), 
                     "stat_type": kwargs.pop("stat_type"), 
+                    "dynamic": kwargs.pop("dynamic", False),
                     "buff": func,
                     "name": kwargs.pop("name", func.__name__),
                     "description": kwargs.pop("description", func.__doc__)
@@ -0,0 +1,415 @@
+from .entities import Entity, NPC
+from .actions import _numpy
+from .utils import post_output
+from . import utils
+from .events import HealthChanged, EnergyChanged
+from .base import get_quest_manager
+
+from array import array
+
+COLUMNS = {
+    "base_max_health": "q",
+    "base_attack": "q",
+    "base_defense": "q",
+    "base_max_energy": "q",
+    "_health": "q",
+    "_energy": "q",
+    "money": "d",
+}
+
+def _as_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+class _Column:
+    # whole number columns, until the entity has a row (while it is being initialized) the value is
+    # kept on the entity like any other attribute
+    def __init__(self, name):
+        self.name = name
+
+    def _pending(self, instance):
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            # such as the money of a class made with from_dict
+            return getattr(super(EntityRow, instance), self.name)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            row = instance._row
+        except AttributeError:
+            return self._pending(instance)
+
+        return int(instance._table.columns[self.name][row])
+
+    def __set__(self, instance, value):
+        try:
+            row = instance._row
+        except AttributeError:
+            instance.__dict__[self.name] = value
+        else:
+            instance._table.columns[self.name][row] = value
+
+class _MoneyColumn(_Column):
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            row = instance._row
+        except AttributeError:
+            return self._pending(instance)
+
+        return _as_number(instance._table.columns[self.name][row])
+
+class EntityRow:
+    """Mixin for the entities stored in an EntityTable, their stats, health, energy and money are read from
+    and written to the columns of the table instead of the entity itself. You don't need to use this
+    directly, :method:EntityTable.spawn creates the classes for you."""
+    __slots__ = ()
+    _table = None
+
+    def invalidate_stats(self):
+        super().invalidate_stats()
+        if "_row" in self.__dict__:
+            self._table._track(self)
+
+for _name, _typecode in COLUMNS.items():
+    setattr(EntityRow, _name, _Column(_name) if _typecode == "q" else _MoneyColumn(_name))
+
+class EntityTable:
+    """A struct-of-arrays store for the stats, health, energy and money of a large number of entities, for
+    encounters and simulations with thousands of npcs. The entities are spawned by the table and behave
+    exactly like normal entities but their numbers live in one array per stat, using numpy if it is
+    installed and the `array` module if not. This allows updating all of them at once.
+
+    .. code-block:: python
+
+        horde = EntityTable()
+        goblins = [horde.spawn(Goblin) for _ in range(5000)]
+
+        killed = horde.damage_all(10)
+        battle = Battle(player=player, enemies=horde.alive())
+
+    The bulk operations write to the columns directly, overriden `health` and `energy` setters are not called
+    but the output and the "on_death" quest events are the same as calling `take_damage`, `restore_health`
+    and `gain_energy` on every entity. Stats are whole numbers, except for money.
+
+    Parameters
+    -----------
+    capacity : Optional[int]
+        How many entities to make room for, the table grows as needed. 64 by default.
+    backend : Optional[str]
+        Either "numpy" or "array", numpy by default if it is installed.
+
+    Attributes
+    -----------
+    entities : List[Entity]
+        The entities in the table, in the order of the rows
+    columns : Dict[str, Union[numpy.ndarray, array.array]]
+        The arrays holding the values, these have spare room at the end, use :method:column to only get
+        the rows in use
+    backend : str
+        Either "numpy" or "array"
+    """
+    def __init__(self, **kwargs):
+        capacity = max(1, kwargs.get("capacity", 64))
+        backend = kwargs.get("backend", "numpy" if _numpy() is not None else "array")
+        if backend == "numpy" and _numpy() is None:
+            raise ImportError("Make sure that numpy is installed to use the numpy backend")
+
+        if backend not in ("numpy", "array"):
+            raise ValueError(f"Unknown backend {backend!r}")
+
+        self.backend = backend
+        self._np = _numpy() if backend == "numpy" else None
+        self.entities = []
+        self.columns = {name: self._new_column(typecode, capacity) for name, typecode in COLUMNS.items()}
+        self._capacity = capacity
+        self._views = {}
+        self._boosted = set()
+
+    def __repr__(self):
+        return f"<EntityTable entities={len(self)} backend={self.backend}>"
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __contains__(self, entity):
+        return isinstance(entity, EntityRow) and entity._table is self
+
+    def _new_column(self, typecode, size):
+        if self._np is not None:
+            return self._np.zeros(size, dtype="int64" if typecode == "q" else "float64")
+
+        return array(typecode, bytes(size * array(typecode).itemsize))
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, typecode in COLUMNS.items():
+            column = self.columns[name]
+            if self._np is not None:
+                grown = self._new_column(typecode, capacity)
+                grown[:self._capacity] = column
+                self.columns[name] = grown
+            else:
+                column.extend(self._new_column(typecode, capacity - self._capacity))
+
+        self._capacity = capacity
+
+    def _track(self, entity):
+        # an inventory that isn't created yet is empty, one shared with another entity isn't cached
+        inventory = entity._inventory
+        if entity._stat_modifiers or (inventory is not None and (inventory.entity is not entity or inventory.buffs or inventory.dynamic_equipment)):
+            self._boosted.add(entity._row)
+        else:
+            self._boosted.discard(entity._row)
+
+    def view_class(self, cls : type) -> type:
+        """Get the class used for the entities of class `cls` stored in this table, this is a subclass of
+        `cls` that stores its numbers in the table.
+
+        Parameters
+        -----------
+        cls : type
+            A subclass of Entity
+
+        Returns
+        --------
+        type
+            The class of the entities spawned in the table
+        """
+        view = self._views.get(cls)
+        if view is None:
+            if not issubclass(cls, Entity):
+                raise TypeError("Only entities can be stored in an EntityTable")
+
+            view = self._views[cls] = type(cls.__name__, (EntityRow, cls), {
+                "_table": self,
+                "__doc__": cls.__doc__,
+                "__module__": cls.__module__
+            })
+
+        return view
+
+    def spawn(self, cls : type = NPC, **kwargs) -> Entity:
+        """Create an entity stored in this table, this takes the same parameters as the class.
+
+        Parameters
+        -----------
+        cls : Optional[type]
+            The class of the entity, NPC by default
+
+        Returns
+        --------
+        Entity
+            The new entity, an instance of `cls`
+        """
+        view = self.view_class(cls)
+        if len(self.entities) == self._capacity:
+            self._grow()
+
+        entity = view.__new__(view)
+        entity.__init__(**kwargs)
+
+        row = len(self.entities)
+        for name in COLUMNS:
+            # the stats of a template are on the class
+            self.columns[name][row] = getattr(entity, name)
+            entity.__dict__.pop(name, None)
+
+        entity._row = row
+        self.entities.append(entity)
+        self._track(entity)
+        return entity
+
+    def remove(self, entity : Entity):
+        """Remove an entity from the table, the entity keeps working as an instance of its original class
+        with its numbers stored on itself. The last entity of the table takes its row.
+
+        Parameters
+        -----------
+        entity : Entity
+            The entity to remove
+        """
+        if entity not in self:
+            raise ValueError(f"{entity!r} is not in this table")
+
+        row = entity._row
+        values = {name: getattr(entity, name) for name in COLUMNS}
+
+        last = len(self.entities) - 1
+        moved = self.entities.pop()
+        boosted = last in self._boosted
+        self._boosted.discard(row)
+        self._boosted.discard(last)
+        if moved is not entity:
+            for column in self.columns.values():
+                column[row] = column[last]
+
+            self.entities[row] = moved
+            moved._row = row
+            if boosted:
+                self._boosted.add(row)
+
+        del entity._row
+        entity.__class__ = entity.__class__.__bases__[1]
+        for name, value in values.items():
+            setattr(entity, name, value)
+
+    def column(self, name : str) -> "Union[numpy.ndarray, array.array]":
+        """The values of a column for the entities in the table, with numpy this is a view of the column.
+
+        Parameters
+        -----------
+        name : str
+            One of "base_max_health", "base_attack", "base_defense", "base_max_energy", "_health",
+            "_energy" and "money"
+
+        Returns
+        --------
+        Union[numpy.ndarray, array.array]
+            One value per entity, in the order of `entities`
+        """
+        return self.columns[name][:len(self.entities)]
+
+    def _stat(self, stat):
+        # the base stat of every entity, corrected with the buffs of the entities that have some
+        values = self.column(f"base_{stat}")
+        values = values.copy() if self._np is not None else list(values)
+        for row in self._boosted:
+            values[row] = getattr(self.entities[row], stat)
+
+        return values
+
+    def alive_mask(self) -> "Union[numpy.ndarray, List[bool]]":
+        """Which entities are alive.
+
+        Returns
+        --------
+        Union[numpy.ndarray, List[bool]]
+            One boolean per entity, in the order of `entities`
+        """
+        health = self.column("_health")
+        if self._np is not None:
+            return health > 0
+
+        return [value > 0 for value in health]
+
+    def alive(self) -> "List[Entity]":
+        """The entities that are alive, in the order of `entities`."""
+        return [entity for entity, alive in zip(self.entities, self.alive_mask()) if alive]
+
+    def _selected(self, mask):
+        if mask is None:
+            mask = self.alive_mask()
+
+        if self._np is not None:
+            return self._np.flatnonzero(self._np.asarray(mask, dtype=bool))
+
+        return [row for row, selected in enumerate(mask) if selected]
+
+    def _update(self, name, rows, old, new, requested, event, quiet):
+        column = self.columns[name]
+        if self._np is not None:
+            column[rows] = new
+            rows, old, new, requested = rows.tolist(), old.tolist(), new.tolist(), requested.tolist()
+        else:
+            for row, value in zip(rows, new):
+                column[row] = value
+
+        if not (quiet or utils.HEADLESS):
+            for row, current, value in zip(rows, old, requested):
+                post_output(event, self.entities[row], current, value)
+
+        return rows, new
+
+    def damage_all(self, value : int, **kwargs) -> "List[Entity]":
+        """Deal damage to many entities at once, the same as calling `take_damage` (or `take_pure_damage`) on
+        each of them.
+
+        Parameters
+        -----------
+        value : int
+            The amount of damage to deal
+        pure : Optional[bool]
+            Whether the damage ignores defense, False by default
+        mask : Optional[Sequence[bool]]
+            Which entities to damage, by default every entity alive
+        quiet : Optional[bool]
+            Don't post the messages about the health lost, False by default
+
+        Returns
+        --------
+        List[Entity]
+            The entities killed by the damage
+        """
+        pure = kwargs.get("pure", False)
+        quiet = kwargs.get("quiet", False)
+        if not pure and value < 1:
+            return []
+
+        rows = self._selected(kwargs.get("mask"))
+        if self._np is not None:
+            np = self._np
+            damage = value if pure else np.maximum(1, value - np.maximum(0, self._stat("defense")[rows]))
+            old = self.columns["_health"][rows]
+            requested = old - damage
+            max_health = np.maximum(0, self._stat("max_health")[rows])
+            new = np.where(requested <= 0, 0, np.minimum(requested, max_health))
+        else:
+            defense = None if pure else self._stat("defense")
+            max_health = self._stat("max_health")
+            column = self.columns["_health"]
+            old = [column[row] for row in rows]
+            requested = [health - (value if pure else max(1, value - max(0, defense[row]))) for row, health in zip(rows, old)]
+            new = [0 if health <= 0 else min(health, max(0, max_health[row])) for row, health in zip(rows, requested)]
+
+        rows, new = self._update("_health", rows, old, new, requested, HealthChanged, quiet)
+        killed = [self.entities[row] for row, health in zip(rows, new) if health == 0]
+        quests = get_quest_manager()
+        for entity in killed:
+            quests.progress_quests("on_death", entity)
+
+        return killed
+
+    def regen_all(self, health : int = 0, energy : int = 0, **kwargs):
+        """Restore health and energy to many entities at once, the same as calling `restore_health` and
+        `gain_energy` on each of them.
+
+        Parameters
+        -----------
+        health : Optional[int]
+            The amount of health to restore, 0 by default
+        energy : Optional[int]
+            The amount of energy to restore, 0 by default
+        mask : Optional[Sequence[bool]]
+            Which entities to restore, by default every entity alive
+        quiet : Optional[bool]
+            Don't post the messages about the health and energy gained, False by default
+        """
+        quiet = kwargs.get("quiet", False)
+        rows = self._selected(kwargs.get("mask"))
+        for column, value, stat, event in (("_health", health, "max_health", HealthChanged), ("_energy", energy, "max_energy", EnergyChanged)):
+            if not value:
+                continue
+
+            if self._np is not None:
+                np = self._np
+                old = self.columns[column][rows]
+                requested = old + value
+                new = np.where(requested <= 0, 0, np.minimum(requested, np.maximum(0, self._stat(stat)[rows])))
+            else:
+                maximum = self._stat(stat)
+                values = self.columns[column]
+                old = [values[row] for row in rows]
+                requested = [current + value for current in old]
+                new = [0 if amount <= 0 else min(amount, max(0, maximum[row])) for row, amount in zip(rows, requested)]
+
+            self._update(column, rows, old, new, requested, event, quiet)
@@ -1,7 +1,16 @@
 from .actions import yes_or_no_parser
 from .errors import ZorkError, EndGame
+from .events import Event
 
+import contextlib
 import sys
+import types
+
+#whether the output is turned off, see `headless`
+HEADLESS = False
+
+#an empty mapping shared by the objects that haven't written to theirs yet, it can't be written to
+_EMPTY = types.MappingProxyType({})
 
 def get_user_input():
     """Method called by the library to gather user input, by default this simply calls input()"""
@@ -16,11 +25,58 @@ def _getattr(self, parameter, kwargs, default="None"):
 def update_input(func):
     sys.modules["pyzork"].user_input = func
 
-def post_output(string):
-    sys.modules["pyzork"].print_function(string)
+def post_output(string, *args):
+    """Method called by the library to show text or an Event to the player. An Event class can be passed
+    with the arguments to create it, the event is then only created if the output is kept. Events are rendered
+    to text unless the output function was set to take events"""
+    if HEADLESS:
+        return
+        
+    pyzork = sys.modules["pyzork"]
+    if pyzork.print_function is None:
+        return
+        
+    if args:
+        string = string(*args)
+        
+    if isinstance(string, Event) and not pyzork.print_events:
+        string = string.render()
+        
+    pyzork.print_function(string)
     
-def update_output(func):
+def update_output(func, events=False):
+    """Change the function the output is sent to, None discards the output. If `events` is True the function
+    gets the Event objects as they are posted instead of their text, plain text is still sent as str."""
     sys.modules["pyzork"].print_function = func
+    sys.modules["pyzork"].print_events = events
+    
+def set_headless(headless : bool):
+    """Turn the output off or back on. While headless, nothing is sent to the output function and the library
+    doesn't build the messages at all, for simulations and tests that don't need the output.
+    
+    Parameters
+    -----------
+    headless : bool
+        True to turn the output off, False to turn it back on
+    """
+    global HEADLESS
+    HEADLESS = headless
+    
+@contextlib.contextmanager
+def headless():
+    """Context manager turning the output off inside its block, see `set_headless`.
+    
+    .. code-block:: python
+    
+        with pyzork.utils.headless():
+            battle.battle_loop()
+    """
+    previous = HEADLESS
+    set_headless(True)
+    try:
+        yield
+    finally:
+        set_headless(previous)
     
 def game_loop(world):
     try:
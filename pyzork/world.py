@@ -1,11 +1,32 @@
 from .enums import Direction
 from .utils import get_user_input, post_output, _getattr
-from .base import QM
+from .base import get_quest_manager
 from .battle import Battle
 from .actions import *
 
 from typing import Union
 
+def _view(ctx, view, player=None):
+    getattr(player or ctx.player, f"print_{view}")()
+    
+def _sell(shop, item, player):
+    if shop.resell == 0:
+        return post_output("You cannot sell items in this shop")
+        
+    item.sell(player, shop.resell)
+    
+def _trade_parser(action):
+    def parser(shop, choice, player=None):
+        intent, item = shop_parser(choice, shop)
+        if intent == action:
+            return item
+            
+    return parser
+    
+def _shop_use_item_parser(shop, choice, player=None):
+    if player is not None and player.world is not None:
+        return use_item_parser(choice, player.world)
+
 class Location:
     """A location represents a place in which the player exists while out of combat, this is where players
     usually go about their normal tasks of discovering things and such. A location can be of any scale, it
@@ -31,25 +52,72 @@ class Location:
     description : Optional[str]
         The description of the location, which gets printed when the user enters it if the `enter`
         method is not overriden.
-    npcs : List[Entity]
-        List of npcs that can be interacted with
-    enemies : List[Enemy]
-        List of enemies the user will battle when entering the first time
+    npcs : IndexedList
+        List of npcs that can be interacted with, lists assigned to this are copied into an IndexedList
+    enemies : IndexedList
+        List of enemies the user will battle when entering the first time, lists assigned to this are copied
+        into an IndexedList
     visited : int
         How many times the user has visited this place
+    npc_index : NameIndex
+        Index of the names of the npcs, kept up to date by the `npcs` list
+    version : int
+        Incremented every time the exits, npcs or enemies of the location change
     """
+    __slots__ = ("name", "description", "exits", "visited", "version", "_npcs", "_enemies", "__dict__", "__weakref__")
+    
+    _shared = frozenset()
+    _defaults = {}
+    _lists = ("npcs", "enemies")
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # lists given as class attributes would hide the properties, they become defaults instead
+        defaults = {name: cls.__dict__[name] for name in cls._lists if name in cls.__dict__ and not isinstance(cls.__dict__[name], property)}
+        if defaults:
+            for name in defaults:
+                delattr(cls, name)
+                
+            cls._defaults = {**cls._defaults, **defaults}
+    
     def __init__(self, **kwargs):
-        self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
-        self.description = _getattr(self, "description", kwargs, self.__init__.__doc__)
+        # the name and description of a template are shared by all its instances
+        if "name" not in self._shared or "name" in kwargs:
+            self.name = _getattr(self, "name", kwargs, self.__doc__ if self.__doc__ else self.__class__.__name__)
+        if "description" not in self._shared or "description" in kwargs:
+            self.description = _getattr(self, "description", kwargs, self.__init__.__doc__)
         self.exits = self._generate_exits()
         self.visited = 0
+        self.version = 0
         
-        self.npcs = _getattr(self, "npcs", kwargs, [])
-        self.enemies = _getattr(self, "enemies", kwargs, [])
+        self.npcs = _getattr(self, "npcs", kwargs, self._defaults.get("npcs", []))
+        self.enemies = _getattr(self, "enemies", kwargs, self._defaults.get("enemies", []))
                    
         self.npcs = [npc() for npc in self.npcs]
         self.enemies = [enemy() for enemy in self.enemies]
         
+    @property
+    def npcs(self) -> IndexedList:
+        return self._npcs
+        
+    @npcs.setter
+    def npcs(self, npcs):
+        self._npcs = IndexedList(npcs, self)
+        self.version += 1
+        
+    @property
+    def enemies(self) -> IndexedList:
+        return self._enemies
+        
+    @enemies.setter
+    def enemies(self, enemies):
+        self._enemies = IndexedList(enemies, self)
+        self.version += 1
+        
+    @property
+    def npc_index(self) -> NameIndex:
+        return self._npcs.names
+        
     def __repr__(self):
         return f"<{self.name} npcs={len(self.npcs)} enemies={len(self.enemies)}>"
         
@@ -98,6 +166,7 @@ class Location:
             break of any existing connection.
         """
         self.exits[direction] = connected_location
+        self.version += 1
         
     def _enter(self, player : "Player", from_location : "Location"):
         can_enter = self.enter(player, from_location)
@@ -105,7 +174,7 @@ class Location:
             return False
         
         if not self.visited:
-            QM.progress_quests("on_discover", self)
+            get_quest_manager().progress_quests("on_discover", self)
             
         self.visited += 1
 
@@ -210,17 +279,72 @@ class Location:
         """
         return self.exits[direction]
         
+    def reindex(self):
+        """Rebuild the name indexes of the npcs and enemies, the lists keep them up to date so you only need
+        to call this after renaming an npc or an enemy."""
+        self.npcs.reindex()
+        self.enemies.reindex()
+        
+    def add_npc(self, npc : "Entity"):
+        """Add an npc the player can interact with to this location
+        
+        Parameters
+        -----------
+        npc : Entity
+            The instance of the npc to add
+        """
+        self.npcs.append(npc)
+        
+    def remove_npc(self, npc : "Entity"):
+        """Remove an npc from this location
+        
+        Parameters
+        -----------
+        npc : Entity
+            The instance of the npc to remove
+        """
+        self.npcs.remove(npc)
+        
+    def add_enemy(self, enemy : "Enemy"):
+        """Add an enemy the player will fight when entering this location
+        
+        Parameters
+        -----------
+        enemy : Enemy
+            The instance of the enemy to add
+        """
+        self.enemies.append(enemy)
+        
+    def remove_enemy(self, enemy : "Enemy"):
+        """Remove an enemy from this location
+        
+        Parameters
+        -----------
+        enemy : Enemy
+            The instance of the enemy to remove
+        """
+        self.enemies.remove(enemy)
+        
     def update_alive(self):
         """remove all the dead stuff"""
-        self.npcs = [x for x in self.npcs if x.is_alive()]
-        self.enemies = [x for x in self.enemies if x.is_alive()]
+        for entities in (self.npcs, self.enemies):
+            alive = []
+            dead = []
+            for entity in entities:
+                (alive if entity.is_alive() else dead).append(entity)
+                
+            entities._replace(alive, dead)
         
     @classmethod
     def from_dict(cls, **kwargs):
         """Create a Location from a set of kwargs, takes the same parameters as the class
         and returns a subclass of it by the same name. If you add npcs and enemies through this you must
-        pass the classes themselves and not the instances."""
-        new_class = type(kwargs.get("name"), (cls,), kwargs)
+        pass the classes themselves and not the instances. Like :method:NPC.from_dict the class works as a
+        template, the name and description are shared by all the instances."""
+        attributes = dict(kwargs)
+        attributes["_defaults"] = {key: attributes.pop(key) for key in ("npcs", "enemies") if key in attributes}
+        attributes["_shared"] = frozenset(key for key in ("name", "description") if key in attributes)
+        new_class = type(kwargs.get("name"), (cls,), attributes)
         return new_class
 
 class Shop(Location):
@@ -247,13 +371,30 @@ class Shop(Location):
     description : Optional[str]
         The description of the shop, which gets printed when the user enters it if the :method:enter
         is not overriden.
-    items : List[ShopItem]
-        The list of items that can be bought or sold
+    items : IndexedList
+        The list of items that can be bought or sold, lists assigned to this are copied into an IndexedList
     resell : float
         The multipler applied on the original price to get the resale value of an item.
+    item_index : NameIndex
+        Index of the names of the items, kept up to date by the `items` list
+    commands : CommandTable
+        The commands the player can use while in the shop, shared by every shop.
     """
+    __slots__ = ("_items", "resell")
+    _lists = ("npcs", "enemies", "items")
+    
+    commands = CommandTable([
+        ("exit", lambda shop, choice, player=None: direction_parser(choice, shop), lambda shop, direction, player: None, ["movement"]),
+        ("sell", _trade_parser("sell"), _sell, ["shop:sell"]),
+        ("buy", _trade_parser("buy"), lambda shop, item, player: item.buy(player), ["shop:buy"]),
+        ("view", lambda shop, choice, player=None: view_parser(choice), _view, ["view"]),
+        ("equip", lambda shop, choice, player=None: player is not None and equip_item_parser(choice, player), lambda shop, item, player: player.inventory.equip_item(item), ["equip"]),
+        ("use_item", _shop_use_item_parser, lambda shop, reply, player: player.use_item_on(reply[1], reply[0]), ["use", "self_use"]),
+    ])
+    
     def __init__(self, **kwargs):
-        self.items = _getattr(self, "items", kwargs, [])
+        self.version = 0
+        self.items = _getattr(self, "items", kwargs, self._defaults.get("items", []))
         self.resell = _getattr(self, "resell", kwargs, 0)
         self.name = _getattr(self, "name", kwargs)
         self.description = _getattr(self, "description", kwargs, None)
@@ -266,7 +407,7 @@ class Shop(Location):
             return False
         
         if not self.visited:
-            QM.progress_quests("on_discover", self)
+            get_quest_manager().progress_quests("on_discover", self)
         
         self.shop_loop(player)
         return False
@@ -283,36 +424,39 @@ class Shop(Location):
         """
         post_output(f"- Go {direction.name} to shop")
         
+    @property
+    def items(self) -> IndexedList:
+        return self._items
+        
+    @items.setter
+    def items(self, items):
+        self._items = IndexedList(items, self)
+        self.version += 1
+        
+    @property
+    def item_index(self) -> NameIndex:
+        return self._items.names
+        
+    def reindex(self):
+        """Rebuild the name indexes of the npcs, enemies and items, the lists keep them up to date so you
+        only need to call this after renaming one of them."""
+        super().reindex()
+        self.items.reindex()
+        
     def print_items(self, player : "Player"):
         """Print all the items for sale in this shop on the money of the player."""
         post_output(f"You have {player.money}")
         for item in self.items:
-            post_output(f"- {item.item.name} ({item.amount}): {item.price} coins - {item.item.description}")
+            post_output(f"- {item.name} ({item.charges}): {item.price} coins - {item.description}")
         
     def shop_loop(self, player : "Player"):
         """The heart of the shop system, this allows the player to buy, sell, exit the shop, view his
-        stats/inventory and use/equip items."""
+        stats/inventory and use/equip items. The input is matched against `commands`."""
         self.print_items(player)
         while True:
-            choice = get_user_input()
-            intent, item = shop_parser(choice, self)
-            if intent == "exit":
+            action, _ = self.commands.dispatch(Command(get_user_input()), self, player)
+            if action == "exit":
                 return False
-            
-            if intent == "buy":
-                item = self.items[int(choice[1])]
-                item.buy(player)
-            elif intent == "sell":
-                if self.resell == 0:
-                    return post_output("You cannot sell items in this shop")
-                item = self.items[int(choice[1])]
-                item.sell(player, self.resell)
-            elif view := view_parser(choice):
-                hasattr(player, f"print_{view}")()
-            elif item := equip_item_parser(choice, player):
-                player.inventory.equip_item(item)
-            elif item := use_item_parser(choice, player):
-                player.inventory.use_item(item)
 
     @classmethod
     def from_dict(cls, **kwargs):
@@ -353,7 +497,17 @@ class World:
         The player of this world
     locations : List[Location]
         A list of location instances representing all possible locations in the world
+    commands : CommandTable
+        The commands the player can use while traveling, shared by every world.
     """
+    commands = CommandTable([
+        ("move", lambda world, choice: direction_parser(choice, world.current_location), lambda world, direction: world.legal_travel(world.directional_move(direction)), ["movement"]),
+        ("interact", lambda world, choice: interact_parser(choice, world.current_location), lambda world, npc: npc.interact(world), ["interact"]),
+        ("view", lambda world, choice: view_parser(choice), _view, ["view"]),
+        ("equip", lambda world, choice: equip_item_parser(choice, world.player), lambda world, item: world.player.inventory.equip_item(item), ["equip"]),
+        ("use_item", lambda world, choice: use_item_parser(choice, world), lambda world, reply: world.player.use_item_on(reply[1], reply[0]), ["use", "self_use"]),
+    ])
+    
     def __init__(self, **kwargs):
         self.locations = kwargs.pop("locations")
         self.current_location = Location()
@@ -369,7 +523,7 @@ class World:
         will expire while the user travels in the world. Unless you're doing some advanced stuff with the
         library such as handling the game loop on your own you shouldn't need to call this."""
         while True:
-            QM.process_rewards(self.player, self)
+            get_quest_manager().process_rewards(self.player, self)
             self.current_location.print_exits(self)
             self.current_location.print_npcs(self)
             self.print_menu()
@@ -382,8 +536,9 @@ class World:
         post_output("- View stats")
             
     def end_turn(self):
-        """Decrement the duration of all player modifiers by 1"""
+        """Decrement the duration of all player modifiers by 1 and handle the quest events of the turn"""
         self.player.end_turn()
+        get_quest_manager().flush_events()
         
     def travel(self, new_location : Location):
         """Travel in a to a location regadless of if it is a "legal" move, this instantly transports
@@ -466,20 +621,9 @@ class World:
         return self.current_location.directional_move(direction)
             
     def travel_parser(self):
-        """Gets the user input and check if it matches against a set of parsers using python's
-        new walrus operator."""
-        choice = clean(get_user_input().lower())
-        if direction := direction_parser(choice, self.current_location):
-            location = self.directional_move(direction)
-            self.legal_travel(location)
-        elif npc := interact_parser(choice, self.current_location):
-            npc.interact(self)
-        elif view := view_parser(choice):
-            getattr(self.player, f"print_{view}")()
-        elif item := equip_item_parser(choice, self.player):
-            self.player.inventory.equip_item(item)
-        elif item := use_item_parser(choice, self.player):
-            self.player.inventory.use_item(item)
+        """Gets the user input and performs the matching command of `commands`. The input is only parsed
+        once and only the parsers of the commands it could be are run."""
+        self.commands.dispatch(Command(get_user_input()), self)
             
     def end_game(self, e : "EndGame"):
         """Method to be overwritten either through subclassing or by passing it as a parameters
@@ -12,6 +12,12 @@ with open('pyzork/__init__.py') as f:
     version = re.search(r'^__version__\s*=\s*[\'"]([^\'"]*)[\'"]', f.read(), re.MULTILINE).group(1)
 
 extras_require = {
+    'nltk': [
+        'nltk'
+    ],
+    'numpy': [
+        'numpy'
+    ],
     'visualise': [
         'matplotlib', 
         'networkx'
@@ -30,6 +36,7 @@ setup(
     author_email = "clement.julia13@gmail.com",
     url = "https://github.com/ClementJ18/pyzork",
     packages = ["pyzork"],
+    package_data = {"pyzork": ["data/*.txt"]},
     install_requires=requirements,
     extras_require=extras_require
     )
@@ -1,4 +1,6 @@
+import gc
 import unittest
+import weakref
 import pyzork
 
 class Sword(pyzork.Weapon):
@@ -223,3 +225,367 @@ class TestUseAbilityParser(unittest.TestCase):
             self.assertIsNot(reply, None, msg=string)
             self.assertIs(reply[0], enemy[0], msg=string)
             self.assertIsInstance(reply[1], enemy[1], msg=string)
+            
+class TestStopwords(unittest.TestCase):
+    def test_bundled(self):
+        import sys
+        
+        stopwords = pyzork.actions.get_stopwords()
+        self.assertIn("the", stopwords)
+        self.assertNotIn("goblin", stopwords)
+        self.assertIs(pyzork.actions.STOPWORDS, stopwords)
+        self.assertNotIn("nltk", sys.modules)
+        
+class TestCommand(unittest.TestCase):
+    def test(self):
+        command = pyzork.actions.Command("Go to the Tavern")
+        
+        self.assertEqual(command.words, ["go", "to", "the", "tavern"])
+        self.assertEqual(command.tokens, ["go", "tavern"])
+        self.assertEqual(command.intents, {"movement"})
+        self.assertIs(pyzork.actions.parse_command(command), command)
+        
+        market = pyzork.Location(name="Market")
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        self.assertIs(pyzork.actions.direction_parser(command, market), pyzork.Direction.south)
+        self.assertIsNone(pyzork.actions.interact_parser(command, market))
+        self.assertIsNone(pyzork.actions.view_parser(command))
+        
+class TestLexicon(unittest.TestCase):
+    def test(self):
+        lexicon = pyzork.actions.build_lexicon()
+        
+        self.assertEqual(lexicon.intents(["go", "north"]), {"movement"})
+        self.assertEqual(lexicon.intents(["use", "potion"]), {"use", "cast"})
+        self.assertEqual(lexicon.match(lexicon.intents(["health", "items"]), "view"), "inventory")
+        self.assertIsNone(lexicon.match(lexicon.intents(["go"]), "view"))
+        
+        lexicon.add("movement", "Sprint")
+        self.assertEqual(lexicon.intents(["sprint"]), {"movement"})
+        
+        lexicon.remove("movement", "sprint")
+        self.assertNotIn("sprint", lexicon)
+        
+    def test_extend(self):
+        market = pyzork.Location(name="Market")
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        self.assertIsNone(pyzork.actions.direction_parser("sprint south", market))
+        pyzork.actions.LEXICON.add("movement", "sprint")
+        try:
+            self.assertIs(pyzork.actions.direction_parser("sprint south", market), pyzork.Direction.south)
+        finally:
+            pyzork.actions.LEXICON.remove("movement", "sprint")
+            
+    def test_word_lists(self):
+        market = pyzork.Location(name="Market")
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        pyzork.actions.ACCEPTABLE_MOVEMENTS.append("sprint")
+        try:
+            self.assertIs(pyzork.actions.direction_parser("sprint south", market), pyzork.Direction.south)
+        finally:
+            pyzork.actions.ACCEPTABLE_MOVEMENTS.remove("sprint")
+        self.assertIsNone(pyzork.actions.direction_parser("sprint south", market))
+        
+        pyzork.actions.ALIASES_VIEW["map"] = ["map", "where"]
+        try:
+            self.assertEqual(pyzork.actions.view_parser("show the map"), "map")
+            pyzork.actions.ALIASES_VIEW["map"].remove("where")
+            self.assertIsNone(pyzork.actions.view_parser("where"))
+        finally:
+            del pyzork.actions.ALIASES_VIEW["map"]
+        self.assertIsNone(pyzork.actions.view_parser("show the map"))
+        self.assertEqual(pyzork.actions.LEXICON.words, pyzork.actions.build_lexicon().words)
+        
+class TestNameIndex(unittest.TestCase):
+    def test_same_as_scan(self):
+        names = ["Old Table", "Old", "Old Man", "Princess of the Kingdom", "BigGoblin", "Goblin", "Fat Goblin"]
+        npcs = [pyzork.NPC(name=name) for name in names]
+        index = pyzork.actions.NameIndex(npcs)
+        
+        for string in ["old", "old man", "table", "goblin", "big goblin", "kingdom princess", "wizard"]:
+            tokens = string.split()
+            self.assertEqual(index.best(tokens), pyzork.actions.best_matches(tokens, npcs), msg=string)
+            
+    def test_location(self):
+        market = pyzork.Location(name="Market")
+        man = pyzork.NPC(name="Old Man", max_health=1)
+        market.add_npc(pyzork.NPC(name="Old Table", max_health=1))
+        market.add_npc(pyzork.NPC(name="Princess", max_health=1))
+        market.add_npc(man)
+        
+        self.assertIs(pyzork.actions.interact_parser("talk to the old man", market), man)
+        
+        man.health = 0
+        market.update_alive()
+        self.assertNotIn(man, market.npc_index)
+        self.assertIsNone(pyzork.actions.interact_parser("talk to the man", market))
+        
+    def test_edited_lists(self):
+        cache = pyzork.actions.PARSE_CACHE
+        maxsize, cache.maxsize = cache.maxsize, 0
+        try:
+            market = pyzork.Location(name="Market")
+            market.add_npc(pyzork.NPC(name="Old Table", max_health=1))
+            market.add_npc(pyzork.NPC(name="Princess", max_health=1))
+            self.assertIsNone(pyzork.actions.interact_parser("talk to dan", market))
+            
+            dan = pyzork.NPC(name="Dan", max_health=1)
+            market.npcs = [dan, pyzork.NPC(name="Eve", max_health=1)]
+            self.assertIsInstance(market.npcs, pyzork.actions.IndexedList)
+            self.assertIs(pyzork.actions.interact_parser("talk to dan", market), dan)
+            
+            carl = pyzork.NPC(name="Carl", max_health=1)
+            market.npcs[0] = carl
+            self.assertIs(pyzork.actions.interact_parser("talk to carl", market), carl)
+            self.assertIsNone(pyzork.actions.interact_parser("talk to dan", market))
+            
+            carl.name = "Frank"
+            market.reindex()
+            self.assertIs(pyzork.actions.interact_parser("talk to frank", market), carl)
+        finally:
+            cache.maxsize = maxsize
+        
+class TestParseCache(unittest.TestCase):
+    def test_context(self):
+        market = pyzork.Location(name="Market")
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        self.assertIs(pyzork.actions.direction_parser("go to the tavern", current_location=market), pyzork.Direction.south)
+        self.assertIs(pyzork.actions.direction_parser("go to the tavern", market), pyzork.Direction.south)
+        
+        # the cache doesn't keep the locations alive
+        market = weakref.ref(market)
+        del tavern
+        gc.collect()
+        self.assertIsNone(market())
+        
+    def test(self):
+        cache = pyzork.actions.PARSE_CACHE
+        cache.clear()
+        
+        market = pyzork.Location(name="Market")
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        self.assertIs(pyzork.actions.direction_parser("go to the tavern", market), pyzork.Direction.south)
+        self.assertIs(pyzork.actions.direction_parser("Go to  the TAVERN", market), pyzork.Direction.south)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        
+        market.two_way_connect(pyzork.Direction.south)
+        market.two_way_connect(pyzork.Direction.east, tavern)
+        self.assertIs(pyzork.actions.direction_parser("go to the tavern", market), pyzork.Direction.east)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        
+    def test_edited_lists(self):
+        market = pyzork.Location(name="Market")
+        market.add_npc(pyzork.NPC(name="Old Table", max_health=1))
+        market.add_npc(pyzork.NPC(name="Princess", max_health=1))
+        self.assertIsNone(pyzork.actions.interact_parser("talk to carl", market))
+        
+        carl = pyzork.NPC(name="Carl", max_health=1)
+        market.npcs.append(carl)
+        self.assertIs(pyzork.actions.interact_parser("talk to carl", market), carl)
+        
+        carl.name = "Dan"
+        market.reindex()
+        self.assertIs(pyzork.actions.interact_parser("talk to dan", market), carl)
+        
+        market.npcs[2] = pyzork.NPC(name="Eve", max_health=1)
+        self.assertIsNone(pyzork.actions.interact_parser("talk to dan", market))
+        
+    def test_bounded(self):
+        cache = pyzork.actions.ParseCache(maxsize=2)
+        for key in range(3):
+            cache.get((key,), lambda: key)
+            
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get((0,), lambda: "recomputed"), "recomputed")
+        
+class TestFuzzyMatching(unittest.TestCase):
+    def setUp(self):
+        pyzork.actions.set_fuzzy_matching(1)
+        
+    def tearDown(self):
+        pyzork.actions.set_fuzzy_matching(0)
+        
+    def test_distance(self):
+        self.assertEqual(pyzork.actions.edit_distance("goblim", "goblin"), 1)
+        self.assertEqual(pyzork.actions.edit_distance("gobin", "goblin"), 1)
+        self.assertEqual(pyzork.actions.edit_distance("wizard", "lizard"), 1)
+        self.assertEqual(pyzork.actions.edit_distance("wizrd", "lizard"), 2)
+        
+        index = pyzork.actions.FuzzyIndex(1, ["goblin", "goblins", "wizard"])
+        self.assertEqual(index.search("goblim"), ["goblin"])
+        self.assertEqual(index.search("wizzard"), ["wizard"])
+        self.assertEqual(index.search("troll"), [])
+        
+        index.remove("goblin")
+        self.assertEqual(index.search("goblim"), [])
+        
+    def test_parsers(self):
+        player = pyzork.Player()
+        battle = pyzork.Battle(player=player, enemies=[goblin, wizard, goblin2])
+        market = pyzork.Location(name="Market", npcs=[pyzork.NPC.from_dict(name="Old Man"), pyzork.NPC.from_dict(name="Princess")])
+        p = pyzork.Player(inventory=pyzork.Inventory(items=[Sword(), Cuirass()]))
+        
+        self.assertIs(pyzork.actions.attack_parser("attack the wizrd", battle), wizard)
+        self.assertIs(pyzork.actions.attack_parser("attack the fat goblim", battle), goblin)
+        self.assertEqual(pyzork.actions.interact_parser("talk to the princes", market).name, "Princess")
+        self.assertIsInstance(pyzork.actions.equip_item_parser("equip the cuiras", p), Cuirass)
+        
+        pyzork.actions.set_fuzzy_matching(0)
+        self.assertIsNone(pyzork.actions.attack_parser("attack the wizrd", battle))
+        
+class TestParseBatch(unittest.TestCase):
+    def test(self):
+        market = pyzork.Location(name="Market", npcs=[pyzork.NPC.from_dict(name="Old Man"), pyzork.NPC.from_dict(name="Princess")])
+        tavern = pyzork.Location(name="Tavern")
+        market.two_way_connect(pyzork.Direction.south, tavern)
+        
+        player = pyzork.Player(inventory=pyzork.Inventory(items=[Sword(), HealthPotion()]))
+        battle = pyzork.Battle(player=player, enemies=[goblin, wizard, goblin2])
+        shop = pyzork.Shop(name="A Big Shop", resell=0.25, items=[pyzork.ShopItem(item=Sword, price=25, amount=1)])
+        
+        pairs = [
+            ("go to the tavern", market),
+            ("talk to the princess", market),
+            ("attack the wizard", battle),
+            ("use the potion on me", battle),
+            ("view my stats", battle),
+            ("buy a sword", shop),
+            ("dance", battle),
+            ("go to the tavern", market),
+        ]
+        
+        replies = pyzork.actions.parse_batch(pairs)
+        self.assertEqual(replies, [pyzork.actions.parse(*pair) for pair in pairs])
+        
+        self.assertEqual(replies[0], ("move", pyzork.Direction.south))
+        self.assertEqual(replies[1][0], "interact")
+        self.assertEqual(replies[2], ("attack", wizard))
+        self.assertEqual(replies[3][0], "use_item")
+        self.assertEqual(replies[4], ("view", "stats"))
+        self.assertEqual(replies[5], ("buy", shop.items[0]))
+        self.assertEqual(replies[6], (None, None))
+        
+    def test_contexts(self):
+        class Room:
+            exits = {}
+            
+        refs = []
+        
+        def pairs():
+            for _ in range(65537):
+                room = Room()
+                refs.append(weakref.ref(room))
+                yield "dance", room
+                
+            # the batch doesn't hold on to every context it has seen
+            del room
+            gc.collect()
+            self.assertIsNone(refs[0]())
+            yield "dance", Room()
+            
+        self.assertEqual(len(pyzork.actions.parse_batch(pairs())), 65538)
+        
+class TestCommandTable(unittest.TestCase):
+    def test_candidates(self):
+        names = [entry[1] for entry in pyzork.World.commands.candidates("view my stats")]
+        self.assertEqual(names, ["view"])
+        
+        names = [entry[1] for entry in pyzork.Battle.commands.candidates("view my stats")]
+        self.assertEqual(names, ["attack", "view"])
+        
+        self.assertEqual(pyzork.World.commands.candidates("dance"), [])
+        
+    def test_register(self):
+        market = pyzork.Location(name="Market")
+        player = pyzork.Player()
+        world = pyzork.World(locations=[market], player=player)
+        
+        class DanceWorld(pyzork.World):
+            commands = pyzork.World.commands.copy()
+            
+        dance_world = DanceWorld(locations=[market], player=player)
+        dances = []
+        DanceWorld.commands.register("dance", lambda world, choice: choice.tokens[-1], lambda world, reply: dances.append(reply), ["dance"], ["dance", "boogie"])
+        try:
+            self.assertEqual(dance_world.commands.dispatch("boogie all night", dance_world), ("dance", None))
+            self.assertEqual(dances, ["night"])
+            self.assertEqual(pyzork.actions.parse("dance", dance_world), ("dance", "dance"))
+            self.assertEqual(pyzork.actions.parse("dance", world), (None, None))
+            
+            DanceWorld.commands.unregister("dance")
+            self.assertEqual(pyzork.actions.parse("dance", dance_world), (None, None))
+        finally:
+            pyzork.actions.LEXICON.remove("dance", "dance", "boogie")
+            
+    def test_shop(self):
+        shop = pyzork.Shop(name="A Big Shop", resell=0, items=[pyzork.ShopItem(item=Sword, price=25, amount=1)])
+        player = pyzork.Player(inventory=pyzork.Inventory(items=[Cuirass()]))
+        
+        self.assertEqual(pyzork.actions.parse("buy a sword", shop), ("buy", shop.items[0]))
+        self.assertEqual(pyzork.actions.parse("sell the sword", shop), ("sell", shop.items[0]))
+        self.assertEqual(pyzork.actions.parse("equip cuirass", shop), (None, None))
+        self.assertEqual(pyzork.actions.parse("equip cuirass", (shop, player))[0], "equip")
+        
+    def test_sell(self):
+        pyzork.utils.update_output(lambda text: None)
+        self.addCleanup(pyzork.utils.update_output, lambda text: print(text))
+        
+        sword = pyzork.ShopItem(item=Sword, price=20, amount=1)
+        potion = pyzork.ShopItem(item=HealthPotion, price=10, amount=1)
+        shop = pyzork.Shop(name="A Big Shop", resell=0.5, items=[sword, potion])
+        player = pyzork.Player(inventory=pyzork.Inventory(items=[Sword(), HealthPotion(), HealthPotion()]))
+        self.assertEqual(player.inventory.get_item(name="Health Potion").charges, 6)
+        
+        self.assertEqual(shop.commands.dispatch("sell the health potion", shop, player), ("sell", None))
+        self.assertEqual((player.money, potion.charges), (10, 3))
+        self.assertIsNone(player.inventory.get_item(name="Health Potion"))
+        
+        self.assertEqual(shop.commands.dispatch("sell my sword", shop, player), ("sell", None))
+        self.assertEqual((player.money, sword.charges), (20, 2))
+        self.assertEqual(player.inventory.equipment, set())
+        
+try:
+    import numpy
+except ImportError:
+    numpy = None
+    
+@unittest.skipUnless(numpy, "numpy is not installed")
+class TestVectorizedScorer(unittest.TestCase):
+    def setUp(self):
+        self.threshold = pyzork.actions.VECTORIZE_THRESHOLD
+        
+    def tearDown(self):
+        pyzork.actions.VECTORIZE_THRESHOLD = self.threshold
+        
+    def test_same_as_scan(self):
+        titles = ["Old", "Fat", "Tall", "Young"]
+        kinds = ["Goblin", "Wizard", "Goblin Archer", "Orc"]
+        npcs = [pyzork.NPC(name=f"{title} {kind} {i}", max_health=1) for i in range(5) for title in titles for kind in kinds]
+        battle = pyzork.Battle(player=pyzork.Player(), enemies=npcs)
+        
+        strings = ["attack the goblin", "attack the old goblin", "hit the fat orc 3", "strike the goblin archer on the left",
+                   "attack the young wizard in the middle", "attack the dragon", "hit goblin goblin", "attack the right o"]
+        pyzork.actions.VECTORIZE_THRESHOLD = 0
+        vectorized = [pyzork.actions.target_parser(string, battle.alive_index) for string in strings]
+        self.assertIsNotNone(battle.alive_index._scorer)
+        
+        for npc in npcs[::3]:
+            battle.alive_index.remove(npc)
+        vectorized_dead = [pyzork.actions.target_parser(string, battle.alive_index) for string in strings]
+        
+        pyzork.actions.VECTORIZE_THRESHOLD = self.threshold
+        scanned = [pyzork.actions.target_parser(string, npcs) for string in strings]
+        self.assertEqual(vectorized, scanned)
+        
+        alive = [npc for npc in npcs if npc in battle.alive_index]
+        self.assertEqual(vectorized_dead, [pyzork.actions.target_parser(string, alive) for string in strings])
@@ -58,4 +58,40 @@ class TestBattle(unittest.TestCase):
         battle = pyzork.Battle(player=player, enemies=bf.enemies, location=bf, priorities=custom_priorities)
         
         self.assertEqual(len(battle.priorities(battle)), 4)
- 
\ No newline at end of file
+         
+    def test_end_turn(self):
+        pyzork.utils.update_output(lambda x: None)
+        
+        @pyzork.Modifier.add_effect(duration=2)
+        def Poison(modifier, target):
+            target.take_pure_damage(4)
+            
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.attack, duration=5)
+        def Rage(modifier, target):
+            return 1
+            
+        player = pyzork.Player(max_health=50, attack=5)
+        Scout = pyzork.NPC.from_dict(name="Goblin Scout", max_health=10, experience=3)
+        Brute = pyzork.NPC.from_dict(name="Goblin Brute", max_health=15, experience=5)
+        enemies = [Scout() for _ in range(3)] + [Brute()]
+        battle = pyzork.Battle(player=player, enemies=enemies)
+        
+        for enemy in enemies:
+            enemy.add_modifier(Poison())
+        player.add_modifier(Poison())
+        player.add_modifier(Rage())
+        enemies[0].take_pure_damage(10)
+        enemies[1].take_pure_damage(6)
+        
+        battle.end_turn()
+        self.assertEqual(battle.alive, [enemies[2], enemies[3]])
+        self.assertEqual(battle.dead, [enemies[0], enemies[1]])
+        self.assertEqual(player.experience.total, 6)
+        self.assertEqual(enemies[0].health, 0)
+        self.assertEqual((player.health, enemies[2].health, enemies[3].health), (46, 6, 11))
+        
+        battle.end_turn()
+        self.assertEqual((player.health, enemies[2].health, enemies[3].health), (42, 2, 7))
+        self.assertEqual(player.modifiers, {hash(Rage()): player.modifiers[hash(Rage())]})
+        self.assertEqual(player.attack, 6)
+        self.assertEqual(battle.alive_index.best(["scout"]), [enemies[2]])
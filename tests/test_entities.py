@@ -1,3 +1,5 @@
+import sys
+import tracemalloc
 import unittest
 import pyzork
 
@@ -14,3 +16,207 @@ class TestNPC(unittest.TestCase):
 
     def tearDown(self):
         pass
+        
+class TestStatCache(unittest.TestCase):
+    def setUp(self):
+        pyzork.utils.update_output(lambda text: None)
+        
+    def tearDown(self):
+        pyzork.utils.update_output(lambda text: print(text))
+        
+    def test(self):
+        calls = []
+        
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.attack, duration=2)
+        def Rage(modifier, target):
+            calls.append(target)
+            return 3
+            
+        @pyzork.Weapon.add_buff()
+        def Sword(weapon, target):
+            return [(pyzork.StatEnum.attack, 2)]
+            
+        player = pyzork.Player(max_health=10, attack=1, inventory=pyzork.Inventory(items=[Sword()]))
+        player.add_modifier(Rage())
+        self.assertEqual(player.attack, 4)
+        self.assertEqual(player.attack, 4)
+        self.assertEqual(len(calls), 1)
+        
+        player.inventory.equip_item(player.inventory.get_item(name="Sword"))
+        self.assertEqual(player.attack, 6)
+        
+        player.base_attack = 2
+        self.assertEqual(player.attack, 7)
+        
+        player.end_turn()
+        player.end_turn()
+        self.assertEqual(player.attack, 4)
+        
+    def test_inventory(self):
+        @pyzork.Weapon.add_buff()
+        def Sword(weapon, target):
+            return [(pyzork.StatEnum.attack, 5)]
+            
+        @pyzork.Armor.add_buff()
+        def Shield(armor, target):
+            return [(pyzork.StatEnum.defense, 2)]
+            
+        player = pyzork.Player(max_health=10, attack=1)
+        self.assertEqual(player.attack, 1)
+        
+        stick = pyzork.Weapon(name="Stick")
+        shield = Shield()
+        player.inventory = pyzork.Inventory(weapon=Sword(), items=[stick, shield])
+        self.assertEqual(player.attack, 6)
+        
+        # an inventory shared by two entities buffs both of them
+        npc = pyzork.NPC(max_health=10, attack=2)
+        self.assertEqual(npc.attack, 2)
+        npc.inventory = player.inventory
+        self.assertEqual((player.attack, npc.attack), (6, 7))
+        
+        player.inventory.equip_item(shield)
+        self.assertEqual((player.defense, npc.defense), (2, 2))
+        player.inventory.equip_item(stick)
+        self.assertEqual((player.attack, npc.attack), (1, 2))
+        
+    def test_dynamic(self):
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.defense, duration=-1, dynamic=True)
+        def LastStand(modifier, target):
+            return 5 if target.health < 5 else 0
+            
+        player = pyzork.Player(max_health=10)
+        player.add_modifier(LastStand())
+        self.assertEqual(player.defense, 0)
+        
+        player.take_pure_damage(7)
+        self.assertEqual(player.defense, 5)
+        
+    def test_buckets(self):
+        calls = []
+        
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.defense, duration=1)
+        def Guard(modifier, target):
+            calls.append(target)
+            return 2
+            
+        @pyzork.Armor.add_buff()
+        def Cuirass(armor, target):
+            calls.append(armor)
+            return [(pyzork.StatEnum.defense, 1), (pyzork.StatEnum.max_health, 5)]
+            
+        player = pyzork.Player(max_health=10, inventory=pyzork.Inventory(armor=Cuirass()))
+        player.add_modifier(Guard())
+        self.assertEqual(player.inventory.buffs, {pyzork.StatEnum.defense: 1, pyzork.StatEnum.max_health: 5})
+        
+        calls.clear()
+        self.assertEqual(player.attack, 0)
+        self.assertEqual(player.max_health, 15)
+        self.assertEqual(calls, [])
+        self.assertEqual(player.defense, 3)
+        self.assertEqual(len(calls), 1)
+        
+        player.end_turn()
+        self.assertEqual(player.modifiers, {})
+        self.assertEqual(player._stat_modifiers, {})
+        self.assertEqual(player.defense, 1)
+        
+class TestSlots(unittest.TestCase):
+    def test(self):
+        npc = pyzork.NPC(name="Goblin", max_health=10)
+        self.assertEqual(npc.__dict__, {})
+        
+        class Troll(pyzork.NPC):
+            """Troll"""
+            max_health = 20
+            attack = 4
+            
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.grudge = True
+                
+        troll = Troll()
+        self.assertEqual(troll.name, "Troll")
+        self.assertEqual((troll.max_health, troll.health, troll.attack), (20, 20, 4))
+        self.assertTrue(troll.grudge)
+        
+        troll.take_pure_damage(5)
+        self.assertEqual(troll.health, 15)
+        
+        # containers and class attributes are shared until they're written to
+        class Thief(pyzork.NPC):
+            money = 5
+            
+        thief = Thief(max_health=10)
+        self.assertEqual((thief.money, thief.__dict__), (5, {}))
+        self.assertIs(thief._stats, npc._stats)
+        self.assertIs(thief._stat_modifiers, npc._stat_modifiers)
+        self.assertEqual(thief.attack, 0)
+        self.assertIsNot(thief._stats, npc._stats)
+        
+        thief.add_money(3)
+        self.assertEqual((thief.money, Thief.money), (8, 5))
+        
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        pyzork.utils.update_output(lambda text: None)
+        
+    def test(self):
+        class Slash(pyzork.Ability):
+            def effect(self, user, target):
+                target.take_damage(user.attack)
+                
+        class Roar(pyzork.Ability):
+            def effect(self, user, target):
+                pass
+                
+        Goblin = pyzork.NPC.from_dict(name="Goblin", max_health=10, attack=2, money=5, experience=3, abilities=[Slash()])
+        goblin = Goblin()
+        chief = Goblin(name="Goblin Chief", attack=6)
+        
+        self.assertEqual((goblin.name, goblin.max_health, goblin.health, goblin.attack), ("Goblin", 10, 10, 2))
+        self.assertEqual((goblin.money, goblin.experience_points), (5, 3))
+        self.assertEqual((chief.name, chief.attack), ("Goblin Chief", 6))
+        self.assertEqual(goblin.__dict__, {})
+        
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.attack, duration=2)
+        def Frenzy(modifier, target):
+            return 1
+            
+        goblin.add_modifier(Frenzy())
+        goblin.take_damage(3)
+        goblin.money -= 5
+        self.assertEqual((goblin.attack, goblin.health, goblin.money), (3, 7, 0))
+        self.assertEqual((chief.health, chief.money), (10, 5))
+        
+        chief.add_ability(Roar())
+        self.assertEqual(len(chief.abilities), 2)
+        self.assertEqual(len(goblin.abilities), 1)
+        self.assertEqual(len(Goblin().abilities), 1)
+        
+        class BigGoblin(Goblin):
+            max_health = 20
+            
+        big = BigGoblin()
+        self.assertEqual((big.base_max_health, big.health, big.base_attack), (20, 20, 2))
+        
+    def test_size(self):
+        Goblin = pyzork.NPC.from_dict(name="Goblin", max_health=10, attack=2, money=5, experience=3)
+        Goblin()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            goblins = [Goblin() for _ in range(500)]
+            size = (tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(goblins)) / len(goblins)
+        finally:
+            tracemalloc.stop()
+            
+        # the instances don't build an inventory and experience levels of their own until they need them
+        self.assertLess(size, 600)
+        self.assertIsNone(goblins[0]._inventory)
+        self.assertIsNone(goblins[0]._experience)
+        
+        goblin = goblins[0]
+        self.assertEqual((goblin.inventory.weapon.name, goblin.experience.level), ("bare hands", 0))
+        self.assertIs(goblin.inventory.entity, goblin)
+        self.assertIs(goblin.experience.entity, goblin)
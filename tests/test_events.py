@@ -0,0 +1,62 @@
+import unittest
+import pyzork
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.player = pyzork.Player(max_health=10, max_energy=5, attack=2)
+        self.goblin = pyzork.NPC(name="Goblin", max_health=10, defense=1)
+        
+    def tearDown(self):
+        pyzork.utils.update_output(lambda text: print(text))
+        
+    def test_text(self):
+        pyzork.utils.update_output(self.output.append)
+        self.player.do_attack(self.goblin)
+        self.player.energy -= 2
+        
+        self.assertEqual(self.output, [
+            "You attacks Goblin with their bare hands",
+            "Goblin loses 1 health",
+            "You loses 2 energy"
+        ])
+        
+    def test_events(self):
+        pyzork.utils.update_output(self.output.append, events=True)
+        self.player.do_attack(self.goblin)
+        pyzork.utils.post_output("Some text")
+        
+        attacked, damage, text = self.output
+        self.assertIsInstance(attacked, pyzork.events.Attacked)
+        self.assertIs(attacked.target, self.goblin)
+        self.assertIsInstance(damage, pyzork.events.HealthChanged)
+        self.assertEqual((damage.entity, damage.old, damage.new), (self.goblin, 10, 9))
+        self.assertEqual(str(damage), "Goblin loses 1 health")
+        self.assertEqual(text, "Some text")
+        
+    def test_discard(self):
+        rendered = []
+        
+        class Noisy(pyzork.events.Event):
+            def render(self):
+                rendered.append(self)
+                return "noise"
+                
+        pyzork.utils.update_output(None)
+        pyzork.utils.post_output(Noisy())
+        self.goblin.take_damage(5)
+        self.assertEqual(rendered, [])
+        self.assertEqual(self.goblin.health, 6)
+        
+    def test_headless(self):
+        pyzork.utils.update_output(self.output.append)
+        with pyzork.utils.headless():
+            self.player.do_attack(self.goblin)
+            pyzork.utils.post_output("Some text")
+            
+        self.assertEqual(self.output, [])
+        self.assertEqual(self.goblin.health, 9)
+        self.assertFalse(pyzork.utils.HEADLESS)
+        
+        self.goblin.take_pure_damage(1)
+        self.assertEqual(self.output, ["Goblin loses 1 health"])
@@ -114,3 +114,67 @@ class TestModifier(unittest.TestCase):
         self.assertEqual(self.modifier.description, "You feel insulted and as a result the target's defense is lowered. Lose 3 health every turn because of this.")
         
         self.check_modifier()
+        
+    def test_schedule(self):
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.attack, duration=3)
+        def Focus(modifier, target):
+            return 2
+            
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.defense, duration=-1)
+        def Stoneskin(modifier, target):
+            return 1
+            
+        focus = Focus()
+        self.player.add_modifier(focus)
+        self.player.add_modifier(Stoneskin())
+        self.assertFalse(self.player._ticking)
+        
+        self.player.end_turn()
+        self.assertEqual(focus.duration, 2)
+        self.assertEqual(focus.expires, 3)
+        
+        #refreshing the duration reschedules the modifier
+        focus.duration = 4
+        self.player.end_turn()
+        self.player.end_turn()
+        self.player.end_turn()
+        self.assertIn(hash(focus), self.player.modifiers)
+        self.assertEqual(self.player.attack, 2)
+        
+        self.player.end_turn()
+        self.assertNotIn(hash(focus), self.player.modifiers)
+        self.assertEqual((focus.duration, focus.expires), (0, None))
+        self.assertEqual(self.player.attack, 0)
+        self.assertEqual(self.player.defense, 7)
+        
+        focus = Focus()
+        self.player.add_modifier(focus)
+        self.player.end_turn()
+        self.player.remove_modifier(focus)
+        self.assertEqual(focus.duration, 2)
+        
+    def test_legacy_end_turn(self):
+        @pyzork.Modifier.add_buff(stat_type=pyzork.StatEnum.attack, duration=2)
+        def Rage(modifier, target):
+            return 3
+            
+        class Berserker(pyzork.NPC):
+            def end_turn(self):
+                for name in list(self.modifiers.keys()):
+                    modifier = self.modifiers[name]
+                    modifier.end_turn(self)
+                    if modifier.is_expired():
+                        del self.modifiers[name]
+                        
+        berserker = Berserker(max_health=10, attack=1)
+        berserker.add_modifier(Rage())
+        self.assertEqual(berserker.attack, 4)
+        
+        berserker.end_turn()
+        self.assertEqual(berserker.attack, 4)
+        
+        for _ in range(3):
+            berserker.end_turn()
+            
+        self.assertEqual(berserker.modifiers, {})
+        self.assertEqual(berserker.attack, 1)
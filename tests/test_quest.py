@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 import pyzork
 
@@ -67,3 +68,267 @@ class TestQuest(unittest.TestCase):
         
         self.assertEqual(len(pyzork.QM.active_quests), 0)
         self.assertEqual(pyzork.QM.finished_quests["OnDeath"], 1)
+        
+    def test_subscribers(self):
+        @pyzork.QM.add(id="OnDeath")
+        class Quest1(pyzork.Quest):
+            def on_death(self, entity):
+                return entity == "boss"
+        
+        @pyzork.QM.add(id="OnPickup")
+        class Quest2(pyzork.Quest):
+            def on_pickup(self, item):
+                return True
+        
+        pyzork.QM.start_quest("OnDeath")
+        pyzork.QM.start_quest("OnPickup")
+        
+        self.assertEqual(set(pyzork.QM.subscribers), {"on_death", "on_pickup"})
+        self.assertEqual(list(pyzork.QM.subscribers["on_death"]), ["OnDeath"])
+        
+        pyzork.QM.progress_quests("on_discover", None)
+        pyzork.QM.progress_quests("on_death", "goblin")
+        self.assertEqual(len(pyzork.QM.active_quests), 2)
+        
+        pyzork.QM.progress_quests("on_death", "boss")
+        self.assertNotIn("on_death", pyzork.QM.subscribers)
+        
+        pyzork.QM.stop_quest("OnPickup")
+        self.assertEqual(pyzork.QM.subscribers, {})
+        
+    def test_rewards(self):
+        rewarded = []
+        
+        @pyzork.QM.add(id="First")
+        class Quest1(pyzork.Quest):
+            def reward(self, player, world):
+                rewarded.append(self.id)
+                pyzork.QM.start_quest("Second")
+                pyzork.QM.finish_quest("Second")
+        
+        @pyzork.QM.add(id="Second")
+        class Quest2(pyzork.Quest):
+            @classmethod
+            def reward_all(cls, quests, player, world):
+                rewarded.append([quest.id for quest in quests])
+        
+        pyzork.QM.start_quest("First")
+        pyzork.QM.finish_quest("First")
+        self.assertEqual(len(pyzork.QM.pending_rewards), 1)
+        
+        pyzork.QM.process_rewards(None, None)
+        
+        self.assertEqual(rewarded, ["First", ["Second"]])
+        self.assertEqual(len(pyzork.QM.pending_rewards), 0)
+        
+    def test_reward_order(self):
+        rewarded = []
+        
+        for quest_id in ("Hunt", "Fetch"):
+            @pyzork.QM.add(id=quest_id, repeatable=2)
+            class Single(pyzork.Quest):
+                def reward(self, player, world):
+                    rewarded.append(self.id)
+                    
+        @pyzork.QM.add(id="Batch", repeatable=2)
+        class Batch(pyzork.Quest):
+            @classmethod
+            def reward_all(cls, quests, player, world):
+                rewarded.append([quest.id for quest in quests])
+                
+        for quest_id in ("Hunt", "Batch", "Fetch", "Hunt", "Batch"):
+            pyzork.QM.start_quest(quest_id)
+            pyzork.QM.finish_quest(quest_id)
+            
+        pyzork.QM.process_rewards(None, None)
+        self.assertEqual(rewarded, ["Hunt", ["Batch", "Batch"], "Fetch", "Hunt"])
+        
+    def test_buffering(self):
+        deaths = []
+        
+        @pyzork.QM.add(id="OnDeath")
+        class Quest1(pyzork.Quest):
+            def on_death(self, entity):
+                deaths.append(entity)
+                
+            def on_pickup(self, item):
+                deaths.append(item)
+        
+        pyzork.QM.start_quest("OnDeath")
+        pyzork.QM.start_buffering(coalesce=True, ordering="event")
+        
+        pyzork.QM.progress_quests("on_death", "goblin")
+        pyzork.QM.progress_quests("on_pickup", "sword")
+        pyzork.QM.progress_quests("on_death", "goblin")
+        pyzork.QM.progress_quests("on_death", "orc")
+        self.assertEqual(deaths, [])
+        
+        pyzork.QM.flush_events()
+        self.assertEqual(deaths, ["goblin", "orc", "sword"])
+        
+        pyzork.QM.progress_quests("on_death", "goblin")
+        pyzork.QM.stop_buffering()
+        pyzork.QM.progress_quests("on_death", "orc")
+        self.assertEqual(deaths, ["goblin", "orc", "sword", "goblin", "orc"])
+        
+        with self.assertRaises(ValueError):
+            pyzork.QM.start_buffering(ordering="random")
+        
+    def test_quest_manager(self):
+        @pyzork.QM.add(id="OnDeath")
+        class Quest1(pyzork.Quest):
+            def on_death(self, entity):
+                return True
+        
+        pyzork.QM.start_quest("OnDeath")
+        self.assertIs(pyzork.get_quest_manager(), pyzork.QM)
+        
+        with pyzork.quest_manager(pyzork.QuestManager(quests=dict(pyzork.QM.quests))) as quests:
+            self.assertIs(pyzork.get_quest_manager(), quests)
+            quests.start_quest("OnDeath")
+            pyzork.NPC(max_health=1).take_pure_damage(5)
+            
+            self.assertEqual(quests.get_finished("OnDeath"), 1)
+            self.assertEqual(pyzork.QM.get_finished("OnDeath"), 0)
+            
+        self.assertIs(pyzork.get_quest_manager(), pyzork.QM)
+        self.assertEqual(len(pyzork.QM.active_quests), 1)
+        
+    def test_conditions(self):
+        class Goblin(pyzork.NPC):
+            max_health = 1
+            
+        class Orc(pyzork.NPC):
+            max_health = 1
+        
+        @pyzork.QM.add(id="Slayer")
+        class Quest1(pyzork.Quest):
+            conditions = [pyzork.count("on_death", type=Goblin, n=2), pyzork.count(pyzork.Quest.on_pickup, name="Crown")]
+        
+        pyzork.QM.start_quest("Slayer")
+        self.assertEqual(set(pyzork.QM.watchers), {("on_death", Goblin), ("on_pickup", ("name", "Crown"))})
+        self.assertEqual(pyzork.QM.subscribers, {})
+        
+        Orc().take_pure_damage(5)
+        Goblin().take_pure_damage(5)
+        self.assertEqual(pyzork.QM.active_quests["Slayer"].progress, [1, 0])
+        
+        Goblin().take_pure_damage(5)
+        self.assertNotIn(("on_death", Goblin), pyzork.QM.watchers)
+        self.assertEqual(len(pyzork.QM.active_quests), 1)
+        
+        pyzork.QM.progress_quests("on_pickup", pyzork.QuestItem(name="Crown"))
+        self.assertEqual(len(pyzork.QM.active_quests), 0)
+        self.assertEqual(pyzork.QM.get_finished("Slayer"), 1)
+        self.assertEqual(pyzork.QM.watchers, {})
+        
+    def test_async(self):
+        running = []
+        calls = []
+        
+        def make(quest_id, delay):
+            @pyzork.QM.add(id=quest_id, repeatable=2)
+            class Slow(pyzork.Quest):
+                async def on_custom(self):
+                    running.append(quest_id)
+                    calls.append(len(running))
+                    await asyncio.sleep(delay)
+                    running.remove(quest_id)
+                    return True
+                    
+                async def reward(self, player, world):
+                    calls.append(self.id)
+        
+        for index in range(4):
+            make(f"Slow{index}", 0.01 * (4 - index))
+            pyzork.QM.start_quest(f"Slow{index}")
+        
+        finished = []
+        pyzork.utils.update_output(finished.append)
+        max_concurrency, pyzork.QM.max_concurrency = pyzork.QM.max_concurrency, 2
+        
+        async def turn():
+            pyzork.QM.progress_quests("on_custom")
+            self.assertEqual(len(pyzork.QM.active_quests), 4)
+            await pyzork.QM.settle()
+            
+            pyzork.QM.process_rewards(None, None)
+            await pyzork.QM.settle()
+            
+        try:
+            asyncio.run(turn())
+        finally:
+            pyzork.QM.max_concurrency = max_concurrency
+        
+        self.assertEqual(max(calls[:4]), 2)
+        self.assertEqual(calls[4:], [f"Slow{index}" for index in range(4)])
+        self.assertEqual(finished, [f"finished {pyzork.QM.quests[f'Slow{index}'].name} (Slow{index})" for index in range(4)])
+        
+        # without an event loop the handler is run right away
+        pyzork.QM.start_quest("Slow0")
+        pyzork.QM.progress_quests("on_custom")
+        self.assertEqual(pyzork.QM.get_finished("Slow0"), 2)
+        
+    def test_async_lazy_import(self):
+        import subprocess
+        import sys
+        
+        snippet = "import sys, pyzork; print('asyncio' in sys.modules, 'inspect' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ["False", "False"])
+        
+    def test_reward_error(self):
+        rewarded = []
+        
+        @pyzork.QM.add(id="Broken")
+        class Quest1(pyzork.Quest):
+            def reward(self, player, world):
+                raise ValueError("broken reward")
+        
+        @pyzork.QM.add(id="Working")
+        class Quest2(pyzork.Quest):
+            def reward(self, player, world):
+                rewarded.append(self.id)
+        
+        for quest_id in ("Broken", "Working"):
+            pyzork.QM.start_quest(quest_id)
+            pyzork.QM.finish_quest(quest_id)
+            
+        with self.assertRaises(ValueError):
+            pyzork.QM.process_rewards(None, None)
+            
+        self.assertEqual([quest.id for quest in pyzork.QM.pending_rewards], ["Working"])
+        
+        pyzork.QM.process_rewards(None, None)
+        self.assertEqual(rewarded, ["Working"])
+        self.assertEqual(len(pyzork.QM.pending_rewards), 0)
+        
+    def test_buffering_errors(self):
+        deaths = []
+        
+        @pyzork.QM.add(id="OnDeath")
+        class Quest1(pyzork.Quest):
+            def on_death(self, entity):
+                if entity == "cursed":
+                    raise ValueError("cursed")
+                    
+                deaths.append(entity)
+        
+        pyzork.QM.start_quest("OnDeath")
+        pyzork.QM.start_buffering(coalesce=True)
+        for entity in ("goblin", "cursed", "orc", "orc"):
+            pyzork.QM.progress_quests("on_death", entity)
+            
+        with self.assertRaises(ValueError):
+            pyzork.QM.flush_events()
+            
+        self.assertEqual(deaths, ["goblin"])
+        pyzork.QM.progress_quests("on_death", "orc")
+        pyzork.QM.flush_events()
+        self.assertEqual(deaths, ["goblin", "orc"])
+        
+        player = pyzork.Player(max_health=1)
+        with self.assertRaises(pyzork.errors.EndGame):
+            player.take_pure_damage(5)
+            
+        self.assertEqual(deaths, ["goblin", "orc", player])
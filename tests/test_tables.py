@@ -0,0 +1,116 @@
+import unittest
+import pyzork
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class Goblin(pyzork.NPC):
+    """Goblin"""
+    def __init__(self, **kwargs):
+        super().__init__(max_health=10, defense=2, max_energy=5, energy=1, money=3, **kwargs)
+        
+class Guard(pyzork.Modifier):
+    duration = -1
+    stat_type = pyzork.StatEnum.defense
+    
+    def buff(self, entity):
+        return 6
+
+class TableTests:
+    backend = None
+    
+    def setUp(self):
+        self.output = []
+        pyzork.utils.update_output(self.output.append)
+        self.deaths = []
+        pyzork.QM.clear()
+        
+        @pyzork.QM.add(id="Deaths")
+        class Deaths(pyzork.Quest):
+            def on_death(quest, entity):
+                self.deaths.append(entity)
+                
+        pyzork.QM.start_quest("Deaths")
+        
+    def tearDown(self):
+        pyzork.QM.clear()
+        pyzork.utils.update_output(lambda text: print(text))
+        
+    def test_view(self):
+        table = pyzork.EntityTable(backend=self.backend, capacity=1)
+        goblins = [table.spawn(Goblin) for _ in range(3)]
+        
+        goblin = goblins[1]
+        self.assertIsInstance(goblin, Goblin)
+        self.assertEqual(goblin.name, "Goblin")
+        self.assertEqual((goblin.health, goblin.max_health, goblin.energy, goblin.defense, goblin.money), (10, 10, 1, 2, 3))
+        
+        goblin.take_damage(5)
+        goblin.add_money(2)
+        self.assertEqual(goblin.health, 7)
+        self.assertEqual(list(table.column("_health")), [10, 7, 10])
+        self.assertEqual(list(table.column("money")), [3, 5, 3])
+        
+        table.remove(goblins[0])
+        self.assertEqual(len(table), 2)
+        self.assertNotIn(goblins[0], table)
+        self.assertIs(type(goblins[0]), Goblin)
+        self.assertEqual(goblins[0].health, 10)
+        self.assertEqual(goblins[1].health, 7)
+        self.assertEqual(list(table.column("_health")), [10, 7])
+        
+    def test_bulk(self):
+        table = pyzork.EntityTable(backend=self.backend)
+        goblins = [table.spawn(Goblin) for _ in range(4)]
+        plain = [Goblin() for _ in range(4)]
+        for group in (goblins, plain):
+            group[1].add_modifier(Guard())
+            group[2].take_pure_damage(7)
+            group[3].take_pure_damage(10)
+            
+        self.deaths.clear()
+        self.output.clear()
+        killed = table.damage_all(5)
+        table_output = list(self.output)
+        
+        self.output.clear()
+        for goblin in plain:
+            if goblin.is_alive():
+                goblin.take_damage(5)
+                
+        self.assertEqual(table_output, self.output)
+        self.assertEqual([goblin.health for goblin in goblins], [goblin.health for goblin in plain])
+        self.assertEqual(killed, [goblins[2]])
+        self.assertEqual(self.deaths, [goblins[2], plain[2]])
+        self.assertEqual(list(table.alive_mask()), [True, True, False, False])
+        self.assertEqual(table.alive(), goblins[:2])
+        
+        table.regen_all(health=20, energy=2, quiet=True)
+        self.assertEqual([goblin.health for goblin in goblins], [10, 10, 0, 0])
+        self.assertEqual([goblin.energy for goblin in goblins], [3, 3, 1, 1])
+
+    def test_lazy(self):
+        table = pyzork.EntityTable(backend=self.backend)
+        goblin = table.spawn(Goblin)
+        self.assertIsNone(goblin._inventory)
+        self.assertIsNone(goblin._experience)
+        
+        table.damage_all(2)
+        self.assertIsNone(goblin._inventory)
+        
+        goblin.inventory.add_item(pyzork.Weapon(name="Club"))
+        self.assertIs(goblin.inventory.entity, goblin)
+        self.assertIs(goblin.experience.entity, goblin)
+        
+        table.remove(goblin)
+        self.assertEqual(len(goblin.inventory.equipment), 1)
+        self.assertEqual(goblin.experience.level, 0)
+
+class TestArrayTable(TableTests, unittest.TestCase):
+    backend = "array"
+    
+@unittest.skipUnless(numpy, "numpy is not installed")
+class TestNumpyTable(TableTests, unittest.TestCase):
+    backend = "numpy"